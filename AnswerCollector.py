@@ -0,0 +1,131 @@
+import selectors
+import time
+from Colors import ANSI
+from Protocol import MessageKind, split_question_id
+
+
+class AnswerCollector:
+    """
+    Class collecting the answers of a round from all the active players on a single thread.
+
+    All the player sockets are waited on at once with a selector, the answer of each player and its receive time are
+    recorded on the player. Once the deadline passes the collection stops, no reader is left behind to steal the next answer.
+
+    Attributes:
+        players (list): The players to collect answers from.
+        timeout (float): How many seconds the players have to answer.
+        question_id (int): The id of the question being answered.
+        answers (dict): The answer of each player that answered, None if a socket error happened.
+    """
+
+    def __init__(self, players, timeout, question_id=0):
+        """
+        Initializes the AnswerCollector.
+
+        Args:
+            players (list): The players to collect answers from.
+            timeout (float): How many seconds the players have to answer.
+            question_id (int): The id of the question being answered, v2 answers to other questions are ignored.
+        """
+        self.players = list(players)
+        self.timeout = timeout
+        self.question_id = question_id
+        self.answers = {}
+        for player in self.players:
+            player.clear_answer()
+
+    def collect(self):
+        """
+        Waits for the answers of the players until all of them answered or the deadline passed.
+
+        Returns:
+            dict: Dictionary containing client answers, players that did not answer in time have no entry.
+        """
+        deadline = time.monotonic() + self.timeout
+        selector = selectors.DefaultSelector()
+        try:
+            for player in self.players:
+                # A v2 client may have sent its answer along with earlier bytes that are already buffered
+                decoder = player.get_decoder()
+                buffered_answer = self.find_answer(decoder) if decoder is not None else None
+                if buffered_answer is not None:
+                    self.answers[player] = buffered_answer
+                    player.record_answer(buffered_answer, time.monotonic())
+                    continue
+                try:
+                    selector.register(player.get_socket(), selectors.EVENT_READ, player)
+                except (ValueError, OSError) as e:
+                    self.record_error(player, e)
+
+            remaining = deadline - time.monotonic()
+            while selector.get_map() and remaining > 0:
+                for key, _ in selector.select(remaining):
+                    if self.read_answer(key.data):
+                        selector.unregister(key.fileobj)
+                remaining = deadline - time.monotonic()
+        finally:
+            selector.close()
+        return self.answers
+
+    def read_answer(self, player):
+        """
+        Reads the answer of a player whose socket is readable.
+
+        Args:
+            player (Player): The player to read the answer from.
+        Returns:
+            bool: True if the player is done for this round, False if a v2 answer frame is not complete yet.
+        """
+        try:
+            data = player.get_socket().recv(1024)
+        except BlockingIOError:
+            return False
+        except Exception as e:
+            self.record_error(player, e)
+            return True
+        try:
+            decoder = player.get_decoder()
+            if decoder is None:
+                answer = data.decode()
+            else:
+                if not data:
+                    raise ConnectionError("connection closed")
+                decoder.feed(data)
+                answer = self.find_answer(decoder)
+                if answer is None:
+                    return False
+        except Exception as e:
+            self.record_error(player, e)
+            return True
+        self.answers[player] = answer
+        player.record_answer(answer, time.monotonic())
+        return True
+
+    def find_answer(self, decoder):
+        """
+        Pops the frames received from a v2 client until the answer to the current question is found.
+
+        Args:
+            decoder (Protocol.FrameDecoder): The decoder of the player.
+        Returns:
+            str: The answer, or None if it was not received yet.
+        """
+        for kind, payload in decoder.frames():
+            if kind != MessageKind.ANSWER:
+                continue
+            question_id, answer = split_question_id(payload)
+            if question_id == self.question_id:
+                return answer
+        return None
+
+    def record_error(self, player, error):
+        """
+        Records that the answer of a player could not be received.
+
+        Args:
+            player (Player): The player that failed.
+            error (Exception): The error that happened.
+        """
+        print(f"{ANSI.RED.value}Socket error when receiving receiving answer from {player.get_name()}: {error}"
+              f"{ANSI.RESET.value}")
+        self.answers[player] = None
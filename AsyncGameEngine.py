@@ -0,0 +1,224 @@
+import asyncio
+import time
+from GameEngine import GameEngine, record_answer_latencies
+from Colors import ANSI
+from Profiler import profiled
+from Protocol import MessageKind, read_frame_async, split_question_id
+
+
+class AsyncGameEngine(GameEngine):
+    """
+    Game engine running every round on a single asyncio event loop.
+
+    The round semantics are the same as in GameEngine, but the questions are fanned out and the answers are
+    collected with the players' asyncio streams instead of blocking sockets and a thread per player. Messages are
+    buffered by each stream's transport, so sending never waits for a slow client.
+    """
+
+    async def receive_answer(self, player, question_id):
+        """
+        Receives the raw answer of a player, skipping v2 answers to other questions.
+
+        Args:
+            player (Player): The player to read the answer from.
+            question_id (int): The id of the question being answered.
+        Returns:
+            str: The answer of the player.
+        """
+        decoder = player.get_decoder()
+        if decoder is None:
+            return (await player.get_reader().read(1024)).decode()
+        while True:
+            kind, payload = await read_frame_async(player.get_reader(), decoder)
+            if kind != MessageKind.ANSWER:
+                continue
+            answer_question_id, answer = split_question_id(payload)
+            if answer_question_id == question_id:
+                return answer
+
+    async def read_answer(self, player, timeout, question_id=0):
+        """
+        Reads the answer of a single player.
+
+        Args:
+            player (Player): The player to read the answer from.
+            timeout (float): How many seconds to wait for the answer.
+            question_id (int): The id of the question being answered.
+        Returns:
+            tuple: The player and the answer, the answer is None if a socket error happened.
+        Raises:
+            asyncio.TimeoutError: If the player did not answer in time.
+        """
+        try:
+            answer = await asyncio.wait_for(self.receive_answer(player, question_id), timeout)
+            player.record_answer(answer, time.monotonic())
+            return player, answer
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            print(f"{ANSI.RED.value}Socket error when receiving receiving answer from {player.get_name()}: {e}"
+                  f"{ANSI.RESET.value}")
+            return player, None
+
+    @profiled('get_answers')
+    async def get_answers(self, question_id=0):
+        """
+        Receives answers from clients.
+
+        Players that did not answer within the answer timeout get no entry, their pending reads are cancelled.
+
+        Args:
+            question_id (int): The id of the question being answered.
+        Returns:
+            dict: Dictionary containing client answers.
+        """
+        players = self.player_manager.get_active_players()
+        for player in players:
+            player.clear_answer()
+        reads = [self.read_answer(player, self.scheduler.answer_timeout, question_id) for player in players]
+        results = await asyncio.gather(*reads, return_exceptions=True)
+        client_answers = {}
+        for result in results:
+            if isinstance(result, tuple):
+                player, answer = result
+                client_answers[player] = answer
+        return client_answers
+
+    def evict_player(self, player):
+        """
+        Kicks a player that can not keep up with the messages sent to it, dropping its connection.
+
+        Args:
+            player (Player): The player to evict.
+        """
+        print(f'player {player.get_name()} is too slow or disconnected')
+        self.kick_player(player)
+        player.get_writer().transport.abort()
+
+    def send_encoded(self, player, data):
+        """
+        Queues encoded bytes on the player's stream without waiting for them to be sent.
+
+        Args:
+            player (Player): The player to send the bytes to.
+            data (bytes): The bytes to send.
+        """
+        writer = player.get_writer()
+        if writer.is_closing():
+            return
+        try:
+            writer.write(data)
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            self.kick_player(player)
+            return
+        if writer.transport.get_write_buffer_size() > self.high_water_mark:
+            self.evict_player(player)
+
+    def send_encoded_many(self, messages):
+        """
+        Queues encoded bytes on the streams of many players.
+
+        Args:
+            messages (list): The players and the bytes to send them.
+        """
+        for player, data in messages:
+            self.send_encoded(player, data)
+
+    async def play_game(self, tcp_socket=None):
+        """
+        Plays the game.
+
+        Args:
+            tcp_socket: Unused, kept for compatibility with GameEngine.play_game.
+        """
+        for player in self.player_manager.get_active_players():
+            self.game_statistics.add_player(player)
+        game_started = time.perf_counter()
+        self.send_welcome_message()
+        # The game draws its own order, the question bank is shared with the games running concurrently
+        questions = self.question_bank.sample()
+        self.scheduler.start(questions, self.message_cache)
+        await asyncio.sleep(self.scheduler.welcome_delay)
+        self.socket = tcp_socket
+        winner = None
+        question = self.scheduler.take_question()
+        while question is not None:
+            if self.player_manager.count_active_players() == 0:
+                break
+            round_started = time.perf_counter()
+            winner = await self.play_round(question)
+            self.round_timings[-1]["round"] = time.perf_counter() - round_started
+            if winner is not None:
+                break
+            self.round += 1
+            await asyncio.sleep(self.scheduler.round_delay)
+            question = self.scheduler.take_question()
+
+        if question is None:  # out of questions
+            msg = self.build_out_of_questions_msg()
+            print(msg)
+            self.send_message_to_clients(msg, MessageKind.GAME_OVER)
+        elif self.player_manager.count_active_players() == 0:
+            print(f"Were out of players, game is over {ANSI.SAD_FACE.value}")
+        elif winner is not None:
+            self.game_over(winner)
+        self.game_statistics.request_flush()
+        self.game_time = time.perf_counter() - game_started
+
+    async def close_connections(self, players):
+        """
+        Closes the streams of players once the game is over.
+
+        Args:
+            players (list): The players whose streams are closed.
+        """
+        for player in players:
+            writer = player.get_writer()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    @profiled('play_round')
+    async def play_round(self, question):
+        """
+        Plays a round of the game.
+        Args:
+            question (dict): a dict of the question and its answer.
+        """
+        round_started = time.perf_counter()
+        round_payload = self.build_round_question_payload(question)
+        print(round_payload.decode())
+        self.send_payload(self.player_manager.get_players(), round_payload, MessageKind.QUESTION, question['id'])
+        fanned_out = time.perf_counter()
+        question_sent = time.monotonic()
+        self.scheduler.prepare_next()  # while the players think
+        self.prepare_round_results()
+        answers = await self.get_answers(question['id'])
+        collected = time.perf_counter()
+        record_answer_latencies(answers, question_sent)
+        correct_players, incorrect_players = self.handle_answers(answers, question['is_true'])
+        scored = time.perf_counter()
+
+        self.update_players_statistics(correct_players, incorrect_players, question)  # update the game statistics
+        self.game_statistics.request_flush()
+        self.record_round_timing(fanned_out - round_started, collected - fanned_out, scored - collected,
+                                 time.perf_counter() - scored)
+
+        # no one answered / no one answered correct
+        if len(correct_players) == 0:
+            self.send_message_to_clients(self.build_no_correct_answer_msg(), MessageKind.ROUND_RESULT)
+        # There is a winner
+        elif len(correct_players) == 1:
+            return correct_players[0]
+
+        # multiple correct answers
+        else:
+            msg = self.build_round_result_msg(correct_players)
+            self.player_manager.set_active_players(correct_players)
+            self.send_message_to_clients(msg, MessageKind.ROUND_RESULT)
+            self.send_message_to_losers(incorrect_players)
+
+        return None
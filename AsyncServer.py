@@ -0,0 +1,163 @@
+import asyncio
+import time
+from AsyncGameEngine import AsyncGameEngine
+from Colors import ANSI
+from Metrics import JOIN_LATENCY
+from Profiler import profiled
+from Player import Player
+from Protocol import MessageKind, encode_message, read_frame_async, receive_hello_async
+from Server import Server, configure_player_socket
+
+
+class AsyncServer(Server):
+    """
+    A trivia server running the lobby and the game on a single asyncio event loop.
+
+    Accepting players, registering their names, broadcasting the questions and collecting the answers are all done
+    with asyncio streams, so no thread is created per connection or per round. The event loop outlives the games,
+    the streams of the players carried over to the next game are bound to it.
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): The event loop every game is played on.
+    """
+
+    engine_class = AsyncGameEngine
+
+    def __init__(self, config_file='config.json', ip_address=None, headless=False, game_statistics=None,
+                 tcp_port=None, services=True):
+        """
+        Initializes the AsyncServer.
+
+        Args:
+            config_file (str): The path to the JSON configuration file.
+            ip_address (str): The IP address to serve on, the address of the network interface when not given.
+            headless (bool): Whether to play the games without the interactive menus.
+            game_statistics (GameStatistics): The statistics to record the games in, the configured backend is
+                opened when not given.
+            tcp_port (int): The TCP port to serve on, a free port is looked for when not given.
+            services (bool): Whether to serve the metrics endpoint and install the profiling signal.
+        """
+        super().__init__(config_file, ip_address, headless, game_statistics, tcp_port, services)
+        self.loop = None
+
+    async def broadcast_offer_async(self, udp_socket):
+        """
+        Broadcast offer messages to clients until no new player joined for lobby_timeout seconds.
+
+        Args:
+            udp_socket (socket.socket): The UDP socket used for broadcasting.
+        """
+        brod_ip = self.get_broadcast_address()
+        print(f"{ANSI.MAGENTA.value}Server started, listening on IP address \n"
+              f"{ANSI.RESET.value}{self.ip_address} waiting for players to join the game!")
+        start_time = time.time()
+        curr_len = self.player_manager.count_players()
+        while curr_len == 0 or time.time() - start_time <= self.lobby_timeout:
+            try:
+                self.send_offers(udp_socket, brod_ip, self.get_offer_load())
+            except OSError as e:
+                print("Error:", e)
+            await asyncio.sleep(1)
+            if self.player_manager.count_players() > curr_len:
+                curr_len = self.player_manager.count_players()
+                start_time = time.time()
+
+        print(f"No new players joined within {self.lobby_timeout} seconds. Stopping broadcast.")
+        udp_socket.close()
+        self.broadcast_finished_event.set()
+
+    @profiled('handle_client')
+    async def handle_client_async(self, reader, writer):
+        """
+        Handle a client connection.
+
+        Receives the player name from the client, negotiates the protocol version and adds the player to the
+        PlayerManager.
+
+        Args:
+            reader (asyncio.StreamReader): The client stream reader.
+            writer (asyncio.StreamWriter): The client stream writer.
+        """
+        accepted_at = time.perf_counter()
+        address = writer.get_extra_info('peername')
+        if self.broadcast_finished_event.is_set():
+            writer.close()
+            return
+        try:
+            configure_player_socket(writer.get_extra_info('socket'), self.socket_send_buffer_size)
+            protocol_version, player_name, decoder = await receive_hello_async(reader)
+            player = Player(player_name, writer.get_extra_info('socket'), True, reader, writer, protocol_version,
+                            decoder)
+            name_changed = self.player_manager.add_player(player)
+            name = player.get_name()
+            print(f"Player {name} connected from {address}")
+            if name_changed:
+                writer.write(encode_message(protocol_version, MessageKind.TEXT, f'Your name changed to {name}'))
+                await writer.drain()
+            JOIN_LATENCY.observe(time.perf_counter() - accepted_at)
+        except Exception as e:
+            print(f"Error handling client: {e}")
+
+    async def run_game_async(self):
+        udp_socket = self.get_udp_socket()
+        udp_socket.setblocking(False)
+        tcp_server = await asyncio.start_server(self.handle_client_async, self.ip_address, self.tcp_port,
+                                                reuse_address=True)
+        self.listening.set()
+        print(f"Server listening on IP address {self.ip_address}, port {self.tcp_port}")
+        watchers = [asyncio.create_task(self.watch_departure(player)) for player in self.carried_players]
+        await self.broadcast_offer_async(udp_socket)
+        tcp_server.close()  # the connections of the players are left open
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+        self.game_statistics.update_game()
+        await self.game_engine.play_game()
+        self.carried_players = await self.release_players_async(self.player_manager.get_players())
+
+    async def watch_departure(self, player):
+        """
+        Remove a carried player from the lobby as soon as it leaves or disconnects.
+
+        Args:
+            player (Player): The carried player.
+        """
+        try:
+            while True:
+                kind, _ = await read_frame_async(player.get_reader(), player.get_decoder())
+                if kind == MessageKind.LEAVE:
+                    break
+        except (ConnectionError, OSError, ValueError):
+            pass
+        print(f"Player {player.get_name()} left the lobby")
+        self.player_manager.kick_player(player)
+        player.get_writer().close()
+
+    async def release_players_async(self, players):
+        """
+        Close the streams of the players of a finished game, or invite them to the next game when players are
+        carried over.
+
+        Args:
+            players (tuple): The players still connected at the end of the game.
+
+        Returns:
+            list: The players carried into the next lobby.
+        """
+        carried = []
+        closed = []
+        for player in players:
+            writer = player.get_writer()
+            if self.carry_over_players and player.get_protocol_version() >= 2 and not writer.is_closing():
+                writer.write(self.build_next_game_message())
+                carried.append(player)
+            else:
+                closed.append(player)
+        await self.game_engine.close_connections(closed)
+        return carried
+
+    def run_game(self):
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.run_game_async())
+        self.reset_game()
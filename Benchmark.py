@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from BotSwarm import BotSwarm, raise_open_files_limit, summarize_latencies
+from Colors import ANSI
+from SQLiteStatistics import SQLiteStatistics
+
+PLAYER_COUNTS = (10, 100, 1000, 5000)
+SERVER_MODES = ("threaded", "asyncio")
+
+
+def serve(mode, players, lobby_timeout, pacing, statistics, ports, results):
+    """
+    Play one game on a headless server listening on loopback, in a process of its own so the simulated players do
+    not share its interpreter.
+
+    Args:
+        mode (str): The server mode, one of SERVER_MODES.
+        players (int): The number of players expected.
+        lobby_timeout (float): How many seconds the lobby waits for another player before the game starts.
+        pacing (dict): The delays and the answer timeout of the rounds in milliseconds, overriding the config file.
+        statistics (str): "memory" to keep the statistics in an in-memory database, "config" to use the backend of
+            the config file.
+        ports (multiprocessing.Queue): The queue the TCP port of the server is sent on, once it accepts connections.
+        results (multiprocessing.Queue): The queue the timings of the game are sent on.
+    """
+    sys.stdout = open(os.devnull, 'w')  # the server prints every answer, the terminal would be benchmarked instead
+    raise_open_files_limit(players + 64)
+    if mode == "asyncio":
+        from AsyncServer import AsyncServer as server_class
+    else:
+        from Server import Server as server_class
+    # the configured backend is never opened for an in-memory run, opening a journal compacts it
+    game_statistics = SQLiteStatistics(':memory:') if statistics == "memory" else None
+    server = server_class(ip_address='127.0.0.1', headless=True, game_statistics=game_statistics)
+    server.lobby_timeout = lobby_timeout
+    server.pacing = {**server.pacing, **pacing}
+    engine = server.game_engine = server.create_game_engine()
+
+    def announce_port():
+        server.listening.wait()
+        ports.put(server.tcp_port)
+
+    threading.Thread(target=announce_port, daemon=True).start()
+    started_at = time.perf_counter()
+    server.run_game()
+    results.put({"run_s": time.perf_counter() - started_at, "game_s": engine.game_time,
+                 "rounds": engine.round_timings})
+
+
+def get_revision():
+    """
+    Get the git revision the benchmark runs on.
+
+    Returns:
+        str: The commit hash, None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(mode, players, accuracy, think_mean_ms, join_rate, lobby_timeout, pacing, statistics, timeout, seed):
+    """
+    Benchmark one game.
+
+    Args:
+        mode (str): The server mode, one of SERVER_MODES.
+        players (int): The number of simulated players.
+        accuracy (float): The probability that a simulated player answers correctly.
+        think_mean_ms (float): The mean think time of the simulated players, in milliseconds.
+        join_rate (float): How many players join per second, 0 to join all at once.
+        lobby_timeout (float): How many seconds the lobby waits for another player before the game starts.
+        pacing (dict): The delays and the answer timeout of the rounds in milliseconds, overriding the config file.
+        statistics (str): "memory" or "config", see serve.
+        timeout (float): How many seconds the game may take.
+        seed (int): The seed of the simulated players.
+
+    Returns:
+        dict: The join, fan-out, collection and round timings and the throughput of the game.
+    """
+    ports = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(mode, players, lobby_timeout, pacing, statistics, ports,
+                                                                   results))
+    server.start()
+    try:
+        port = ports.get(timeout=30)
+        swarm = BotSwarm(players, accuracy, "uniform", think_mean_ms, join_rate=join_rate, game_timeout=timeout,
+                         name_prefix="bench", seed=seed)
+        swarm_report = asyncio.run(swarm.run('127.0.0.1', port))
+        game = results.get(timeout=timeout)
+    finally:
+        server.join(10)
+        if server.is_alive():
+            server.kill()
+    join_s = (swarm.last_join - swarm.first_join) if swarm.first_join is not None else 0
+    game_s = game["game_s"]
+    rounds = game["rounds"]
+    return {
+        "players": players,
+        "joined": swarm_report["joined"],
+        "finished": swarm_report["finished"],
+        "errors": swarm_report["errors"],
+        "join_latency": swarm_report["join_latency"],
+        "result_wait": swarm_report["result_wait"],
+        "rounds": len(rounds),
+        "fan_out": summarize_latencies([timing["fan_out"] for timing in rounds]),
+        "collection": summarize_latencies([timing["collection"] for timing in rounds]),
+        "scoring": summarize_latencies([timing["scoring"] for timing in rounds]),
+        "statistics": summarize_latencies([timing["statistics"] for timing in rounds]),
+        "round": summarize_latencies([timing["round"] for timing in rounds if "round" in timing]),
+        "join_s": round(join_s, 3),
+        "lobby_s": round(game["run_s"] - game_s, 3) if game_s is not None else None,
+        "game_s": round(game_s, 3) if game_s is not None else None,
+        # back to back games, the players joining as fast as in this run and the lobby closing once they all joined
+        "games_per_hour": round(3600 / (join_s + game_s), 1) if game_s else None,
+    }
+
+
+def run_benchmark(mode="threaded", player_counts=PLAYER_COUNTS, repeat=1, accuracy=0.5, think_mean_ms=100,
+                  join_rate=0.0, lobby_timeout=2, pacing=None, statistics="memory", timeout=600, seed=0):
+    """
+    Benchmark games of growing sizes against a headless server on loopback.
+
+    Args:
+        mode (str): The server mode, one of SERVER_MODES.
+        player_counts (tuple): The numbers of players of the benchmarked games.
+        repeat (int): How many games to play for every number of players.
+        accuracy (float): The probability that a simulated player answers correctly.
+        think_mean_ms (float): The mean think time of the simulated players, in milliseconds.
+        join_rate (float): How many players join per second, 0 to join all at once.
+        lobby_timeout (float): How many seconds the lobby waits for another player before the game starts.
+        pacing (dict): The delays and the answer timeout of the rounds in milliseconds, the config file's when not
+            given.
+        statistics (str): "memory" or "config", see serve.
+        timeout (float): How many seconds a game may take.
+        seed (int): The seed of the simulated players, every game adds its number to it.
+
+    Returns:
+        dict: The environment, the settings and the results of every game.
+    """
+    settings = {"mode": mode, "player_counts": list(player_counts), "repeat": repeat, "accuracy": accuracy,
+                "think_mean_ms": think_mean_ms, "join_rate": join_rate, "lobby_timeout": lobby_timeout,
+                "pacing": pacing or {}, "statistics": statistics, "seed": seed}
+    runs = []
+    for players in player_counts:
+        for attempt in range(repeat):
+            result = run_once(mode, players, accuracy, think_mean_ms, join_rate, lobby_timeout, pacing or {},
+                              statistics, timeout, seed + len(runs))
+            result["repeat"] = attempt
+            runs.append(result)
+            print_result(result)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": get_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+        "runs": runs,
+    }
+
+
+def print_result(result):
+    """
+    Print the result of one benchmarked game.
+
+    Args:
+        result (dict): The result of the game.
+    """
+    print(f"{ANSI.MAGENTA.value}{result['players']} players: {result['rounds']} rounds in {result['game_s']}s, "
+          f"{result['games_per_hour']} games/hour{ANSI.RESET.value}")
+    for name in ("join_latency", "fan_out", "collection", "round"):
+        timing = result[name]
+        print(f"{ANSI.CYAN.value}  {name}: p50 {timing['p50_ms']}ms, p99 {timing['p99_ms']}ms, "
+              f"max {timing['max_ms']}ms{ANSI.RESET.value}")
+    if result["errors"]:
+        print(f"{ANSI.RED.value}  errors: {result['errors']}{ANSI.RESET.value}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the trivia server on loopback with simulated players.")
+    parser.add_argument("--mode", choices=SERVER_MODES, default="threaded", help="server mode")
+    parser.add_argument("--players", type=int, nargs="+", default=list(PLAYER_COUNTS),
+                        help="numbers of players of the benchmarked games")
+    parser.add_argument("--repeat", type=int, default=1, help="games to play for every number of players")
+    parser.add_argument("--accuracy", type=float, default=0.5, help="probability of a correct answer")
+    parser.add_argument("--think-mean-ms", type=float, default=100, help="mean think time in milliseconds")
+    parser.add_argument("--join-rate", type=float, default=0.0, help="joins per second, 0 for all at once")
+    parser.add_argument("--lobby-timeout", type=float, default=2, help="seconds the lobby waits for a new player")
+    parser.add_argument("--welcome-delay-ms", type=float, help="delay after the welcome message")
+    parser.add_argument("--round-delay-ms", type=float, help="delay between two rounds")
+    parser.add_argument("--answer-timeout-ms", type=float, help="time the players have to answer")
+    parser.add_argument("--statistics", choices=("memory", "config"), default="memory",
+                        help="keep the statistics in memory or use the backend of the config file")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds a game may take")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulated players")
+    parser.add_argument("--output", help="path of the JSON results, benchmark_<mode>_<time>.json when not given")
+    args = parser.parse_args()
+    round_pacing = {key: value for key, value in (("welcome_delay_ms", args.welcome_delay_ms),
+                                                  ("round_delay_ms", args.round_delay_ms),
+                                                  ("answer_timeout_ms", args.answer_timeout_ms)) if value is not None}
+    benchmark = run_benchmark(args.mode, args.players, args.repeat, args.accuracy, args.think_mean_ms, args.join_rate,
+                              args.lobby_timeout, round_pacing, args.statistics, args.timeout, args.seed)
+    output = args.output or f"benchmark_{args.mode}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(benchmark, f, indent=2)
+    print(f"{ANSI.GREEN.value}Results written to {output}{ANSI.RESET.value}")
@@ -1,16 +1,14 @@
 import random
 import sys
 import threading
-from JsonReader import JSONReader
+from Config import get_config
 from Client import Client
 
 
 class Bot(Client, threading.Thread):
-    def __init__(self, player_name):
-        super().__init__(f'BOT:{player_name} 🤖')
-        true_answers = self.config_reader.get('true_options')
-        false_answers = self.config_reader.get('false_options')
-        self.answer_choices = true_answers + false_answers
+    def __init__(self, player_name, config=None):
+        super().__init__(f'BOT:{player_name} 🤖', config)
+        self.answer_choices = self.config.answer_options
 
     def wait_for_input(self, timeout, msg):
         """
@@ -23,8 +21,7 @@ class Bot(Client, threading.Thread):
 
 if __name__ == '__main__':
     number_of_bots = int(sys.argv[1])
-    json_reader = JSONReader()
-    names = json_reader.get('names')
+    names = list(get_config().get('names'))
     cap = len(names)
     if number_of_bots > cap:
         print(f'Number of bots entered is bigger than capacity: {cap}')
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+from collections import Counter
+from Client import choose_offer
+from Colors import ANSI
+from Config import get_config
+from Protocol import (FrameDecoder, MessageKind, encode_answer, encode_hello, parse_offer, parse_offer_load,
+                      read_frame_async, split_question_id)
+from SmartBot import load_answer_index
+
+THINK_TIMES = ("fixed", "uniform", "exponential")
+
+
+def percentile(values, fraction):
+    """
+    Get a percentile of some values, with the nearest-rank method.
+
+    Args:
+        values (list): The values, sorted.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The percentile, None if there are no values.
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def summarize_latencies(latencies):
+    """
+    Summarize latencies measured in seconds.
+
+    Args:
+        latencies (list): The latencies, in seconds.
+
+    Returns:
+        dict: The count and the p50, p90, p99 and max latencies in milliseconds.
+    """
+    latencies = sorted(latencies)
+    summary = {"count": len(latencies)}
+    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1)):
+        value = percentile(latencies, fraction)
+        summary[f"{name}_ms"] = None if value is None else round(value * 1000, 3)
+    return summary
+
+
+def raise_open_files_limit(needed):
+    """
+    Raise the soft limit of open files of the process, every simulated player holds a socket.
+
+    Args:
+        needed (int): How many files the process needs to open.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        limit = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+
+class OfferListener(asyncio.DatagramProtocol):
+    """
+    Datagram protocol collecting the offers of the servers, shared by every simulated player.
+
+    Attributes:
+        offer_prefix (bytes): The packed magic cookie, message type and server name of the offers to accept.
+        first_offer (asyncio.Future): Resolved once the first valid offer is received.
+        offers (dict): The load of every server that sent an offer, None if unknown, by address and TCP port.
+    """
+
+    def __init__(self, offer_prefix, first_offer):
+        """
+        Initializes the OfferListener.
+
+        Args:
+            offer_prefix (bytes): The packed magic cookie, message type and server name of the offers to accept.
+            first_offer (asyncio.Future): Resolved once the first valid offer is received.
+        """
+        self.offer_prefix = offer_prefix
+        self.first_offer = first_offer
+        self.offers = {}
+
+    def datagram_received(self, data, addr):
+        server_port = parse_offer(data, self.offer_prefix)
+        if server_port is None:
+            return
+        load = parse_offer_load(data, self.offer_prefix)
+        if load is not None or (addr[0], server_port) not in self.offers:
+            self.offers[(addr[0], server_port)] = load
+        if not self.first_offer.done():
+            self.first_offer.set_result(None)
+
+
+class BotSwarm:
+    """
+    Load generator simulating thousands of players from a single process and a single asyncio event loop.
+
+    The server is discovered once for the whole swarm, then every simulated player connects over protocol v2, plays
+    until the game is over and answers every question after a think time, correctly with the swarm's accuracy. A
+    simulated player may also drop its connection instead of answering, with the swarm's disconnect rate. When the
+    server carries its players over, a simulated player stays connected for the swarm's number of games.
+
+    Attributes:
+        players (int): The number of simulated players.
+        accuracy (float): The probability that a simulated player answers correctly.
+        think_time (str): The distribution of the think times, one of THINK_TIMES.
+        think_mean (float): The mean think time, in seconds.
+        disconnect_rate (float): The probability that a simulated player disconnects instead of answering.
+        join_rate (float): How many players join per second, 0 to join all at once.
+        game_timeout (float): How many seconds a simulated player waits for its game to end.
+        name_prefix (str): The prefix of the generated player names.
+        games (int): How many games every simulated player plays on its connection.
+        config (Config): The configuration of the game.
+        rng (random.Random): The random generator of the swarm.
+        answers_by_id (dict): The answers of the questions the server asks, by question id.
+        answer_options (tuple): A true answer and a false answer.
+        join_latencies (list): How long every successful connection took, in seconds.
+        result_waits (list): How long every answer waited for the next message of the server, in seconds. The
+            protocol does not acknowledge answers, so this includes waiting for the answer window to close, the
+            answer round trip is the server's trivia_answer_latency_seconds histogram.
+        counters (Counter): The number of joins, answers, disconnects, finished games and unknown questions.
+        errors (Counter): The number of errors, by error type.
+    """
+
+    def __init__(self, players, accuracy=0.5, think_time="uniform", think_mean_ms=500, disconnect_rate=0.0,
+                 join_rate=0.0, game_timeout=600, name_prefix="swarm", config=None, seed=None, games=1):
+        """
+        Initializes the BotSwarm.
+
+        Args:
+            players (int): The number of simulated players.
+            accuracy (float): The probability that a simulated player answers correctly.
+            think_time (str): The distribution of the think times, one of THINK_TIMES.
+            think_mean_ms (float): The mean think time, in milliseconds.
+            disconnect_rate (float): The probability that a simulated player disconnects instead of answering.
+            join_rate (float): How many players join per second, 0 to join all at once.
+            game_timeout (float): How many seconds a simulated player waits for its game to end.
+            name_prefix (str): The prefix of the generated player names.
+            config (Config): The configuration of the game, the configuration of the process when not given.
+            seed (int): The seed of the random generator, for reproducible runs.
+            games (int): How many games every simulated player plays on its connection.
+        """
+        if think_time not in THINK_TIMES:
+            raise ValueError(f"unknown think time distribution {think_time!r}, expected one of {THINK_TIMES}")
+        self.players = players
+        self.accuracy = accuracy
+        self.think_time = think_time
+        self.think_mean = think_mean_ms / 1000
+        self.disconnect_rate = disconnect_rate
+        self.join_rate = join_rate
+        self.game_timeout = game_timeout
+        self.name_prefix = name_prefix
+        self.games = games
+        self.config = config or get_config()
+        self.rng = random.Random(seed)
+        self.answers_by_id, _ = load_answer_index(self.config)
+        self.answer_options = min(self.config.true_options), min(self.config.false_options)
+        self.join_latencies = []
+        self.result_waits = []
+        self.counters = Counter()
+        self.errors = Counter()
+        self.first_join = None
+        self.last_join = None
+
+    async def discover(self, timeout=60):
+        """
+        Wait for the offers of the servers with a single UDP socket for the whole swarm, and choose the least loaded
+        server among those that sent an offer within the offer window.
+
+        Args:
+            timeout (float): How many seconds to wait for an offer.
+
+        Returns:
+            tuple: The address and the TCP port of the server.
+        """
+        loop = asyncio.get_running_loop()
+        first_offer = loop.create_future()
+        transport, listener = await loop.create_datagram_endpoint(
+            lambda: OfferListener(self.config.offer_prefix, first_offer), local_addr=('', self.config.dest_port),
+            reuse_port=True)
+        try:
+            await asyncio.wait_for(first_offer, timeout)
+            await asyncio.sleep(self.config.get('offer_window_ms', 1500) / 1000)
+            return choose_offer(listener.offers)
+        finally:
+            transport.close()
+
+    def think(self):
+        """
+        Draw the think time of an answer.
+
+        Returns:
+            float: The think time, in seconds.
+        """
+        if self.think_time == "fixed":
+            return self.think_mean
+        if self.think_time == "uniform":
+            return self.rng.uniform(0, 2 * self.think_mean)
+        return self.rng.expovariate(1 / self.think_mean) if self.think_mean > 0 else 0
+
+    def choose_answer(self, question_id):
+        """
+        Choose the answer of a simulated player, correct with the swarm's accuracy.
+
+        Args:
+            question_id (int): The id of the question.
+
+        Returns:
+            str: The answer.
+        """
+        is_true = self.answers_by_id.get(question_id)
+        if is_true is None:
+            self.counters["unknown_questions"] += 1
+            is_true = self.rng.random() < 0.5
+        if self.rng.random() >= self.accuracy:
+            is_true = not is_true
+        return self.answer_options[0] if is_true else self.answer_options[1]
+
+    async def play(self, name, host, port):
+        """
+        Play whole games as one simulated player, staying connected between games until it played the swarm's
+        number of games.
+
+        Args:
+            name (str): The name of the player.
+            host (str): The address of the server.
+            port (int): The TCP port of the server.
+        """
+        started_at = time.perf_counter()
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(encode_hello(name))
+            joined_at = time.perf_counter()
+            self.join_latencies.append(joined_at - started_at)
+            self.counters["joined"] += 1
+            self.first_join = self.first_join or started_at
+            self.last_join = joined_at
+            decoder = FrameDecoder()
+            playing = True
+            answered_at = None
+            games_left = self.games
+            while True:
+                kind, payload = await read_frame_async(reader, decoder)
+                if answered_at is not None:
+                    self.result_waits.append(time.perf_counter() - answered_at)
+                    answered_at = None
+                if kind == MessageKind.GAME_OVER:
+                    self.counters["finished"] += 1
+                    games_left -= 1
+                    if games_left <= 0:
+                        return
+                if kind == MessageKind.NEXT_GAME:
+                    playing = True
+                if kind == MessageKind.LOSER:
+                    playing = False
+                if not (playing and kind == MessageKind.QUESTION):
+                    continue
+                question_id, _ = split_question_id(payload)
+                if self.rng.random() < self.disconnect_rate:
+                    self.counters["disconnected"] += 1
+                    return
+                await asyncio.sleep(self.think())
+                writer.write(encode_answer(question_id, self.choose_answer(question_id)))
+                answered_at = time.perf_counter()
+                self.counters["answers"] += 1
+        finally:
+            writer.close()
+
+    async def run_player(self, number, host, port):
+        """
+        Run one simulated player, counting its errors instead of raising them.
+
+        Args:
+            number (int): The number of the player, used in its generated name.
+            host (str): The address of the server.
+            port (int): The TCP port of the server.
+        """
+        try:
+            await asyncio.wait_for(self.play(f"{self.name_prefix}-{number}", host, port), self.game_timeout)
+        except asyncio.TimeoutError:
+            self.errors["timeout"] += 1
+        except (OSError, ConnectionError, ValueError) as e:
+            self.errors[type(e).__name__] += 1
+
+    async def run(self, host=None, port=None):
+        """
+        Run the whole swarm until every simulated player is done.
+
+        Args:
+            host (str): The address of the server, discovered from its offers when not given.
+            port (int): The TCP port of the server, discovered from its offers when not given.
+
+        Returns:
+            dict: The report of the run.
+        """
+        raise_open_files_limit(self.players + 64)
+        if host is None or port is None:
+            host, port = await self.discover()
+        started_at = time.perf_counter()
+        tasks = []
+        for number in range(self.players):
+            if self.join_rate > 0:
+                delay = started_at + number / self.join_rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.run_player(number, host, port)))
+        await asyncio.gather(*tasks)
+        return self.report(host, port, time.perf_counter() - started_at)
+
+    def report(self, host, port, duration):
+        """
+        Build the report of a run.
+
+        Args:
+            host (str): The address of the server.
+            port (int): The TCP port of the server.
+            duration (float): How many seconds the run took.
+
+        Returns:
+            dict: The settings, counters, join rate, latency percentiles and errors of the run.
+        """
+        join_duration = (self.last_join - self.first_join) if self.counters["joined"] > 1 else 0
+        return {
+            "server": f"{host}:{port}",
+            "players": self.players,
+            "accuracy": self.accuracy,
+            "think_time": self.think_time,
+            "think_mean_ms": self.think_mean * 1000,
+            "disconnect_rate": self.disconnect_rate,
+            "games": self.games,
+            "duration_s": round(duration, 3),
+            "joined": self.counters["joined"],
+            "joins_per_s": round(self.counters["joined"] / join_duration, 1) if join_duration else None,
+            "finished": self.counters["finished"],
+            "answers": self.counters["answers"],
+            "disconnected": self.counters["disconnected"],
+            "unknown_questions": self.counters["unknown_questions"],
+            "join_latency": summarize_latencies(self.join_latencies),
+            "result_wait": summarize_latencies(self.result_waits),
+            "errors": dict(self.errors),
+        }
+
+
+def print_report(report):
+    """
+    Print the report of a run.
+
+    Args:
+        report (dict): The report of the run.
+    """
+    print(f"{ANSI.MAGENTA.value}Swarm of {report['players']} players against {report['server']} done in "
+          f"{report['duration_s']}s{ANSI.RESET.value}")
+    print(f"{ANSI.GREEN.value}joined: {report['joined']} ({report['joins_per_s']}/s), finished: {report['finished']}, "
+          f"answers: {report['answers']}, disconnected: {report['disconnected']}{ANSI.RESET.value}")
+    for name in ("join_latency", "result_wait"):
+        latency = report[name]
+        print(f"{ANSI.CYAN.value}{name}: p50 {latency['p50_ms']}ms, p90 {latency['p90_ms']}ms, "
+              f"p99 {latency['p99_ms']}ms, max {latency['max_ms']}ms{ANSI.RESET.value}")
+    if report["errors"]:
+        print(f"{ANSI.RED.value}errors: {report['errors']}{ANSI.RESET.value}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate many players against a trivia server.")
+    parser.add_argument("players", type=int, help="number of simulated players")
+    parser.add_argument("--accuracy", type=float, default=0.5, help="probability of a correct answer")
+    parser.add_argument("--think-time", choices=THINK_TIMES, default="uniform", help="think time distribution")
+    parser.add_argument("--think-mean-ms", type=float, default=500, help="mean think time in milliseconds")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="probability of disconnecting instead of answering a question")
+    parser.add_argument("--join-rate", type=float, default=0.0, help="joins per second, 0 for all at once")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds a player waits for its games to end")
+    parser.add_argument("--games", type=int, default=1,
+                        help="games every player plays on its connection, the server has to carry players over")
+    parser.add_argument("--host", help="address of the server, discovered from its offers when not given")
+    parser.add_argument("--port", type=int, help="TCP port of the server, discovered from its offers when not given")
+    parser.add_argument("--seed", type=int, help="seed of the random generator")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    swarm = BotSwarm(args.players, args.accuracy, args.think_time, args.think_mean_ms, args.disconnect_rate,
+                     args.join_rate, args.timeout, seed=args.seed, games=args.games)
+    swarm_report = asyncio.run(swarm.run(args.host, args.port))
+    if args.json:
+        print(json.dumps(swarm_report, indent=2))
+    else:
+        print_report(swarm_report)
@@ -1,13 +1,51 @@
 import select
 import socket
-import struct
 import sys
 import threading
+import time
 import Colors
-from JsonReader import JSONReader
+from Config import get_config
+from Protocol import (PROTOCOL_VERSION, FrameDecoder, MessageKind, encode_answer, encode_frame, encode_hello,
+                      parse_offer, parse_offer_load, split_question_id)
+from RoundScheduler import RoundScheduler
 
 SERVER_NAME_LENGTH = 32
 SERVER_PORT_LENGTH = 4
+RECEIVE_TIMEOUT_MARGIN = 5  # seconds for the server to score a round and send its results
+
+
+def rank_offer(load):
+    """
+    Rank the load of a server, the least loaded server ranks first.
+
+    Servers with open seats come first by number of players, then the servers sending legacy offers whose load is
+    unknown, then the full servers.
+
+    Args:
+        load (tuple): The load of the server, see parse_offer_load, None if unknown.
+
+    Returns:
+        tuple: The sort key of the server.
+    """
+    if load is None:
+        return 1, 0, 0
+    players, capacity, rooms, max_rooms, open_seats = load
+    if open_seats == 0:
+        return 2, players, 0
+    return 0, players, -open_seats
+
+
+def choose_offer(offers):
+    """
+    Choose the least loaded of the servers that sent an offer.
+
+    Args:
+        offers (dict): The load of every server, None if unknown, by address and TCP port.
+
+    Returns:
+        tuple: The address and the TCP port of the chosen server.
+    """
+    return min(offers, key=lambda server: rank_offer(offers[server]))
 
 
 class Client(threading.Thread):
@@ -24,23 +62,41 @@ class Client(threading.Thread):
         udp_socket (socket.socket): The UDP socket used for receiving offers.
         server_address (str): The IP address of the server.
         current_answer (str): The current answer provided by the user or bot.
+        current_question_id (int): The id of the question being answered, None for protocol v1 which does not send it.
+        protocol_version (int): The protocol version the client asks the server for.
+        decoder (FrameDecoder): The decoder buffering the frames received from the server.
+        stay_for_next_game (bool): Whether to play the next game when the server keeps the connection open.
+        answer_timeout (float): How many seconds the player has to answer, the longest answer window of the server.
+        receive_timeout (float): How many seconds to wait for the next message of a game before giving up on the
+            server, the longest delays and answer window of the server and a margin.
     """
 
-    def __init__(self, player_name):
+    def __init__(self, player_name, config=None):
         """
         Initialize the Client object.
 
         Args:
             player_name (str): The name of the player.
+            config (Config): The configuration of the game, the configuration of the process when not given.
         """
         super().__init__()
-        self.config_reader = JSONReader("config.json")
+        self.config = config or get_config()
         self.player_name = player_name
         self.server_port = None
         self.server_socket = None
         self.udp_socket = None
         self.server_address = None
         self.current_answer = None
+        self.current_question_id = None
+        self.protocol_version = self.config.get('protocol_version', PROTOCOL_VERSION)
+        self.decoder = FrameDecoder()
+        self.stay_for_next_game = self.config.get('stay_for_next_game', True)
+        # The pacing of the server's games, the rooms keep the server's pacing when they have none of their own
+        pacing = self.config.get('pacing') or {}
+        schedulers = [RoundScheduler(**pacing), RoundScheduler(**(self.config.get('room_pacing') or pacing))]
+        self.answer_timeout = max(scheduler.answer_timeout for scheduler in schedulers)
+        self.receive_timeout = max(scheduler.welcome_delay + scheduler.round_delay + scheduler.answer_timeout
+                                   for scheduler in schedulers) + RECEIVE_TIMEOUT_MARGIN
 
     def run(self):
         """
@@ -48,6 +104,7 @@ class Client(threading.Thread):
 
         This method is the entry point for the client thread.
         It starts the client, listens for offers, connects to the server, gets the welcome message, and starts the game.
+        The client keeps playing as long as the server invites it to the next game on the same connection.
         """
         try:
             print(f"Starting client for {Colors.ANSI.BLUE.value} {self.player_name} {Colors.ANSI.RESET.value}"
@@ -56,6 +113,9 @@ class Client(threading.Thread):
             self.connect_to_server()
             self.get_welcome_message()
             self.play_game()
+            while self.protocol_version >= 2 and self.wait_for_next_game():
+                self.get_welcome_message()
+                self.play_game()
         except socket.error:
             print("Server disconnected, finishing game...")
         finally:
@@ -68,25 +128,43 @@ class Client(threading.Thread):
 
     def listen_for_offers(self):
         """
-        Listen for offers from the server using a UDP socket.
+        Listen for offers from the servers using a UDP socket.
 
         This method creates a UDP socket, binds it to the destination port specified in the configuration,
-        and listens for offer messages from the server. Once an offer message is received and parsed successfully,
-        it breaks out of the loop and attempts to connect to the server.
+        and listens for offer messages from the servers. Once a valid offer message is received, it keeps collecting
+        offers for the offer window, then picks the least loaded server from the loads carried by the extended offers.
         """
-        udp_port = self.config_reader.get('dest_port')
-        server_name = self.config_reader.get('server_name')
+        udp_port = self.config.dest_port
+        server_name = self.config.server_name
+        offer_window = self.config.get('offer_window_ms', 1500) / 1000
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.udp_socket.bind(('', udp_port))
         self.udp_socket.settimeout(50)
-        while True:
-            message, address = self.udp_socket.recvfrom(4096)
-            self.server_address = address[0]
-            if self.parse_offer_message(message):
-                print(f"Received offer from server '{Colors.ANSI.MAGENTA.value}{server_name} {Colors.ANSI.RESET.value}'"
-                      f" at address {self.server_address}, attempting to connect...")
+        offers = {}
+        deadline = None
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                message, address = self.udp_socket.recvfrom(4096)
+            except socket.timeout:
+                if deadline is None:
+                    raise
                 break
+            server = self.parse_offer_message(message, address)
+            if server is None:
+                continue
+            load = parse_offer_load(message, self.config.offer_prefix)
+            # Servers send a legacy offer along with every extended offer, the load must not be overwritten
+            if load is not None or server not in offers:
+                offers[server] = load
+            if deadline is None:
+                deadline = time.monotonic() + offer_window
+            self.udp_socket.settimeout(max(deadline - time.monotonic(), 0.001))
+        self.server_address, self.server_port = choose_offer(offers)
+        load = offers[(self.server_address, self.server_port)]
+        players = f" with {load[0]} players" if load is not None else ""
+        print(f"Received offers from {len(offers)} servers, chose server '{Colors.ANSI.MAGENTA.value}{server_name} "
+              f"{Colors.ANSI.RESET.value}' at address {self.server_address}{players}, attempting to connect...")
 
     def connect_to_server(self):
         """
@@ -94,10 +172,14 @@ class Client(threading.Thread):
 
         This method creates a TCP socket, connects to the server address and port obtained from the offer message,
         sends the player's name to the server, and prints a message indicating the successful connection.
+        Clients speaking protocol v2 send their name inside a hello message announcing the protocol version.
         """
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.connect((self.server_address, self.server_port))
-        self.server_socket.sendall(f"{self.player_name}\n".encode())
+        if self.protocol_version >= 2:
+            self.server_socket.sendall(encode_hello(self.player_name, self.protocol_version))
+        else:
+            self.server_socket.sendall(f"{self.player_name}\n".encode())
         print(f"Connected to server at address: {self.server_address}, port: {self.server_port}\n"
               f"waiting for game to start... ")
 
@@ -109,11 +191,15 @@ class Client(threading.Thread):
         message, prompts the user for input if a question is asked, and sends the user's answer or a default answer
         to the server. The loop continues until the game is over or the server disconnects.
         """
+        if self.protocol_version >= 2:
+            self.play_framed_game()
+            return
         # Set a timeout for receiving data
-        loser_message = self.config_reader.get('loser_message')
-        question_message = self.config_reader.get('question_message_prefix')
+        loser_message = self.config.loser_message
+        question_message = self.config.question_message_prefix
+        game_over_msg = self.config.game_over_message
         can_insert_input = True
-        self.server_socket.settimeout(10)
+        self.server_socket.settimeout(self.receive_timeout)
         while True:
             data = self.server_socket.recv(4096)
             if not data:
@@ -123,7 +209,6 @@ class Client(threading.Thread):
             msg = data.decode()
             print(msg)
 
-            game_over_msg = self.config_reader.get("game_over_message")
             if game_over_msg in msg:
                 print(f"{Colors.ANSI.RED.value}Senior {self.player_name} the game is over, it was a lovely game!"
                       f"{Colors.ANSI.RESET.value}")
@@ -136,13 +221,13 @@ class Client(threading.Thread):
                 continue
 
             self.current_answer = None
-            self.wait_for_input(10, msg)
+            self.wait_for_input(self.answer_timeout, msg)
 
             # If user input is not None, send it to the server
             if self.current_answer is not None:
                 print(f"Sending answer: {self.current_answer}")
                 self.server_socket.sendall(self.current_answer.encode())
-            # Send a default answer if the user hasn't provided one after 10 seconds
+            # Send a default answer if the user hasn't provided one in time
             else:
                 print("Sending default answer")
                 self.server_socket.sendall("".encode())
@@ -150,6 +235,85 @@ class Client(threading.Thread):
         # Close the server socket when the game ends
         self.server_socket.close()
 
+    def play_framed_game(self):
+        """
+        Play the game over protocol v2.
+
+        Every message is dispatched on its kind instead of searching the text for known strings, and every answer
+        carries the id of the question it answers.
+        """
+        can_insert_input = True
+        self.server_socket.settimeout(self.receive_timeout)
+        while True:
+            frame = self.receive_frame()
+            if frame is None:
+                print("Server disconnected, finishing game...")
+                break
+            kind, payload = frame
+            if kind == MessageKind.QUESTION:
+                question_id, msg = split_question_id(payload)
+                self.current_question_id = question_id
+            else:
+                msg = payload.decode()
+            print(msg)
+
+            if kind == MessageKind.GAME_OVER:
+                print(f"{Colors.ANSI.RED.value}Senior {self.player_name} the game is over, it was a lovely game!"
+                      f"{Colors.ANSI.RESET.value}")
+                break
+
+            if kind == MessageKind.LOSER:
+                can_insert_input = False
+
+            if not (can_insert_input and kind == MessageKind.QUESTION):
+                continue
+
+            self.current_answer = None
+            self.wait_for_input(self.answer_timeout, msg)
+
+            if self.current_answer is not None:
+                print(f"Sending answer: {self.current_answer}")
+                answer = self.current_answer
+            else:
+                print("Sending default answer")
+                answer = ""
+            self.server_socket.sendall(encode_answer(question_id, answer))
+
+    def wait_for_next_game(self):
+        """
+        Wait for the server to invite the client to the next game on the same connection.
+
+        A client that does not stay for the next game tells the server it leaves instead.
+
+        Returns:
+            bool: True if the client joined the lobby of the next game.
+        """
+        self.server_socket.settimeout(None)  # the server invites the players once the game is over
+        frame = self.receive_frame()
+        if frame is None or frame[0] != MessageKind.NEXT_GAME:
+            return False
+        print(frame[1].decode())
+        if not self.stay_for_next_game:
+            self.server_socket.sendall(encode_frame(MessageKind.LEAVE, b''))
+            return False
+        return True
+
+    def receive_frame(self):
+        """
+        Receive the next complete frame from the server.
+
+        Returns:
+            tuple: The kind and the payload of the frame, or None if the server disconnected.
+        """
+        frame = self.decoder.next_frame()
+        while frame is None:
+            data = self.server_socket.recv(4096)
+            if not data:
+                return None
+            self.decoder.feed(data)
+            frame = self.decoder.next_frame()
+        return frame
+
     def get_welcome_message(self):
         """
         Receive and print the welcome message from the server.
@@ -157,6 +321,14 @@ class Client(threading.Thread):
         This method repeatedly receives data from the server until it receives a message containing the string 'Welcome'.
         It prints any messages received from the server.
         """
+        if self.protocol_version >= 2:
+            frame = self.receive_frame()
+            while frame is not None:
+                print(frame[1].decode())
+                if frame[0] == MessageKind.WELCOME:
+                    break
+                frame = self.receive_frame()
+            return
         msg = None
         while not msg or 'Welcome' not in msg:
             data = self.server_socket.recv(4096)
@@ -169,7 +341,7 @@ class Client(threading.Thread):
         Wait for user input with a timeout.
 
         Args:
-            timeout (int): The timeout period in seconds.
+            timeout (float): The timeout period in seconds.
 
         Returns:
             str or None: The user input if received within the timeout, else None.
@@ -182,49 +354,29 @@ class Client(threading.Thread):
         """
         self.current_answer = None
         try:
-            print(f"{Colors.ANSI.GREEN.value}Enter your answer{Colors.ANSI.RESET.value} (you have 10 seconds !):")
+            print(f"{Colors.ANSI.GREEN.value}Enter your answer{Colors.ANSI.RESET.value} (you have {timeout:g} seconds !):")
             inputs, _, _ = select.select([sys.stdin], [], [], timeout)
             if inputs:
                 ans = sys.stdin.readline().strip()
                 self.current_answer = ans
         except TimeoutError:
-            print("No input received within 10 seconds.")
+            print(f"No input received within {timeout:g} seconds.")
 
-    def parse_offer_message(self, message):
+    def parse_offer_message(self, message, address):
         """
-        Parse an offer message from the server.
+        Parse an offer message from a server.
 
         Args:
             message (bytes): The offer message received from the server.
+            address (tuple): The address the offer message was sent from.
 
         Returns:
-            bool: True if the offer message is valid and contains the expected data, False otherwise.
-
-        This method parses the offer message received from the server and validates its contents against the expected
-        format and configuration data. If the message is valid, it extracts the server port from the message and
-        returns True. Otherwise, it returns False.
+            tuple: The address and the TCP port of the server, None if the offer message is not valid.
         """
-        real_magic_cookie = self.config_reader.get('magic_cookie')
-        real_message_type = self.config_reader.get('message_type')
-        real_server_name = self.config_reader.get('server_name')
-
-        # Unpack the message data
-        try:
-            magic_cookie, message_type, encoded_server_name, self.server_port = struct.unpack('!IB32sH', message)
-            server_name = encoded_server_name.decode('utf-8').rstrip('\x00')
-            magic_cookie = hex(magic_cookie)
-            message_type = hex(message_type)
-
-        except struct.error:
-            return None
-        except TypeError:
+        server_port = parse_offer(message, self.config.offer_prefix)
+        if server_port is None:
             return None
-        # Validate the magic cookie and message type
-        if str(magic_cookie) != real_magic_cookie or str(message_type) != real_message_type or server_name != real_server_name:
-            return None
-
-        # Decode the server name and strip any null characters
-        return True
+        return address[0], server_port
 
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+import os
+import struct
+import threading
+from types import MappingProxyType
+from Colors import ANSI
+from JsonReader import JSONReader
+
+PACING_KEYS = {'welcome_delay_ms', 'round_delay_ms', 'answer_timeout_ms'}
+
+configs = {}
+rejected_mtimes = {}
+configs_lock = threading.Lock()
+
+
+class Config:
+    """
+    Class holding the configuration of the game, read once per process and never changed afterwards.
+
+    The keys read on hot paths are converted once: the magic cookie and the message type are integers, the answer
+    options are frozensets and the fixed part of the offer message is pre-packed. Any other key is read with get,
+    like with a JSONReader.
+
+    Attributes:
+        config_file (str): The path to the JSON configuration file.
+        mtime (int): The modification time of the file when it was read, in nanoseconds.
+        values (MappingProxyType): The read-only configuration data.
+        server_name (str): The name of the server.
+        dest_port (int): The UDP port the offers are broadcast to.
+        magic_cookie (int): The magic cookie starting every offer message.
+        message_type (int): The type of the offer messages.
+        offer_prefix (bytes): The packed magic cookie, message type and server name of an offer message.
+        true_options (frozenset): The answers meaning true.
+        false_options (frozenset): The answers meaning false.
+        answer_options (tuple): Every answer a player can give.
+        question_message_prefix (str): The prefix preceding every question.
+        loser_message (str): The message sent to the players knocked out of the game.
+        game_over_message (str): The text announcing the end of the game.
+        protocol_version (int): The protocol version the clients ask the server for.
+    """
+
+    def __init__(self, config_file='config.json', mtime=0):
+        """
+        Reads the configuration file.
+
+        Args:
+            config_file (str): The path to the JSON configuration file.
+            mtime (int): The modification time of the file, in nanoseconds.
+        """
+        values = JSONReader(config_file).config
+        set_value = super().__setattr__
+        set_value('config_file', config_file)
+        set_value('mtime', mtime)
+        set_value('values', MappingProxyType(values))
+        set_value('server_name', values.get('server_name', ''))
+        set_value('dest_port', values.get('dest_port'))
+        set_value('magic_cookie', int(values.get('magic_cookie', '0'), 16))
+        set_value('message_type', int(values.get('message_type', '0'), 16))
+        set_value('offer_prefix', struct.pack('!IB32s', self.magic_cookie, self.message_type,
+                                              self.server_name.encode('utf-8')))
+        set_value('true_options', frozenset(values.get('true_options', ())))
+        set_value('false_options', frozenset(values.get('false_options', ())))
+        set_value('answer_options', tuple(values.get('true_options', ())) + tuple(values.get('false_options', ())))
+        set_value('question_message_prefix', values.get('question_message_prefix'))
+        set_value('loser_message', values.get('loser_message'))
+        set_value('game_over_message', values.get('game_over_message'))
+        set_value('protocol_version', values.get('protocol_version', 2))
+
+    def validate(self):
+        """
+        Checks the configuration can be played with.
+
+        Raises:
+            ValueError: If the file could not be read, the answer options are missing or overlap, or the pacing of the
+                rounds is not a set of durations.
+        """
+        if not self.values:
+            raise ValueError(f"{self.config_file} could not be read")
+        if not self.true_options or not self.false_options:
+            raise ValueError("true_options and false_options must not be empty")
+        if self.true_options & self.false_options:
+            raise ValueError(f"answers both true and false: {sorted(self.true_options & self.false_options)}")
+        for key in ('pacing', 'room_pacing'):
+            pacing = self.get(key) or {}
+            if not isinstance(pacing, dict) or not set(pacing) <= PACING_KEYS or \
+                    any(not isinstance(value, (int, float)) or value < 0 for value in pacing.values()):
+                raise ValueError(f"{key} must map some of {sorted(PACING_KEYS)} to durations in milliseconds")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("the configuration can not be changed")
+
+    def get(self, key, default=None):
+        """
+        Gets a value from the configuration data based on the specified key.
+
+        Args:
+            key (str): The key to retrieve the value for.
+            default: The default value to return if the key is not found.
+
+        Returns:
+            The value associated with the key, or the default value if the key is not found.
+        """
+        return self.values.get(key, default)
+
+
+def get_config(config_file='config.json'):
+    """
+    Get the configuration of the process, reading the file again only if it was modified since it was last read.
+
+    A modified file that can not be played with is rejected and the previous configuration is kept, until the file
+    is modified again. There is no previous configuration to keep on the first read, so the error is raised.
+
+    Args:
+        config_file (str): The path to the JSON configuration file.
+
+    Returns:
+        Config: The configuration.
+
+    Raises:
+        ValueError: If the file can not be played with when it is first read.
+    """
+    try:
+        mtime = os.stat(config_file).st_mtime_ns
+    except OSError:
+        mtime = 0
+    with configs_lock:
+        config = configs.get(config_file)
+        if config is None:
+            config = Config(config_file, mtime)
+            config.validate()
+            configs[config_file] = config
+        elif config.mtime != mtime and rejected_mtimes.get(config_file) != mtime:
+            try:
+                new_config = Config(config_file, mtime)
+                new_config.validate()
+            except (AttributeError, TypeError, ValueError) as e:
+                rejected_mtimes[config_file] = mtime
+                print(f"{ANSI.RED.value}Keeping the previous configuration, {config_file} is invalid: {e}"
+                      f"{ANSI.RESET.value}")
+            else:
+                config = configs[config_file] = new_config
+        return config
@@ -0,0 +1,85 @@
+import threading
+import time
+from Colors import ANSI
+from Config import get_config
+from QuestionBank import get_file_signature, open_question_bank
+
+
+class ContentWatcher(threading.Thread):
+    """
+    Background thread watching the config file and the question file for new questions and answer options.
+
+    New content is loaded and validated on the watcher thread, away from the games, and is only handed to the server
+    when it asks for it between two games, so a game always plays to the end with the content it started with. New
+    content that fails to parse or to validate is rejected and the server keeps the content it has, until the files
+    are modified again.
+
+    Attributes:
+        config (Config): The configuration of the current content.
+        question_bank (QuestionBank): The questions of the current content.
+        interval (float): How many seconds to wait between two checks of the files.
+        pending (tuple): The validated configuration and question bank not handed to the server yet, None if none.
+        rejected (tuple): The configuration and question file signature of the last rejected content.
+        lock (threading.Lock): Lock object for synchronizing the hand-over of the pending content.
+    """
+
+    def __init__(self, config, question_bank, interval_ms=1000):
+        """
+        Initializes the ContentWatcher.
+
+        Args:
+            config (Config): The configuration of the current content.
+            question_bank (QuestionBank): The questions of the current content.
+            interval_ms (int): How many milliseconds to wait between two checks of the files.
+        """
+        super().__init__(name='content-watcher', daemon=True)
+        self.config = config
+        self.question_bank = question_bank
+        self.interval = interval_ms / 1000
+        self.pending = None
+        self.rejected = None
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self):
+        """
+        Loads and validates the content of the files if they changed since the current content was loaded.
+
+        Returns:
+            bool: True if new content is waiting to be handed to the server.
+        """
+        config = get_config(self.config.config_file)
+        if config is self.config and not self.question_bank.is_modified():
+            return self.pending is not None
+        path = config.get('question_bank')
+        signature = (config, get_file_signature(path) if path is not None else None)
+        if signature == self.rejected:
+            return self.pending is not None
+        try:
+            question_bank = open_question_bank(config)
+            question_bank.validate()
+        except (AttributeError, OSError, TypeError, ValueError) as e:
+            self.rejected = signature
+            print(f"{ANSI.RED.value}Keeping the current questions, the new ones are invalid: {e}{ANSI.RESET.value}")
+            return self.pending is not None
+        with self.lock:
+            # the banks are left to be closed by the garbage collector, rooms may still be playing with them
+            self.config = config
+            self.question_bank = question_bank
+            self.pending = config, question_bank
+        return True
+
+    def take_update(self):
+        """
+        Hands the validated new content to the server, once.
+
+        Returns:
+            tuple: The new configuration and question bank, None if the content did not change.
+        """
+        with self.lock:
+            update, self.pending = self.pending, None
+        return update
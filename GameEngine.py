@@ -1,12 +1,29 @@
 import socket
-import threading
 import time
-import random
 from Colors import ANSI
-from ClientHandler import ClientHandler
+from AnswerCollector import AnswerCollector
+from OutboundWriter import OutboundWriter
 from PlayerManager import PlayerManager
 from Player import Player
-from GameStatistics import GameStatistics
+from GameStatistics import open_statistics
+from Metrics import ANSWER_COLLECTION, ANSWER_LATENCY, FAN_OUT, SCORING, STATISTICS_UPDATE
+from MessageCache import MessageCache
+from Profiler import profiled
+from Protocol import MessageKind, encode_payload
+from QuestionBank import QuestionBank
+from RoundScheduler import RoundScheduler
+
+
+def record_answer_latencies(answers, question_sent):
+    """
+    Records how long every player took to answer a question.
+
+    Args:
+        answers (dict): The answers of the players.
+        question_sent (float): The time the question was sent, from time.monotonic.
+    """
+    ANSWER_LATENCY.observe_many(player.get_answered_at() - question_sent for player in answers
+                                if player.get_answered_at() is not None)
 
 
 class GameEngine:
@@ -16,84 +33,156 @@ class GameEngine:
     Attributes:
         round (int): The current round of the game.
         player_manager (PlayerManager): The player manager managing the players.
-        questions (list): List of questions for the game.
+        question_bank (QuestionBank): The questions the games are played with, shared with the other games.
         socket (socket): The TCP socket used for communication with the clients.
-        true_answers (list): List of true answers.
-        false_answers (list): List of false answers.
+        true_answers (frozenset): The true answers.
+        false_answers (frozenset): The false answers.
+        high_water_mark (int): The maximum number of bytes waiting to be sent to a player before it is evicted.
+        outbound (OutboundWriter): The writer sending the buffered messages while a game is played.
+        message_cache (MessageCache): The pre-encoded fragments of the game messages.
+        scheduler (RoundScheduler): The pacing of the rounds, preparing every question one round ahead.
+        result_lines (dict): The correct and the incorrect result line of every active player, rendered while the
+            players answer.
+        round_timings (list): How many seconds the question fan-out, the answer collection, the scoring, the
+            statistics and the whole of every round played took.
+        game_time (float): How many seconds the last game took, from the welcome message to the game over.
     """
 
     def __init__(self, player_manager, questions, true_answers, false_answers, server_name,
-                 question_prefix, client_lose_msg):
+                 question_prefix, client_lose_msg, high_water_mark=262144, message_cache=None, game_statistics=None,
+                 scheduler=None):
         """
         Initializes the GameEngine with the provided parameters.
 
         Args:
             player_manager (PlayerManager): The player manager managing the players.
-            questions (list): List of questions for the game.
-            true_answers (list): List of true answers.
-            false_answers (list): List of false answers.
+            questions (QuestionBank): The questions the games are played with, a list of questions is put in a bank.
+            true_answers (frozenset): The true answers.
+            false_answers (frozenset): The false answers.
             server_name (string): the server name.
+            high_water_mark (int): The maximum number of bytes waiting to be sent to a player before it is evicted.
+            message_cache (MessageCache): The pre-encoded fragments of the game messages, built from the questions
+                when not given.
+            game_statistics (GameStatistics): The statistics shared with the server, loaded from disk when not given.
+            scheduler (RoundScheduler): The pacing of the rounds, the default pacing when not given.
         """
+        if not isinstance(questions, QuestionBank):
+            questions = QuestionBank(questions)
         self.round = 0
         self.server_name = server_name
         self.player_manager = player_manager
-        self.questions = questions
+        self.question_bank = questions
         self.socket = None
         self.true_answers = true_answers
         self.false_answers = false_answers
-        self.game_statistics = GameStatistics()
+        self.game_statistics = game_statistics or open_statistics()
+        self.high_water_mark = high_water_mark
+        self.outbound = None
+        self.scheduler = scheduler or RoundScheduler()
+        self.result_lines = {}
+        self.round_timings = []
+        self.game_time = None
 
         self.question_prefix = question_prefix
         self.client_lose_message = client_lose_msg
+        self.message_cache = message_cache or MessageCache(questions.questions or (), question_prefix, client_lose_msg)
 
-    def get_answers(self):
+    @profiled('get_answers')
+    def get_answers(self, question_id=0):
         """
         Receives answers from clients.
 
+        Args:
+            question_id (int): The id of the question being answered, v2 answers to other questions are ignored.
         Returns:
             dict: Dictionary containing client answers.
         """
-        end_time = time.time() + 10  # Set the end time for receiving answers (10 seconds from now)
-
-        client_threads = []
-        client_answers = {}
-        client_answers_lock = threading.Lock()
-        for player in self.player_manager.get_active_players():
-            client_thread = ClientHandler(player, self.player_manager, client_answers, client_answers_lock)
-            client_thread.start()
-            client_threads.append(client_thread)
-
-        for thread in client_threads:
-            thread.join(end_time - time.time())
-
-        return client_answers
+        collector = AnswerCollector(self.player_manager.get_active_players(), self.scheduler.answer_timeout,
+                                    question_id)
+        return collector.collect()
 
     def kick_player(self, player):
         print(f'player {player.get_name()} has been kicked')
         self.player_manager.kick_player(player)
 
-    def handle_client_send(self, player, msg):
-        client_socket = player.get_socket()
+    def evict_player(self, player):
+        """
+        Kicks a player that can not keep up with the messages sent to it, or whose socket failed.
+
+        The socket is shut down rather than closed, so it stays valid for a round that is still waiting on it.
+
+        Args:
+            player (Player): The player to evict.
+        """
+        print(f'player {player.get_name()} is too slow or disconnected')
+        self.kick_player(player)
         try:
-            client_socket.sendall(msg.encode())
-        except socket.error as se:
-            print(f'Socket error happened when sending player {player.get_name()} a message, error: {se}')
-            self.kick_player(player)
+            player.get_socket().shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def send_encoded(self, player, data):
+        """
+        Queues encoded bytes to be sent to a player.
 
+        Args:
+            player (Player): The player to send the bytes to.
+            data (bytes): The bytes to send.
+        """
+        try:
+            self.outbound.enqueue(player, data)
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             self.kick_player(player)
 
-    def send_message_to_clients(self, msg):
+    def send_encoded_many(self, messages):
+        """
+        Queues encoded bytes to be sent to many players at once, waking the writer up once.
+
+        The players over the high water mark are evicted by the writer, queuing never fails otherwise.
+
+        Args:
+            messages (list): The players and the bytes to send them.
+        """
+        self.outbound.enqueue_many(messages)
+
+    def handle_client_send(self, player, msg, kind=MessageKind.TEXT, question_id=0):
+        self.send_encoded(player, encode_payload(player.get_protocol_version(), kind, msg.encode(), question_id))
+
+    def send_payload(self, players, payload, kind=MessageKind.TEXT, question_id=0):
+        """
+        Sends an encoded message to the given players.
+
+        The message is framed once per protocol version, every player speaking the same version gets the same
+        bytes object.
+
+        Args:
+            players (list): The players to send the message to.
+            payload (bytes): The encoded message.
+            kind (MessageKind): The kind of the message, used to frame it for v2 clients.
+            question_id (int): The id of the question, only used for QUESTION messages.
+        """
+        encoded = {}
+        messages = []
+        for player in players:
+            version = player.get_protocol_version()
+            data = encoded.get(version)
+            if data is None:
+                data = encoded[version] = encode_payload(version, kind, payload, question_id)
+            messages.append((player, data))
+        self.send_encoded_many(messages)
+
+    def send_message_to_clients(self, msg, kind=MessageKind.TEXT, question_id=0):
         """
         Sends a message to all active clients.
 
         Args:
             msg (str): The message to send to clients.
+            kind (MessageKind): The kind of the message, used to frame it for v2 clients.
+            question_id (int): The id of the question, only used for QUESTION messages.
         """
         print(msg)
-        for player in self.player_manager.get_players():
-            self.handle_client_send(player, msg)
+        self.send_payload(self.player_manager.get_players(), msg.encode(), kind, question_id)
 
     def send_welcome_message(self):
         """
@@ -102,13 +191,24 @@ class GameEngine:
         This method is called at the start of the game to greet the players and
         provide information about the game.
         """
-        welcome_message = f"Welcome to the {self.server_name} server, where we are answering trivia questions!\n"
         players = self.player_manager.get_active_players()
+        welcome_message = self.build_welcome_message(players)
+        print(welcome_message)
+        self.send_payload(players, welcome_message.encode(), MessageKind.WELCOME)
+
+    def build_welcome_message(self, players):
+        """
+        Builds the welcome message listing the players of the game.
+
+        Args:
+            players (list): The players taking part in the game.
+        Returns:
+            (string) the welcome msg for the players
+        """
+        welcome_message = f"Welcome to the {self.server_name} server, where we are answering trivia questions!\n"
         for i, player in enumerate(players, 1):
             welcome_message += f"Player {i}: {player.get_name()}\n"
-        print(welcome_message)
-        for player in players:
-            self.handle_client_send(player, welcome_message)
+        return welcome_message
 
     def play_game(self, tcp_socket):
         """
@@ -119,27 +219,41 @@ class GameEngine:
         """
         for player in self.player_manager.get_active_players():
             self.game_statistics.add_player(player)
+            player.get_socket().setblocking(False)
+        self.outbound = OutboundWriter(self.high_water_mark, self.evict_player)
+        self.outbound.start()
+        game_started = time.perf_counter()
         self.send_welcome_message()
-        time.sleep(1)
+        # The game draws its own order, the question bank is shared with the games running concurrently
+        questions = self.question_bank.sample()
+        self.scheduler.start(questions, self.message_cache)
+        time.sleep(self.scheduler.welcome_delay)
         self.socket = tcp_socket
-        random.shuffle(self.questions)
         winner = None
-        while self.round < len(self.questions) and len(self.player_manager.get_active_players()) > 0:
-            question = self.questions[self.round]
+        question = self.scheduler.take_question()
+        while question is not None:
+            if self.player_manager.count_active_players() == 0:
+                break
+            round_started = time.perf_counter()
             winner = self.play_round(question)
+            self.round_timings[-1]["round"] = time.perf_counter() - round_started
             if winner is not None:
                 break
             self.round += 1
-            time.sleep(1.5)
+            time.sleep(self.scheduler.round_delay)
+            question = self.scheduler.take_question()
 
-        if self.round == len(self.questions):
-            msg = f"Were out of questions, the game is over {ANSI.SAD_FACE.value}"
+        if question is None:  # out of questions
+            msg = self.build_out_of_questions_msg()
             print(msg)
-            self.send_message_to_clients(msg)
-        elif len(self.player_manager.get_active_players()) == 0:
+            self.send_message_to_clients(msg, MessageKind.GAME_OVER)
+        elif self.player_manager.count_active_players() == 0:
             print(f"Were out of players, game is over {ANSI.SAD_FACE.value}")
         elif winner is not None:
             self.game_over(winner)
+        self.game_statistics.request_flush()
+        self.outbound.close()
+        self.game_time = time.perf_counter() - game_started
 
     def game_over(self, winner):
         """
@@ -148,10 +262,19 @@ class GameEngine:
         Args:
             winner (Player): The winning player.
         """
-        self.game_statistics.update_player(winner,"games_won")
-        msg = (f"Game over! \nCongratulations to the winner : {ANSI.PINK.value}{winner.get_name()}"
-               f" {ANSI.CROWN.value}{ANSI.RESET.value}!")
-        self.send_message_to_clients(msg)
+        self.game_statistics.update_player(winner, "games_won")
+        self.send_message_to_clients(self.build_game_over_msg(winner), MessageKind.GAME_OVER)
+
+    def build_game_over_msg(self, winner):
+        """
+        Builds the game over message announcing the winner.
+        Args:
+            winner (Player): The winning player.
+        Returns:
+            (string) the game over msg for the players
+        """
+        return (f"Game over! \nCongratulations to the winner : {ANSI.PINK.value}{winner.get_name()}"
+                f" {ANSI.CROWN.value}{ANSI.RESET.value}!")
 
     def handle_answers(self, answers, answer):
         """
@@ -172,26 +295,72 @@ class GameEngine:
                 self.kick_player(player)
             elif (answer and player_answer in self.true_answers) or (
                     not answer and player_answer in self.false_answers):
+                player.add_point()
                 correct_players.append(player)
             else:
                 incorrect_players.append(player)
         return correct_players, incorrect_players
 
-    def build_round_question_msg(self, question):
+    def build_round_question_payload(self, question):
         """
-        Builds a question message for a round of the game.
+        Builds the encoded question message for a round of the game from the cached fragments.
         Args:
             question (dict): a dict of the question and its answer.
         Returns:
-            (string) the round msg for the players
+            (bytes) the encoded round msg for the players
+        """
+        return self.message_cache.build_round_question_payload(self.round + 1, self.player_manager.get_active_roster(),
+                                                               question)
+
+    def render_result_lines(self, player):
+        """
+        Renders the lines telling a player answered correctly or incorrectly.
+        Args:
+            player (Player): The player the lines are about.
+        Returns:
+            tuple: The correct line and the incorrect line.
+        """
+        return (f"{ANSI.GREEN.value}{player.name} is correct ! {ANSI.THUMBS_UP.value} {ANSI.RESET.value}\n",
+                f"{ANSI.RED.value}{player.name} is incorrect ! {ANSI.THUMBS_DOWN.value} {ANSI.RESET.value}\n")
+
+    def prepare_round_results(self):
+        """
+        Renders the result lines of the active players while they answer, so only choosing between them is left once
+        the answers are scored.
         """
-        player_names = ", ".join([player.get_name() for player in self.player_manager.get_active_players()])
-        round_msg = f"{ANSI.CYAN.value}Round {(self.round + 1)}{ANSI.RESET.value}"
-        player_msg = f"{ANSI.BLUE.value}, played by {player_names}{ANSI.RESET.value}"
-        question_msg = f"{ANSI.MAGENTA.value}\nThe next question is...{ANSI.RESET.value}"
-        question_body = f"\n{self.question_prefix}: {question['question']}"
-        msg = f"{round_msg}{player_msg}{question_msg}{question_body}"
-        return msg
+        self.result_lines = {player: self.render_result_lines(player)
+                             for player in self.player_manager.get_active_players()}
+
+    def build_round_result_msg(self, correct_players):
+        """
+        Builds the message telling every active player whether they answered correctly.
+        Args:
+            correct_players (list): The players who answered correctly.
+        Returns:
+            (string) the round result msg for the players
+        """
+        correct = set(correct_players)
+        lines = []
+        for player in self.player_manager.get_active_players():
+            correct_line, incorrect_line = self.result_lines.get(player) or self.render_result_lines(player)
+            lines.append(correct_line if player in correct else incorrect_line)
+        return "".join(lines)
+
+    def build_no_correct_answer_msg(self):
+        """
+        Builds the message sent when no player answered the round correctly.
+        Returns:
+            (string) the no correct answer msg for the players
+        """
+        return f"{ANSI.RED.value}No one answered correctly {ANSI.SAD_FACE.value} playing another round {ANSI.RESET.value}"
+
+    def build_out_of_questions_msg(self):
+        """
+        Builds the message sent when the game ran out of questions.
+        Returns:
+            (string) the out of questions msg for the players
+        """
+        return f"Were out of questions, the game is over {ANSI.SAD_FACE.value}"
 
     def update_players_statistics(self, correct, incorrect, question):
         for player in correct:
@@ -200,42 +369,63 @@ class GameEngine:
         self.game_statistics.update_question(question["question"], len(correct), len(incorrect))
 
     def send_message_to_losers(self, losers):
-        msg = f'{ANSI.RED.value}{self.client_lose_message}{ANSI.SAD_FACE.value}{ANSI.RESET.value}'
-        for player in losers:
-            self.handle_client_send(player, msg)
+        self.send_payload(losers, self.message_cache.loser_message, MessageKind.LOSER)
 
+    def record_round_timing(self, fan_out, collection, scoring, statistics):
+        """
+        Records the timings of a round, in the round timings of the game and in the metrics of the process.
+
+        Args:
+            fan_out (float): How many seconds the question took to be queued for every player.
+            collection (float): How many seconds the answers were waited for.
+            scoring (float): How many seconds the answers took to be scored.
+            statistics (float): How many seconds the statistics of the round took to be recorded.
+        """
+        self.round_timings.append({"fan_out": fan_out, "collection": collection, "scoring": scoring,
+                                   "statistics": statistics})
+        FAN_OUT.observe(fan_out)
+        ANSWER_COLLECTION.observe(collection)
+        SCORING.observe(scoring)
+        STATISTICS_UPDATE.observe(statistics)
+
+    @profiled('play_round')
     def play_round(self, question):
         """
         Plays a round of the game.
         Args:
             question (dict): a dict of the question and its answer.
         """
-        round_msg = self.build_round_question_msg(question)
-        self.send_message_to_clients(round_msg)
-        answers = self.get_answers()
+        round_started = time.perf_counter()
+        round_payload = self.build_round_question_payload(question)
+        print(round_payload.decode())
+        self.send_payload(self.player_manager.get_players(), round_payload, MessageKind.QUESTION, question['id'])
+        fanned_out = time.perf_counter()
+        question_sent = time.monotonic()
+        self.scheduler.prepare_next()  # while the players think
+        self.prepare_round_results()
+        answers = self.get_answers(question['id'])
+        collected = time.perf_counter()
+        record_answer_latencies(answers, question_sent)
         correct_players, incorrect_players = self.handle_answers(answers, question['is_true'])
+        scored = time.perf_counter()
 
         self.update_players_statistics(correct_players, incorrect_players, question)  # update the game statistics
+        self.game_statistics.request_flush()
+        self.record_round_timing(fanned_out - round_started, collected - fanned_out, scored - collected,
+                                 time.perf_counter() - scored)
 
         # no one answered / no one answered correct
         if len(correct_players) == 0:
-            self.send_message_to_clients(f"{ANSI.RED.value}No one answered correctly {ANSI.SAD_FACE.value} "
-                                         f"playing another round {ANSI.RESET.value}")
+            self.send_message_to_clients(self.build_no_correct_answer_msg(), MessageKind.ROUND_RESULT)
         # There is a winner
         elif len(correct_players) == 1:
             return correct_players[0]
 
         # multiple correct answers
         else:
-            msg = ""
-            for player in self.player_manager.get_active_players():
-                if player in correct_players:
-                    msg += f"{ANSI.GREEN.value}{player.name} is correct ! {ANSI.THUMBS_UP.value} {ANSI.RESET.value}\n"
-                else:
-                    msg += f"{ANSI.RED.value}{player.name} is incorrect ! {ANSI.THUMBS_DOWN.value} {ANSI.RESET.value}\n"
-
+            msg = self.build_round_result_msg(correct_players)
             self.player_manager.set_active_players(correct_players)
-            self.send_message_to_clients(msg)
+            self.send_message_to_clients(msg, MessageKind.ROUND_RESULT)
             self.send_message_to_losers(incorrect_players)
 
         return None
@@ -1,5 +1,34 @@
+import argparse
+import atexit
 import json
+import os
+import threading
+import time
+from Colors import ANSI
+from Config import get_config
 from JsonReader import JSONReader
+from Leaderboard import Leaderboard, correct_ratio
+from Metrics import STATISTICS_PERSISTENCE
+from SQLiteStatistics import SQLiteStatistics
+
+
+def open_statistics():
+    """
+    Open the statistics with the backend chosen in the config file.
+
+    Returns:
+        GameStatistics: The statistics, stored in statistics.json unless statistics_backend is "sqlite" or
+        "journal".
+    """
+    config = get_config()
+    backend = config.get("statistics_backend", "json")
+    if backend == "sqlite":
+        return SQLiteStatistics(config.get("statistics_db", "statistics.db"))
+    if backend == "journal":
+        from StatisticsJournal import JournaledStatistics
+        return JournaledStatistics(config.get("statistics_journal", "statistics.journal"),
+                                   config.get("statistics_compact_events", 10000))
+    return GameStatistics()
 
 
 class GameStatistics:
@@ -9,34 +38,65 @@ class GameStatistics:
     games_data = [games_played]
     questions_data = for each trivia questions, how many players answered correctly and how many players answered incorrectly
     and how many times the question has been appeared in the game
-    trivia_king = (player name , how many games he won)
+    trivia_king = [player name , how many games he won]
+
+    The rankings of the players and the questions are kept up to date in a Leaderboard as the statistics change, so
+    the leaderboard queries never scan the whole history.
+
+    In write-behind mode (statistics_flush_interval_ms > 0 in the config) an update only marks the statistics as
+    dirty, a background thread writes them at most once per interval, when a round or a game ends and on shutdown.
+
+    The modification time of the statistics file is remembered whenever it is read or written, so reloading a file
+    that did not change keeps the statistics and the leaderboard in memory instead of ranking everything again.
     """
 
-    def __init__(self):
+    def __init__(self, flush_interval_ms=None):
         """
         Loads statistics from a JSON file.
         If the file is missing or incomplete, initializes with default values.
+
+        Args:
+            flush_interval_ms (int): The minimum time between two writes of the statistics file, 0 to write on every
+                update. Read from the config file when not given.
         """
         self.players_data = {}
         self.games_data = 0
         self.question_data = {}
         self.trivia_king = [None, 0]
+        self.leaderboard = Leaderboard()
+        self.lock = threading.RLock()  # a single instance is shared by the games running concurrently
+        if flush_interval_ms is None:
+            flush_interval_ms = get_config().get("statistics_flush_interval_ms", 0)
+        self.flush_interval = flush_interval_ms / 1000
+        self.dirty = False
+        self.generation = 0
+        self.written_generation = 0
+        self.write_lock = threading.Lock()
+        self.loaded_mtime = None
+        self.flush_requested = threading.Event()
+        self.flusher = None
+        if self.flush_interval > 0:
+            self.flusher = threading.Thread(target=self.run_flusher, daemon=True)
+            self.flusher.start()
+            atexit.register(self.flush)
         self.load_statistics()
 
     def load_statistics(self):
+        self.loaded_mtime = self.read_mtime()
         reader = JSONReader("statistics.json")
         self.players_data = reader.get("players_data", {})
         self.games_data = reader.get("games_data", 0)
         self.question_data = reader.get("question_data", None)
         self.trivia_king = reader.get("trivia_king", [None, 0])
         if self.question_data is None:
-            q_reader = JSONReader("config.json")
-            questions = q_reader.get("questions")
+            questions = get_config().get("questions")
             self.question_data = {}
             for question in questions:
                 self.question_data[question["question"]] = {"correct_answers": 0, "incorrect_answers": 0,
                                                             "times_appeared": 0}
             self.save_statistics()
+        self.leaderboard.rebuild(self.players_data, self.question_data)
+        self.update_trivia_king()
 
     def add_player(self, player):
         """
@@ -46,12 +106,15 @@ class GameStatistics:
             player: An instance of the Player class representing the player to be added.
         """
         name = player.get_name()
-        if name not in self.players_data.keys():
-            print(name, "is not a player")
-            self.players_data[name] = {"games_played": 1, "games_won": 0, "correct_answers": 0, "incorrect_answers": 0}
-        else:
-            self.players_data[name]["games_played"] += 1
-        self.save_statistics()
+        with self.lock:
+            if name not in self.players_data.keys():
+                print(name, "is not a player")
+                self.players_data[name] = {"games_played": 1, "games_won": 0, "correct_answers": 0,
+                                           "incorrect_answers": 0}
+            else:
+                self.players_data[name]["games_played"] += 1
+            self.leaderboard.update_player(name, self.players_data[name])
+            self.save_statistics()
 
     def update_player(self, player, key):
         """
@@ -62,29 +125,57 @@ class GameStatistics:
             key: The key specifying the statistic to be updated (e.g., "games_won", "correct_answers").
         """
         name = player.get_name()
-        if name in self.players_data.keys():
-            self.players_data[name][key] += 1
-        if key == "games_won" and self.trivia_king[1] <= self.players_data[name][key]:
-            self.trivia_king = (name, self.players_data[name][key])
-        self.save_statistics()
+        with self.lock:
+            if name in self.players_data.keys():
+                self.players_data[name][key] += 1
+                self.leaderboard.update_player(name, self.players_data[name])
+            if key == "games_won":
+                self.update_trivia_king()
+            self.save_statistics()
+
+    def update_trivia_king(self):
+        """
+        Crowns the player with the most games won, read from the leaderboard.
+        """
+        top = self.leaderboard.top_players("games_won", 1)
+        self.trivia_king = top[0] if top and top[0][1] > 0 else [None, 0]
 
     def update_game(self):
         """
         Updates the total number of games played.
         """
+        with self.lock:
+            self.games_data += 1
+            self.save_statistics()
+
+    def read_mtime(self):
+        """
+        Reads the modification time of the statistics file.
 
-        self.games_data += 1
-        self.save_statistics()
+        Returns:
+            int: The modification time in nanoseconds, None if the file does not exist.
+        """
+        try:
+            return os.stat("statistics.json").st_mtime_ns
+        except OSError:
+            return None
 
     def reload_statistics(self):
         """
-        Reloads statistics from the JSON file.
+        Reloads statistics from the JSON file, unless it was not changed since it was last read or written.
         """
+        self.flush()  # updates not written yet would be lost
+        mtime = self.read_mtime()
+        if mtime is not None and mtime == self.loaded_mtime:
+            return
         reader = JSONReader("statistics.json")
-        self.players_data = reader.get("players_data")
-        self.games_data = reader.get("games_data")
-        self.question_data = reader.get("question_data")
-        self.trivia_king = reader.get("trivia_king")
+        with self.lock:
+            self.loaded_mtime = mtime
+            self.players_data = reader.get("players_data")
+            self.games_data = reader.get("games_data")
+            self.question_data = reader.get("question_data")
+            self.leaderboard.rebuild(self.players_data, self.question_data)
+            self.update_trivia_king()
 
     def update_question(self, question, correct, incorrect):
         """
@@ -95,24 +186,98 @@ class GameStatistics:
             correct: Number of correct answers.
             incorrect: Number of incorrect answers.
         """
-        if question in self.question_data:
-            self.question_data[question]["correct_answers"] += correct
-            self.question_data[question]["incorrect_answers"] += incorrect
-            self.question_data[question]["times_appeared"] += 1
-        self.save_statistics()
+        with self.lock:
+            # The questions of a question file are only added once they are asked
+            stats = self.question_data.setdefault(question, {"correct_answers": 0, "incorrect_answers": 0,
+                                                             "times_appeared": 0})
+            stats["correct_answers"] += correct
+            stats["incorrect_answers"] += incorrect
+            stats["times_appeared"] += 1
+            self.leaderboard.update_question(question, stats)
+            self.save_statistics()
 
     def save_statistics(self):
         """
-        Saves current statistics to a JSON file.
+        Saves current statistics to a JSON file, or only marks them as dirty in write-behind mode.
+        """
+        self.dirty = True
+        if self.flusher is None:
+            self.flush()
+
+    def snapshot(self):
+        """
+        Builds the content of the statistics file.
+
+        Returns:
+            dict: The statistics to write.
         """
-        statistics = {
+        return {
             "players_data": self.players_data,
             "games_data": self.games_data,
             "question_data": self.question_data,
             "trivia_king": self.trivia_king
         }
-        with open("statistics.json", "w") as file:
-            json.dump(statistics, file)
+
+    def request_flush(self):
+        """
+        Asks the background thread to write the dirty statistics now, called when a round or a game ends.
+        """
+        if self.flusher is None:
+            self.flush()
+        else:
+            self.flush_requested.set()
+
+    def run_flusher(self):
+        """
+        Runs the background thread writing the dirty statistics at most once per flush interval.
+
+        A requested flush only waits for what is left of the interval since the last flush. A failed write is
+        reported and retried on the next flush, it never stops the thread.
+        """
+        flushed_at = time.monotonic()
+        while True:
+            self.flush_requested.wait(self.flush_interval)
+            remaining = self.flush_interval - (time.monotonic() - flushed_at)
+            if remaining > 0:
+                time.sleep(remaining)
+            self.flush_requested.clear()
+            flushed_at = time.monotonic()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"{ANSI.RED.value}Could not write the statistics: {e}{ANSI.RESET.value}")
+
+    def flush(self):
+        """
+        Writes the statistics to the JSON file if they changed since the last write.
+
+        The statistics are written to a temporary file that then replaces the previous file, so a crash in the
+        middle of a write never leaves a truncated statistics file behind. The statistics stay dirty until the file
+        is replaced, a failed write is retried by the next flush.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            statistics = json.dumps(self.snapshot())
+            self.dirty = False
+            self.generation += 1
+            generation = self.generation
+        with self.write_lock:
+            if generation < self.written_generation:
+                return  # a newer snapshot was already written by another thread
+            temp_path = f"statistics.json.{os.getpid()}.tmp"
+            started_at = time.perf_counter()
+            try:
+                with open(temp_path, "w") as file:
+                    file.write(statistics)
+                os.replace(temp_path, "statistics.json")
+                self.loaded_mtime = self.read_mtime()
+            except OSError:
+                with self.lock:
+                    self.dirty = True
+                raise
+            STATISTICS_PERSISTENCE.observe(time.perf_counter() - started_at)
+            self.written_generation = generation
 
     def get_trivia_king(self):
         """
@@ -131,15 +296,93 @@ class GameStatistics:
             key: The key specifying the statistic to be considered (e.g., "correct_answers", "incorrect_answers").
 
         Returns:
-            Tuple[str, int]: A tuple containing the question and the maximum value.
+            list: The question and the maximum value, [None, 0] if no question has a value above 0.
+        """
+        with self.lock:
+            top = self.leaderboard.top_questions(key, 1)
+        return top[0] if top and top[0][1] > 0 else [None, 0]
+
+    def get_top_players(self, key="games_won", count=10):
+        """
+        Retrieves the best players.
+
+        Args:
+            key: The ranking to read, a player statistic or "correct_ratio".
+            count: How many players to retrieve.
+
+        Returns:
+            list: The [name, score] pairs, the best player first.
+        """
+        with self.lock:
+            return self.leaderboard.top_players(key, count)
+
+    def get_hardest_questions(self, count=10):
+        """
+        Retrieves the answered questions with the lowest share of correct answers.
+
+        Args:
+            count: How many questions to retrieve.
+
+        Returns:
+            list: The [question, ratio] pairs, the hardest question first.
+        """
+        with self.lock:
+            return self.leaderboard.hardest_questions(count)
+
+    def get_easiest_questions(self, count=10):
+        """
+        Retrieves the answered questions with the highest share of correct answers.
+
+        Args:
+            count: How many questions to retrieve.
+
+        Returns:
+            list: The [question, ratio] pairs, the easiest question first.
+        """
+        with self.lock:
+            return self.leaderboard.easiest_questions(count)
+
+    def query_statistics(self, table, prefix="", sort_by=None, descending=True, offset=0, limit=20):
+        """
+        Retrieves a page of the players' or the questions' statistics.
+
+        Args:
+            table: "players" or "questions".
+            prefix: Only the players or questions starting with it are listed.
+            sort_by: A statistic or "correct_ratio" to sort by, None to sort by name.
+            descending: True to list the highest values first.
+            offset: How many rows to skip.
+            limit: The maximum number of rows on the page.
+
+        Returns:
+            dict: The number of rows matching the prefix and the rows of the page.
         """
-        max_val = [None, 0]
-        for quest, stats in self.question_data.items():
-            val = stats[key]
-            if val > max_val[1]:
-                max_val[0] = quest
-                max_val[1] = val
-        return max_val
+        key = "name" if table == "players" else "question"
+        if sort_by == key:
+            sort_by = None
+        with self.lock:
+            index = self.leaderboard.get_table(table)
+            if sort_by is not None and sort_by not in index.rankings:
+                raise ValueError(f"unknown {table} statistic {sort_by}")
+            total, names = index.query(prefix, sort_by, descending, offset, limit)
+            data = self.players_data if table == "players" else self.question_data
+            rows = [{key: name, **data[name], "correct_ratio": correct_ratio(data[name])} for name in names]
+        return {"table": table, "total": total, "offset": offset, "limit": limit, "rows": rows}
+
+    def summarize_statistics(self, table, prefix=""):
+        """
+        Sums the players' or the questions' statistics.
+
+        Args:
+            table: "players" or "questions".
+            prefix: Only the players or questions starting with it are summed.
+
+        Returns:
+            dict: The number of players or questions, the sum of every statistic and the overall correct ratio.
+        """
+        with self.lock:
+            count, totals = self.leaderboard.get_table(table).summarize(prefix)
+        return {"table": table, "count": count, **totals, "correct_ratio": correct_ratio(totals)}
 
     def get_most_incorrect_question(self):
         """
@@ -186,3 +429,23 @@ class GameStatistics:
             dict: A dictionary containing question statistics.
         """
         return self.question_data
+
+
+if __name__ == '__main__':
+    # Query the statistics from scripts, e.g. python GameStatistics.py players --prefix BOT --sort games_won
+    parser = argparse.ArgumentParser(description="Print a page of the game statistics as JSON")
+    parser.add_argument("table", choices=("players", "questions"))
+    parser.add_argument("--prefix", default="", help="only list the names starting with this prefix")
+    parser.add_argument("--sort", default=None, help="the statistic to sort by, by name if not given")
+    parser.add_argument("--ascending", action="store_true", help="list the lowest values first")
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--summary", action="store_true", help="print the totals instead of a page")
+    args = parser.parse_args()
+    statistics = open_statistics()
+    if args.summary:
+        result = statistics.summarize_statistics(args.table, args.prefix)
+    else:
+        result = statistics.query_statistics(args.table, args.prefix, args.sort, not args.ascending, args.offset,
+                                             args.limit)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,371 @@
+import heapq
+from bisect import bisect_left, insort
+from itertools import chain, islice
+
+PLAYER_COUNTERS = ("games_played", "games_won", "correct_answers", "incorrect_answers")
+QUESTION_COUNTERS = ("correct_answers", "incorrect_answers", "times_appeared")
+
+
+def correct_ratio(stats):
+    """
+    Computes the share of correct answers of a player or a question.
+
+    Args:
+        stats (dict): The statistics of the player or the question.
+
+    Returns:
+        float: The share of correct answers, None if nothing was answered yet.
+    """
+    answered = stats["correct_answers"] + stats["incorrect_answers"]
+    if answered == 0:
+        return None
+    return stats["correct_answers"] / answered
+
+
+class Ranking:
+    """
+    Class keeping names sorted by a score computed from their statistics.
+
+    The entries are kept sorted as (-score, name) tuples, so the best entries come first and ties are broken by name.
+    Updating an entry is a binary search and a list insertion, reading the top k entries is a slice.
+
+    Attributes:
+        score (callable): Computes the score from the statistics, None to leave the name out of the ranking.
+        entries (list): The sorted (-score, name) tuples.
+        keys (dict): The entry of every ranked name.
+    """
+
+    def __init__(self, score):
+        """
+        Initializes the Ranking.
+
+        Args:
+            score (callable): Computes the score from the statistics, None to leave the name out of the ranking.
+        """
+        self.score = score
+        self.entries = []
+        self.keys = {}
+
+    def load(self, rows):
+        """
+        Ranks all the names at once, replacing the entries, with a single sort.
+
+        Args:
+            rows (dict): The statistics of every name.
+        """
+        self.keys = {}
+        for name, stats in rows.items():
+            score = self.score(stats)
+            if score is not None:
+                self.keys[name] = (-score, name)
+        self.entries = sorted(self.keys.values())
+
+    def update(self, name, stats):
+        """
+        Moves a name to its place for its new statistics.
+
+        Args:
+            name (str): The ranked name.
+            stats (dict): The statistics of the name.
+        """
+        entry = self.keys.pop(name, None)
+        if entry is not None:
+            del self.entries[bisect_left(self.entries, entry)]
+        score = self.score(stats)
+        if score is None:
+            return
+        entry = (-score, name)
+        insort(self.entries, entry)
+        self.keys[name] = entry
+
+    def top(self, count):
+        """
+        Gets the names with the highest scores.
+
+        Args:
+            count (int): How many names to get.
+
+        Returns:
+            list: The [name, score] pairs, the highest score first.
+        """
+        return [[name, -score] for score, name in self.entries[:count]]
+
+    def bottom(self, count):
+        """
+        Gets the names with the lowest scores.
+
+        Args:
+            count (int): How many names to get.
+
+        Returns:
+            list: The [name, score] pairs, the lowest score first.
+        """
+        return [[name, -score] for score, name in reversed(self.entries[-count:])] if count > 0 else []
+
+    def names(self, descending=True):
+        """
+        Iterates over the ranked names in order.
+
+        Args:
+            descending (bool): True to start from the highest score.
+
+        Returns:
+            iterator: The ranked names.
+        """
+        entries = self.entries if descending else reversed(self.entries)
+        return (name for _, name in entries)
+
+
+class RankedTable:
+    """
+    Class indexing the statistics of the players or of the questions.
+
+    It keeps the names sorted for prefix filters, a Ranking per sort key, and running totals of the counters, so
+    pages, counts and summaries are answered without going over the whole table.
+
+    Attributes:
+        counters (tuple): The counters every row has.
+        rankings (dict): The Ranking of every sort key.
+        names (list): The sorted names.
+        counts (dict): The counters of every name as they were last indexed.
+        totals (dict): The sum of every counter over all the names.
+    """
+
+    def __init__(self, counters, rankings):
+        """
+        Initializes an empty table.
+
+        Args:
+            counters (tuple): The counters every row has.
+            rankings (dict): The Ranking of every sort key.
+        """
+        self.counters = counters
+        self.rankings = rankings
+        self.names = []
+        self.counts = {}
+        self.totals = dict.fromkeys(counters, 0)
+
+    def load(self, rows):
+        """
+        Indexes all the rows at once, replacing the table, sorting the names and every ranking a single time.
+
+        Args:
+            rows (dict): The statistics of every name.
+        """
+        self.names = sorted(rows)
+        self.counts = {name: tuple(stats[key] for key in self.counters) for name, stats in rows.items()}
+        self.totals = {key: sum(counts[index] for counts in self.counts.values())
+                       for index, key in enumerate(self.counters)}
+        for ranking in self.rankings.values():
+            ranking.load(rows)
+
+    def update(self, name, stats):
+        """
+        Indexes the new statistics of a name.
+
+        Args:
+            name (str): The name of the row.
+            stats (dict): The statistics of the row.
+        """
+        counts = tuple(stats[key] for key in self.counters)
+        previous = self.counts.get(name)
+        if previous is None:
+            insort(self.names, name)
+            previous = (0,) * len(self.counters)
+        for key, old, new in zip(self.counters, previous, counts):
+            self.totals[key] += new - old
+        self.counts[name] = counts
+        for ranking in self.rankings.values():
+            ranking.update(name, stats)
+
+    def prefix_range(self, prefix):
+        """
+        Finds the names starting with a prefix.
+
+        Args:
+            prefix (str): The prefix, "" for every name.
+
+        Returns:
+            tuple: The start and end index of the names in the sorted names.
+        """
+        if not prefix:
+            return 0, len(self.names)
+        return bisect_left(self.names, prefix), bisect_left(self.names, prefix + "\U0010ffff")
+
+    def query(self, prefix="", sort_by=None, descending=True, offset=0, limit=20):
+        """
+        Gets a page of names.
+
+        Sorting by name reads a slice of the sorted names. Sorting by a ranking walks it from the best (or worst)
+        entry and stops once the page is full, the names the ranking leaves out come last. With a prefix, only the
+        entries of the names in the prefix range are ranked, so a page never goes over the whole table.
+
+        Args:
+            prefix (str): Only the names starting with it are listed.
+            sort_by (str): The ranking to sort by, None to sort by name.
+            descending (bool): True to list the highest values first.
+            offset (int): How many names to skip.
+            limit (int): The maximum number of names on the page.
+
+        Returns:
+            tuple: The number of names matching the prefix and the names of the page.
+        """
+        start, end = self.prefix_range(prefix)
+        if sort_by is None:
+            if descending:
+                page = self.names[max(end - offset - limit, start):max(end - offset, start)]
+                return end - start, page[::-1]
+            return end - start, self.names[min(start + offset, end):min(start + offset + limit, end)]
+        ranking = self.rankings[sort_by]
+        if prefix:
+            entries = [ranking.keys[name] for name in self.names[start:end] if name in ranking.keys]
+            select = heapq.nsmallest if descending else heapq.nlargest
+            names = (name for _, name in select(offset + limit, entries))
+        else:
+            names = ranking.names(descending)
+        if len(ranking.keys) < len(self.names):
+            unranked = (self.names[index] for index in range(start, end) if self.names[index] not in ranking.keys)
+            names = chain(names, unranked)
+        return end - start, list(islice(names, offset, offset + limit))
+
+    def summarize(self, prefix=""):
+        """
+        Sums the counters of the names starting with a prefix.
+
+        Args:
+            prefix (str): Only the names starting with it are summed, "" to read the running totals.
+
+        Returns:
+            tuple: The number of names and the sum of every counter.
+        """
+        start, end = self.prefix_range(prefix)
+        if not prefix:
+            return end - start, dict(self.totals)
+        totals = dict.fromkeys(self.counters, 0)
+        for index in range(start, end):
+            for key, count in zip(self.counters, self.counts[self.names[index]]):
+                totals[key] += count
+        return end - start, totals
+
+
+class Leaderboard:
+    """
+    Class maintaining the rankings of the players and the questions as their statistics are updated.
+
+    Attributes:
+        players (RankedTable): The players, ranked by games won and by correct answer ratio.
+        questions (RankedTable): The questions, ranked by every question statistic and by correct answer ratio.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty rankings.
+        """
+        self.players = RankedTable(PLAYER_COUNTERS, {
+            "games_played": Ranking(lambda stats: stats["games_played"]),
+            "games_won": Ranking(lambda stats: stats["games_won"]),
+            "correct_answers": Ranking(lambda stats: stats["correct_answers"]),
+            "incorrect_answers": Ranking(lambda stats: stats["incorrect_answers"]),
+            "correct_ratio": Ranking(correct_ratio)
+        })
+        self.questions = RankedTable(QUESTION_COUNTERS, {
+            "correct_answers": Ranking(lambda stats: stats["correct_answers"]),
+            "incorrect_answers": Ranking(lambda stats: stats["incorrect_answers"]),
+            "times_appeared": Ranking(lambda stats: stats["times_appeared"]),
+            "correct_ratio": Ranking(correct_ratio)
+        })
+
+    def rebuild(self, players_data, question_data):
+        """
+        Ranks all the players and questions again, used when the statistics are loaded.
+
+        Args:
+            players_data (dict): The statistics of every player.
+            question_data (dict): The statistics of every question.
+        """
+        self.players.load(players_data)
+        self.questions.load(question_data)
+
+    def update_player(self, name, stats):
+        """
+        Updates the rankings of a player.
+
+        Args:
+            name (str): The name of the player.
+            stats (dict): The statistics of the player.
+        """
+        self.players.update(name, stats)
+
+    def update_question(self, question, stats):
+        """
+        Updates the rankings of a question.
+
+        Args:
+            question (str): The question.
+            stats (dict): The statistics of the question.
+        """
+        self.questions.update(question, stats)
+
+    def get_table(self, table):
+        """
+        Gets the index of a statistics table.
+
+        Args:
+            table (str): "players" or "questions".
+
+        Returns:
+            RankedTable: The index of the table.
+        """
+        if table not in ("players", "questions"):
+            raise ValueError(f"unknown statistics table {table}")
+        return getattr(self, table)
+
+    def top_players(self, key="games_won", count=10):
+        """
+        Gets the best players.
+
+        Args:
+            key (str): The ranking to read, a player statistic or "correct_ratio".
+            count (int): How many players to get.
+
+        Returns:
+            list: The [name, score] pairs, the best player first.
+        """
+        return self.players.rankings[key].top(count)
+
+    def top_questions(self, key="correct_answers", count=10):
+        """
+        Gets the questions with the highest value of a statistic.
+
+        Args:
+            key (str): The ranking to read, a question statistic or "correct_ratio".
+            count (int): How many questions to get.
+
+        Returns:
+            list: The [question, score] pairs, the highest score first.
+        """
+        return self.questions.rankings[key].top(count)
+
+    def hardest_questions(self, count=10):
+        """
+        Gets the answered questions with the lowest correct answer ratio.
+
+        Args:
+            count (int): How many questions to get.
+
+        Returns:
+            list: The [question, ratio] pairs, the hardest question first.
+        """
+        return self.questions.rankings["correct_ratio"].bottom(count)
+
+    def easiest_questions(self, count=10):
+        """
+        Gets the answered questions with the highest correct answer ratio.
+
+        Args:
+            count (int): How many questions to get.
+
+        Returns:
+            list: The [question, ratio] pairs, the easiest question first.
+        """
+        return self.questions.rankings["correct_ratio"].top(count)
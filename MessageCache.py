@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from Colors import ANSI
+
+
+class MessageCache:
+    """
+    Class holding the parts of the game messages that never change, rendered and UTF-8 encoded once.
+
+    The server builds the cache when it loads its questions and hands it to every game engine, so a round only
+    has to join the cached fragments with the round number and the current roster. The questions of a question
+    file are encoded the first time they are asked instead, and only the most recently asked ones are kept so the
+    cache never grows to the whole file.
+
+    Attributes:
+        question_prefix (str): The prefix preceding every question.
+        question_bodies (OrderedDict): The encoded body of each question, by question id, least recently used first.
+        max_question_bodies (int): How many encoded question bodies are kept.
+        lock (threading.Lock): Lock object for synchronizing the games sharing the cache.
+        roster_prefix (bytes): The fragment preceding the names of the active players.
+        roster_suffix (bytes): The fragment following the names of the active players.
+        loser_message (bytes): The encoded message sent to the players knocked out of the game.
+    """
+
+    def __init__(self, questions, question_prefix, client_lose_msg, max_question_bodies=1024):
+        """
+        Initializes the MessageCache.
+
+        Args:
+            questions (list): List of questions, each question must already have its id.
+            question_prefix (str): The prefix preceding every question.
+            client_lose_msg (str): The message sent to the players knocked out of the game.
+            max_question_bodies (int): How many encoded question bodies are kept.
+        """
+        self.question_prefix = question_prefix
+        self.max_question_bodies = max_question_bodies
+        self.lock = threading.Lock()
+        self.question_bodies = OrderedDict()
+        for question in questions[:max_question_bodies]:
+            self.question_bodies[question['id']] = self.encode_question_body(question)
+        self.roster_prefix = f"{ANSI.BLUE.value}, played by ".encode()
+        self.roster_suffix = (f"{ANSI.RESET.value}{ANSI.MAGENTA.value}\nThe next question is..."
+                              f"{ANSI.RESET.value}").encode()
+        self.loser_message = f'{ANSI.RED.value}{client_lose_msg}{ANSI.SAD_FACE.value}{ANSI.RESET.value}'.encode()
+
+    def encode_question_body(self, question):
+        """
+        Encodes the body of a question.
+
+        Args:
+            question (dict): a dict of the question and its answer.
+        Returns:
+            bytes: The encoded body of the question.
+        """
+        return f"\n{self.question_prefix}: {question['question']}".encode()
+
+    def get_question_body(self, question):
+        """
+        Gets the encoded body of a question, encoding it if it is not cached.
+
+        Args:
+            question (dict): a dict of the question and its answer.
+        Returns:
+            bytes: The encoded body of the question.
+        """
+        with self.lock:
+            body = self.question_bodies.get(question['id'])
+            if body is not None:
+                self.question_bodies.move_to_end(question['id'])
+                return body
+        body = self.encode_question_body(question)
+        with self.lock:
+            self.question_bodies[question['id']] = body
+            while len(self.question_bodies) > self.max_question_bodies:
+                self.question_bodies.popitem(last=False)
+        return body
+
+    def build_round_question_payload(self, round_number, roster, question):
+        """
+        Joins the cached fragments into the question message of a round.
+
+        Args:
+            round_number (int): The number of the round, starting at 1.
+            roster (bytes): The encoded names of the active players.
+            question (dict): a dict of the question and its answer.
+        Returns:
+            bytes: The encoded round msg for the players.
+        """
+        round_header = f"{ANSI.CYAN.value}Round {round_number}{ANSI.RESET.value}".encode()
+        return b''.join((round_header, self.roster_prefix, roster, self.roster_suffix,
+                         self.get_question_body(question)))
@@ -0,0 +1,216 @@
+import bisect
+import http.server
+import threading
+from Colors import ANSI
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Class counting observed durations in fixed buckets, like a Prometheus histogram.
+
+    Attributes:
+        name (str): The name of the metric.
+        help_text (str): The description of the metric.
+        buckets (tuple): The upper bounds of the buckets, in seconds.
+        counts (list): The number of observations of every bucket, the last one counting those above every bound.
+        total (float): The sum of the observations.
+        lock (threading.Lock): Lock object for synchronizing the observations of concurrent games.
+    """
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes the Histogram.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            buckets (tuple): The upper bounds of the buckets, in seconds, sorted.
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Records an observation.
+
+        Args:
+            value (float): The observed duration, in seconds.
+        """
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.total += value
+
+    def observe_many(self, values):
+        """
+        Records many observations at once, taking the lock once.
+
+        Args:
+            values (iterable): The observed durations, in seconds.
+        """
+        buckets = self.buckets
+        with self.lock:
+            for value in values:
+                self.counts[bisect.bisect_left(buckets, value)] += 1
+                self.total += value
+
+    def render(self):
+        """
+        Renders the histogram in the Prometheus text format.
+
+        Returns:
+            list: The lines of the histogram.
+        """
+        with self.lock:
+            counts = list(self.counts)
+            total = self.total
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {total}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Class holding the histograms and the gauges of the process.
+
+    Gauges are not stored, they are read from their owner every time the metrics are rendered.
+
+    Attributes:
+        histograms (dict): The histograms, by name.
+        gauges (dict): The description and the function reading every gauge, by name.
+        lock (threading.Lock): Lock object for synchronizing the registration of metrics.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty MetricsRegistry.
+        """
+        self.histograms = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """
+        Gets a histogram, creating it the first time it is asked for.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            buckets (tuple): The upper bounds of the buckets, in seconds.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(name, help_text, buckets)
+            return histogram
+
+    def set_gauge(self, name, help_text, read):
+        """
+        Registers a gauge, replacing the gauge of the same name.
+
+        Args:
+            name (str): The name of the metric.
+            help_text (str): The description of the metric.
+            read (callable): Called without arguments to read the value of the gauge.
+        """
+        with self.lock:
+            self.gauges[name] = (help_text, read)
+
+    def render(self):
+        """
+        Renders every metric in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        with self.lock:
+            histograms = list(self.histograms.values())
+            gauges = list(self.gauges.items())
+        lines = []
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        for name, (help_text, read) in gauges:
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Request handler serving the metrics of the process on /metrics.
+    """
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # every scrape would be printed among the game messages
+
+
+registry = MetricsRegistry()
+FAN_OUT = registry.histogram("trivia_question_fan_out_seconds", "Time to queue a question for every player.")
+ANSWER_LATENCY = registry.histogram("trivia_answer_latency_seconds",
+                                    "Time from sending a question to receiving the answer of a player.")
+ANSWER_COLLECTION = registry.histogram("trivia_answer_collection_seconds", "Time spent waiting for the answers.")
+SCORING = registry.histogram("trivia_scoring_seconds", "Time to score the answers of a round.")
+STATISTICS_UPDATE = registry.histogram("trivia_statistics_update_seconds", "Time to record the statistics of a round.")
+STATISTICS_PERSISTENCE = registry.histogram("trivia_statistics_persistence_seconds",
+                                            "Time of every write of the statistics to disk, a file write or a "
+                                            "database transaction.")
+JOIN_LATENCY = registry.histogram("trivia_join_latency_seconds",
+                                  "Time from accepting a connection to the player joining the lobby.")
+registry.set_gauge("trivia_threads", "Number of live threads.", threading.active_count)
+
+metrics_server = None
+metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serve the metrics of the process over HTTP in the Prometheus text format, once per process.
+
+    Args:
+        port (int): The TCP port of the endpoint.
+        host (str): The address of the endpoint, local only by default.
+
+    Returns:
+        http.server.ThreadingHTTPServer: The metrics server, None if it could not be started.
+    """
+    global metrics_server
+    with metrics_server_lock:
+        if metrics_server is None:
+            try:
+                metrics_server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                print(f"{ANSI.RED.value}Could not serve the metrics on port {port}: {e}{ANSI.RESET.value}")
+                return None
+            metrics_server.daemon_threads = True
+            threading.Thread(target=metrics_server.serve_forever, name='metrics', daemon=True).start()
+            print(f"{ANSI.CYAN.value}Serving metrics on http://{host}:{port}/metrics{ANSI.RESET.value}")
+        return metrics_server
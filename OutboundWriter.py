@@ -0,0 +1,191 @@
+import selectors
+import socket
+import threading
+
+
+class OutboundWriter(threading.Thread):
+    """
+    Thread draining the outbound buffers of all the players of a game.
+
+    Sending a message only appends it to the player's buffer, so a slow client never stalls the broadcast for the
+    players after it. Players whose buffer grows beyond the high water mark are evicted, and so are the players whose
+    buffer is still not sent when the writer is closed.
+
+    Attributes:
+        high_water_mark (int): The maximum number of bytes waiting to be sent to a single player.
+        on_evict (callable): Called with the player when it is evicted.
+        buffers (dict): The bytes waiting to be sent to each player.
+        lock (threading.Lock): Lock object for synchronizing access to the buffers.
+        running (bool): False once the writer was asked to stop.
+    """
+
+    def __init__(self, high_water_mark, on_evict):
+        """
+        Initializes the OutboundWriter.
+
+        Args:
+            high_water_mark (int): The maximum number of bytes waiting to be sent to a single player.
+            on_evict (callable): Called with the player when it is evicted.
+        """
+        super().__init__(daemon=True)
+        self.high_water_mark = high_water_mark
+        self.on_evict = on_evict
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.running = True
+        self.selector = selectors.DefaultSelector()
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_reader.setblocking(False)
+        self.wakeup_writer.setblocking(False)
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ, None)
+
+    def enqueue(self, player, data):
+        """
+        Queues bytes to be sent to a player.
+
+        Args:
+            player (Player): The player to send the bytes to.
+            data (bytes): The bytes to send.
+        Returns:
+            bool: False if the player was evicted because its buffer is over the high water mark.
+        """
+        return not self.enqueue_many(((player, data),))
+
+    def enqueue_many(self, messages):
+        """
+        Queues bytes to be sent to many players, taking the lock and waking the writer up once.
+
+        Args:
+            messages (iterable): The players and the bytes to send them.
+
+        Returns:
+            list: The players evicted because their buffer is over the high water mark.
+        """
+        evicted = []
+        with self.lock:
+            for player, data in messages:
+                buffer = self.buffers.setdefault(player, bytearray())
+                buffer += data
+                if len(buffer) > self.high_water_mark:
+                    del self.buffers[player]
+                    evicted.append(player)
+        for player in evicted:
+            self.on_evict(player)
+        self.wake()
+        return evicted
+
+    def wake(self):
+        """
+        Wakes the writer thread up so it notices new buffers.
+        """
+        try:
+            self.wakeup_writer.send(b'\0')
+        except BlockingIOError:
+            pass  # the writer already has a pending wake up
+        except OSError:
+            pass  # the writer stopped
+
+    def close(self, timeout=5):
+        """
+        Stops the writer once every buffer was sent, or once the timeout passed.
+
+        The players whose buffer is still not sent after the timeout are evicted, so the writer never outlives the
+        game and never writes to a socket the next game writes to.
+
+        Args:
+            timeout (float): How many seconds to wait for the buffers to be sent.
+        """
+        self.running = False
+        self.wake()
+        self.join(timeout)
+        if not self.is_alive():
+            return
+        with self.lock:
+            stalled = list(self.buffers)
+            self.buffers.clear()
+        for player in stalled:
+            self.on_evict(player)
+        self.wake()
+        self.join(timeout)
+
+    def run(self):
+        """
+        Runs the thread sending the buffered bytes whenever the player sockets are writable.
+        """
+        registered = {}
+        try:
+            while True:
+                with self.lock:
+                    if not self.running and not self.buffers:
+                        break
+                    pending = {player.get_socket(): player for player in self.buffers}
+                for sock in [sock for sock in registered if sock not in pending]:
+                    self.selector.unregister(sock)
+                    del registered[sock]
+                for sock, player in pending.items():
+                    if sock not in registered:
+                        try:
+                            self.selector.register(sock, selectors.EVENT_WRITE, player)
+                            registered[sock] = player
+                        except (ValueError, OSError):
+                            self.drop(player)
+                            self.on_evict(player)
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        self.drain_wakeups()
+                    else:
+                        self.write(key.data)
+        finally:
+            self.selector.close()
+            self.wakeup_reader.close()
+            self.wakeup_writer.close()
+
+    def drain_wakeups(self):
+        """
+        Reads the pending wake up bytes.
+        """
+        try:
+            while self.wakeup_reader.recv(1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def write(self, player):
+        """
+        Sends as much of a player's buffer as the socket accepts without blocking.
+
+        The buffer is sent through a memoryview instead of a copy, under the lock since a bytearray can not be
+        resized while it is viewed. The send never blocks, so the lock is only held for as long as a copy would take.
+
+        Args:
+            player (Player): The player whose socket is writable.
+        """
+        with self.lock:
+            buffer = self.buffers.get(player)
+            if not buffer:
+                return
+            try:
+                with memoryview(buffer) as data:
+                    sent = player.get_socket().send(data)
+            except BlockingIOError:
+                return
+            except OSError:
+                del self.buffers[player]
+                failed = True
+            else:
+                failed = False
+                del buffer[:sent]
+                if not buffer:
+                    del self.buffers[player]
+        if failed:
+            self.on_evict(player)
+
+    def drop(self, player):
+        """
+        Drops the buffer of a player.
+
+        Args:
+            player (Player): The player to drop.
+        """
+        with self.lock:
+            self.buffers.pop(player, None)
@@ -1,14 +1,35 @@
+import itertools
+
+next_player_id = itertools.count(1).__next__
+
+
 class Player:
     """
     Class representing a player in the game.
 
+    Players are compared and hashed by an id given when their connection is accepted, which never changes, so a
+    player renamed after joining stays the same key in the dicts of a round. The state of the current round is kept
+    on the player, and __slots__ leaves out the per-instance __dict__ of very large lobbies.
+
     Attributes:
+        player_id (int): The unique id of the player, never changed.
         name (str): The name of the player.
         socket (socket): The socket associated with the player.
         active (bool): Flag indicating whether the player is active in the game.
+        reader (asyncio.StreamReader): The stream reader of the player, only set in asyncio server mode.
+        writer (asyncio.StreamWriter): The stream writer of the player, only set in asyncio server mode.
+        protocol_version (int): The protocol version negotiated with the player's client.
+        decoder (Protocol.FrameDecoder): The decoder buffering the frames of a v2 client, None for v1 clients.
+        answer (str): The answer of the player to the current round, None until it is received.
+        answered_at (float): The monotonic time the answer to the current round was received at.
+        score (int): The number of correct answers of the player in the current game.
     """
 
-    def __init__(self, name, socket, active):
+    __slots__ = ("player_id", "name", "socket", "active", "reader", "writer", "protocol_version", "decoder",
+                 "answer", "answered_at", "score")
+
+    def __init__(self, name, socket, active, reader=None, writer=None, protocol_version=1, decoder=None,
+                 player_id=None):
         """
         Initializes the Player.
 
@@ -16,10 +37,23 @@ class Player:
             name (str): The name of the player.
             socket (socket.socket): The socket associated with the player.
             active (bool): Flag indicating whether the player is active in the game.
+            reader (asyncio.StreamReader): The stream reader of the player, only set in asyncio server mode.
+            writer (asyncio.StreamWriter): The stream writer of the player, only set in asyncio server mode.
+            protocol_version (int): The protocol version negotiated with the player's client.
+            decoder (Protocol.FrameDecoder): The decoder buffering the frames of a v2 client.
+            player_id (int): The id of the player, a new one is taken when not given.
         """
+        self.player_id = next_player_id() if player_id is None else player_id
         self.name = name
         self.socket = socket
         self.active = active
+        self.reader = reader
+        self.writer = writer
+        self.protocol_version = protocol_version
+        self.decoder = decoder
+        self.answer = None
+        self.answered_at = None
+        self.score = 0
 
     def get_name(self):
         """
@@ -39,6 +73,110 @@ class Player:
         """
         return self.socket
 
+    def get_reader(self):
+        """
+        Gets the stream reader associated with the player.
+
+        Returns:
+            asyncio.StreamReader: The stream reader, or None when the player is not served by asyncio.
+        """
+        return self.reader
+
+    def get_writer(self):
+        """
+        Gets the stream writer associated with the player.
+
+        Returns:
+            asyncio.StreamWriter: The stream writer, or None when the player is not served by asyncio.
+        """
+        return self.writer
+
+    def get_protocol_version(self):
+        """
+        Gets the protocol version negotiated with the player's client.
+
+        Returns:
+            int: The protocol version.
+        """
+        return self.protocol_version
+
+    def get_decoder(self):
+        """
+        Gets the frame decoder of the player.
+
+        Returns:
+            Protocol.FrameDecoder: The decoder, or None for v1 clients.
+        """
+        return self.decoder
+
+    def get_id(self):
+        """
+        Gets the id of the player.
+
+        Returns:
+            int: The id of the player.
+        """
+        return self.player_id
+
+    def get_answer(self):
+        """
+        Gets the answer of the player to the current round.
+
+        Returns:
+            str: The answer, None if it was not received.
+        """
+        return self.answer
+
+    def get_answered_at(self):
+        """
+        Gets the time the answer to the current round was received at.
+
+        Returns:
+            float: The monotonic receive time, None if no answer was received.
+        """
+        return self.answered_at
+
+    def record_answer(self, answer, answered_at):
+        """
+        Records the answer of the player to the current round.
+
+        Args:
+            answer (str): The answer.
+            answered_at (float): The monotonic time the answer was received at.
+        """
+        self.answer = answer
+        self.answered_at = answered_at
+
+    def clear_answer(self):
+        """
+        Forgets the answer of the previous round, called when a new round starts.
+        """
+        self.answer = None
+        self.answered_at = None
+
+    def reset_for_next_game(self):
+        """
+        Gets the player ready for the next game on the same connection.
+        """
+        self.clear_answer()
+        self.score = 0
+        self.active = True
+
+    def get_score(self):
+        """
+        Gets the number of correct answers of the player in the current game.
+
+        Returns:
+            int: The score of the player.
+        """
+        return self.score
+
+    def add_point(self):
+        """
+        Counts a correct answer of the player.
+        """
+        self.score += 1
+
     def is_active(self):
         """
         Checks if the player is active in the game.
@@ -68,21 +206,21 @@ class Player:
 
     def __eq__(self, other):
         """
-        Checks if two players are equal based on their names.
+        Checks if two players are equal based on their ids.
 
         Args:
             other (Player): The other player to compare.
 
         Returns:
-            bool: True if the players have the same name, False otherwise.
+            bool: True if the players have the same id, False otherwise.
         """
-        return self.name == other.name
+        return isinstance(other, Player) and self.player_id == other.player_id
 
     def __hash__(self):
         """
-        Computes the hash value of the player based on their name.
+        Computes the hash value of the player based on their id.
 
         Returns:
-            int: The hash value of the player's name.
+            int: The hash value of the player's id.
         """
-        return hash(self.name)
+        return hash(self.player_id)
@@ -6,54 +6,113 @@ class PlayerManager:
     """
     Class for managing players in the game.
 
+    The players are indexed by id, their names are indexed to keep them unique, and the players and the
+    active players are handed out as immutable snapshots, so a broadcast can iterate over them while other threads
+    kick players.
+
     Attributes:
-        players (list): List of all players.
-        active_players (list): List of active players.
+        players (dict): All players, by id.
+        active_players (dict): The active players, by id.
+        names (dict): The id of every player, by name.
+        name_suffixes (dict): The next suffix to try for every name that was taken.
         lock (threading.Lock): Lock object for synchronizing access to player lists.
+        players_snapshot (tuple): All players, None when it has to be rebuilt after a change.
+        active_snapshot (tuple): The active players, None when it has to be rebuilt after a change.
+        active_roster (bytes): The encoded, comma separated names of the active players, None when it has to be
+            rebuilt after a player joined or left.
     """
 
     def __init__(self):
         """
         Initializes the PlayerManager.
         """
-        self.players = []
-        self.active_players = []
+        self.players = {}
+        self.active_players = {}
+        self.names = {}
+        self.name_suffixes = {}
         self.lock = threading.Lock()
+        self.players_snapshot = ()
+        self.active_snapshot = ()
+        self.active_roster = b''
 
     def add_player(self, player):
         """
-        Adds a player to the manager.
+        Adds a player to the manager, renaming it name(i) if its name is taken.
 
         Args:
             player (Player): The player to add.
+
+        Returns:
+            bool: True if the player was renamed.
         """
         with self.lock:
             name_changed = False
             player_name = player.get_name()
-            players_names = self.get_players_names()
-            i = 1
-            while player_name in players_names:
-                new_player_name = f'{player_name}({i})'
-                if new_player_name not in players_names:
-                    player.set_name(new_player_name)
-                    name_changed = True
-                    break
-                i += 1
-            self.players.append(player)
-            self.active_players.append(player)
+            if player_name in self.names:
+                i = self.name_suffixes.get(player_name, 1)
+                while f'{player_name}({i})' in self.names:
+                    i += 1
+                self.name_suffixes[player_name] = i + 1
+                player.set_name(f'{player_name}({i})')
+                name_changed = True
+            player_id = player.get_id()
+            self.players[player_id] = player
+            self.active_players[player_id] = player
+            self.names[player.get_name()] = player_id
+            self.players_snapshot = None
+            self.active_snapshot = None
+            self.active_roster = None
             return name_changed
 
     def get_players_names(self):
-        return [player.get_name() for player in self.players]
+        return list(self.names)
+
+    def get_player(self, player_id):
+        """
+        Gets a player by id.
+
+        Args:
+            player_id (int): The id of the player.
+
+        Returns:
+            Player: The player, None if no player has this id.
+        """
+        return self.players.get(player_id)
+
+    def get_player_by_name(self, name):
+        """
+        Gets a player by name.
+
+        Args:
+            name (str): The name of the player.
+
+        Returns:
+            Player: The player, None if no player has this name.
+        """
+        with self.lock:
+            player_id = self.names.get(name)
+            return None if player_id is None else self.players[player_id]
 
     def get_players(self):
         """
         Gets all players.
 
         Returns:
-            list: List of all players.
+            tuple: A snapshot of all players, not changed by players joining or being kicked later.
         """
-        return self.players
+        with self.lock:
+            if self.players_snapshot is None:
+                self.players_snapshot = tuple(self.players.values())
+            return self.players_snapshot
+
+    def count_players(self):
+        """
+        Counts all players.
+
+        Returns:
+            int: The number of players.
+        """
+        return len(self.players)
 
     def kick_player(self, player):
         """
@@ -63,19 +122,35 @@ class PlayerManager:
             player (Player): The player to kick.
         """
         with self.lock:
-            if player in self.players:
-                self.players.remove(player)
-            if player in self.active_players:
-                self.active_players.remove(player)
+            player_id = player.get_id()
+            if self.players.pop(player_id, None) is not None:
+                self.players_snapshot = None
+                if self.names.get(player.get_name()) == player_id:
+                    del self.names[player.get_name()]
+            if self.active_players.pop(player_id, None) is not None:
+                self.active_snapshot = None
+                self.active_roster = None
 
     def get_active_players(self):
         """
         Gets active players.
 
         Returns:
-            list: List of active players.
+            tuple: A snapshot of the active players, not changed by players being kicked later.
+        """
+        with self.lock:
+            if self.active_snapshot is None:
+                self.active_snapshot = tuple(self.active_players.values())
+            return self.active_snapshot
+
+    def count_active_players(self):
         """
-        return self.active_players
+        Counts the active players.
+
+        Returns:
+            int: The number of active players.
+        """
+        return len(self.active_players)
 
     def set_active_players(self, active_players):
         """
@@ -85,5 +160,19 @@ class PlayerManager:
             active_players (list): List of active players.
         """
         with self.lock:
-            self.active_players = active_players
+            self.active_players = {player.get_id(): player for player in active_players}
+            self.active_snapshot = None
+            self.active_roster = None
+
+    def get_active_roster(self):
+        """
+        Gets the encoded names of the active players, rebuilding them only if a player joined or left since the last
+        call.
 
+        Returns:
+            bytes: The comma separated names of the active players.
+        """
+        with self.lock:
+            if self.active_roster is None:
+                self.active_roster = ", ".join([player.get_name() for player in self.active_players.values()]).encode()
+            return self.active_roster
@@ -0,0 +1,207 @@
+import asyncio
+import cProfile
+import functools
+import itertools
+import os
+import pstats
+import signal
+import threading
+from Colors import ANSI
+
+
+class RoundProfiler:
+    """
+    Class profiling the next rounds of the games with cProfile, armed at startup or at runtime.
+
+    Every profiled round is written to the profile directory as a pstats file, loadable with pstats or snakeviz,
+    and as a text summary of the functions with the highest cumulative time. The connections handled while the
+    profiler is armed are profiled too and written along with the next round. A disarmed profiler costs a single
+    attribute check per round.
+
+    Attributes:
+        remaining_rounds (int): How many rounds are still to be profiled.
+        directory (str): The directory the profiles are written to.
+        pending (dict): The merged profiles of the calls waiting for the next round to be written, by kind.
+        sequence (itertools.count): The numbers of the written rounds.
+        lock (threading.Lock): Lock object for synchronizing the games and connections profiled concurrently.
+        local (threading.local): Whether a profile is running on the current thread, profiles are never nested.
+        signal_rounds (int): How many rounds to profile on every profiling signal.
+        signal_directory (str): The directory to write the profiles requested by a signal to.
+        signals (int): How many profiling signals were received, only ever incremented by the signal handler.
+        handled_signals (int): How many profiling signals were picked up by a round.
+    """
+
+    def __init__(self):
+        """
+        Initializes a disarmed RoundProfiler.
+        """
+        self.remaining_rounds = 0
+        self.directory = 'profiles'
+        self.pending = {}
+        self.sequence = itertools.count(1)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.signal_rounds = 0
+        self.signal_directory = None
+        self.signals = 0
+        self.handled_signals = 0
+
+    def arm(self, rounds, directory=None):
+        """
+        Profile the next rounds.
+
+        Args:
+            rounds (int): How many rounds to profile.
+            directory (str): The directory to write the profiles to, unchanged when not given.
+        """
+        with self.lock:
+            self.remaining_rounds = rounds
+            if directory is not None:
+                self.directory = directory
+        print(f"{ANSI.YELLOW.value}Profiling the next {rounds} rounds into {self.directory}{ANSI.RESET.value}")
+
+    def request(self):
+        """
+        Asks for the next rounds to be profiled, from the signal handler.
+
+        The handler may interrupt the thread holding the lock, so it only counts the signal, without taking the lock
+        or printing. The next round arms the profiler.
+        """
+        self.signals += 1
+
+    def take_round(self):
+        """
+        Counts a round to be profiled, if the profiler is armed or a profiling signal was received.
+
+        Returns:
+            bool: True if the round has to be profiled.
+        """
+        with self.lock:
+            signals = self.signals
+            signaled = signals != self.handled_signals
+            if signaled:
+                self.handled_signals = signals
+                self.remaining_rounds = self.signal_rounds
+                if self.signal_directory is not None:
+                    self.directory = self.signal_directory
+            profiled = self.remaining_rounds > 0
+            if profiled:
+                self.remaining_rounds -= 1
+        if signaled:
+            print(f"{ANSI.YELLOW.value}Profiling the next {self.signal_rounds} rounds into {self.directory}"
+                  f"{ANSI.RESET.value}")
+        return profiled
+
+    def start(self):
+        """
+        Starts profiling the current thread.
+
+        Returns:
+            cProfile.Profile: The running profile, None if a profile is already running on the thread or another
+            profiler is active.
+        """
+        if getattr(self.local, 'active', False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        self.local.active = True
+        return profile
+
+    def stop(self, profile, kind):
+        """
+        Stops a profile, writing it if it profiled a round or keeping it for the next round otherwise.
+
+        Args:
+            profile (cProfile.Profile): The running profile.
+            kind (str): The name of the profiled function.
+        """
+        profile.disable()
+        self.local.active = False
+        with self.lock:
+            if kind != 'play_round':
+                stats = self.pending.get(kind)
+                if stats is None:
+                    self.pending[kind] = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+                return
+            pending, self.pending = self.pending, {}
+            number = next(self.sequence)
+        os.makedirs(self.directory, exist_ok=True)
+        self.write(pstats.Stats(profile), f"round-{os.getpid()}-{number}")
+        for pending_kind, stats in pending.items():
+            self.write(stats, f"{pending_kind}-{os.getpid()}-{number}")
+
+    def write(self, stats, name):
+        """
+        Writes a profile as a pstats file and as a text summary.
+
+        Args:
+            stats (pstats.Stats): The profile.
+            name (str): The name of the files, without extension.
+        """
+        path = os.path.join(self.directory, name)
+        stats.dump_stats(f"{path}.prof")
+        with open(f"{path}.txt", 'w') as summary:
+            stats.stream = summary
+            stats.sort_stats('cumulative').print_stats(40)
+
+
+profiler = RoundProfiler()
+
+
+def profiled(kind):
+    """
+    Decorates a function or a coroutine function to be profiled while the profiler is armed.
+
+    Args:
+        kind (str): The name of the profiled function, every call of 'play_round' counts as a profiled round.
+
+    Returns:
+        callable: The decorator.
+    """
+    def is_profiled():
+        return profiler.take_round() if kind == 'play_round' else profiler.remaining_rounds > 0
+
+    def decorate(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def profiled_coroutine(*args, **kwargs):
+                profile = profiler.start() if is_profiled() else None
+                if profile is None:
+                    return await function(*args, **kwargs)
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    profiler.stop(profile, kind)
+            return profiled_coroutine
+
+        @functools.wraps(function)
+        def profiled_function(*args, **kwargs):
+            profile = profiler.start() if is_profiled() else None
+            if profile is None:
+                return function(*args, **kwargs)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.stop(profile, kind)
+        return profiled_function
+    return decorate
+
+
+def install_profiling_signal(rounds, directory=None):
+    """
+    Arm the profiler for the next rounds whenever the process receives SIGUSR1.
+
+    Args:
+        rounds (int): How many rounds to profile on every signal.
+        directory (str): The directory to write the profiles to.
+    """
+    if not hasattr(signal, 'SIGUSR1') or threading.current_thread() is not threading.main_thread():
+        return
+    profiler.signal_rounds = rounds
+    profiler.signal_directory = directory
+    signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.request())
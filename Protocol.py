@@ -0,0 +1,319 @@
+import struct
+from enum import IntEnum
+
+PROTOCOL_VERSION = 2
+FRAME_HEADER = struct.Struct('!BI')
+QUESTION_ID = struct.Struct('!I')
+MAX_FRAME_SIZE = 1 << 20
+OFFER_PORT = struct.Struct('!H')
+# Players, player capacity, rooms, maximum rooms and open seats, appended to the legacy offer by extended offers
+OFFER_LOAD = struct.Struct('!HHHHH')
+OFFER_UNBOUNDED = 0xFFFF
+
+
+class MessageKind(IntEnum):
+    """
+    Enum representing the kinds of framed messages of protocol v2.
+
+    HELLO is 0xFE on purpose, it is never the first byte of a UTF-8 string so the server can tell a v2 client
+    apart from a v1 client that sends its bare name. NEXT_GAME follows GAME_OVER when the server keeps the
+    connection for its next game, a client that does not want to play it answers with LEAVE.
+    """
+
+    TEXT = 1
+    WELCOME = 2
+    QUESTION = 3
+    ROUND_RESULT = 4
+    LOSER = 5
+    GAME_OVER = 6
+    ANSWER = 7
+    NEXT_GAME = 8
+    LEAVE = 9
+    HELLO = 0xFE
+
+
+def encode_frame(kind, payload):
+    """
+    Encode a single frame.
+
+    Args:
+        kind (MessageKind): The kind of the message.
+        payload (bytes): The body of the message.
+
+    Returns:
+        bytes: The header followed by the payload.
+    """
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_message(version, kind, text, question_id=0):
+    """
+    Encode a server message for a client speaking the given protocol version.
+
+    Args:
+        version (int): The protocol version of the client.
+        kind (MessageKind): The kind of the message.
+        text (str): The text of the message.
+        question_id (int): The id of the question, only used for QUESTION messages.
+
+    Returns:
+        bytes: The raw text for v1 clients, a frame for v2 clients.
+    """
+    return encode_payload(version, kind, text.encode(), question_id)
+
+
+def encode_payload(version, kind, payload, question_id=0):
+    """
+    Encode an already UTF-8 encoded server message for a client speaking the given protocol version.
+
+    Args:
+        version (int): The protocol version of the client.
+        kind (MessageKind): The kind of the message.
+        payload (bytes): The encoded text of the message.
+        question_id (int): The id of the question, only used for QUESTION messages.
+
+    Returns:
+        bytes: The payload itself for v1 clients, a frame for v2 clients.
+    """
+    if version < 2:
+        return payload
+    if kind == MessageKind.QUESTION:
+        payload = QUESTION_ID.pack(question_id) + payload
+    return encode_frame(kind, payload)
+
+
+def encode_hello(name, version=PROTOCOL_VERSION):
+    """
+    Encode the first message of a v2 client, announcing its protocol version and its name.
+
+    Args:
+        name (str): The name of the player.
+        version (int): The highest protocol version the client speaks.
+
+    Returns:
+        bytes: The hello frame.
+    """
+    return encode_frame(MessageKind.HELLO, bytes([version]) + name.encode())
+
+
+def encode_answer(question_id, answer):
+    """
+    Encode the answer of a client to a question.
+
+    Args:
+        question_id (int): The id of the question being answered.
+        answer (str): The answer.
+
+    Returns:
+        bytes: The answer frame.
+    """
+    return encode_frame(MessageKind.ANSWER, QUESTION_ID.pack(question_id) + answer.encode())
+
+
+def split_question_id(payload):
+    """
+    Split the payload of a QUESTION or ANSWER message.
+
+    Args:
+        payload (bytes): The payload of the message.
+
+    Returns:
+        tuple: The question id and the decoded text.
+    """
+    (question_id,) = QUESTION_ID.unpack_from(payload)
+    return question_id, payload[QUESTION_ID.size:].decode()
+
+
+def parse_hello(data):
+    """
+    Check whether the first bytes of a connection start a v2 hello.
+
+    Args:
+        data (bytes): The first bytes received from the client.
+
+    Returns:
+        bool: True if the client speaks the framed protocol, False for a v1 client.
+    """
+    return len(data) > 0 and data[0] == MessageKind.HELLO
+
+
+def read_hello_payload(payload):
+    """
+    Read the payload of a hello message.
+
+    Args:
+        payload (bytes): The payload of the hello frame.
+
+    Returns:
+        tuple: The negotiated protocol version and the player name.
+    """
+    return min(payload[0], PROTOCOL_VERSION), payload[1:].decode().strip()
+
+
+def receive_hello(client_socket):
+    """
+    Receive the first message of a client over a blocking socket and negotiate the protocol version.
+
+    Args:
+        client_socket (socket.socket): The client socket.
+
+    Returns:
+        tuple: The protocol version, the player name and the decoder holding any bytes received after the hello
+        (None for v1 clients).
+
+    Raises:
+        ConnectionError: If the client disconnected before finishing its hello.
+    """
+    data = client_socket.recv(1024)
+    if not parse_hello(data):
+        return 1, data.decode().strip(), None
+    decoder = FrameDecoder()
+    decoder.feed(data)
+    frame = decoder.next_frame()
+    while frame is None:
+        data = client_socket.recv(1024)
+        if not data:
+            raise ConnectionError("client disconnected during hello")
+        decoder.feed(data)
+        frame = decoder.next_frame()
+    version, name = read_hello_payload(frame[1])
+    return version, name, decoder
+
+
+async def receive_hello_async(reader):
+    """
+    Receive the first message of a client over an asyncio stream and negotiate the protocol version.
+
+    Args:
+        reader (asyncio.StreamReader): The client stream reader.
+
+    Returns:
+        tuple: The protocol version, the player name and the decoder (None for v1 clients).
+    """
+    data = await reader.read(1024)
+    if not parse_hello(data):
+        return 1, data.decode().strip(), None
+    decoder = FrameDecoder()
+    decoder.feed(data)
+    frame = await read_frame_async(reader, decoder)
+    version, name = read_hello_payload(frame[1])
+    return version, name, decoder
+
+
+async def read_frame_async(reader, decoder):
+    """
+    Read the next complete frame from an asyncio stream.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+        decoder (FrameDecoder): The decoder buffering the stream.
+
+    Returns:
+        tuple: The kind and the payload of the frame.
+
+    Raises:
+        ConnectionError: If the stream was closed before a full frame arrived.
+    """
+    frame = decoder.next_frame()
+    while frame is None:
+        data = await reader.read(4096)
+        if not data:
+            raise ConnectionError("connection closed")
+        decoder.feed(data)
+        frame = decoder.next_frame()
+    return frame
+
+
+class FrameDecoder:
+    """
+    Incremental decoder turning a byte stream into frames.
+
+    Bytes are buffered until a whole frame is available, so coalesced and split TCP segments are both handled.
+
+    Attributes:
+        buffer (bytearray): The bytes received and not yet decoded.
+    """
+
+    def __init__(self):
+        """
+        Initializes the FrameDecoder with an empty buffer.
+        """
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """
+        Add received bytes to the buffer.
+
+        Args:
+            data (bytes): The received bytes.
+        """
+        self.buffer += data
+
+    def next_frame(self):
+        """
+        Pop the next complete frame from the buffer.
+
+        Returns:
+            tuple: The kind and the payload of the frame, or None if no complete frame was received yet.
+
+        Raises:
+            ValueError: If the peer announced a frame bigger than MAX_FRAME_SIZE.
+        """
+        if len(self.buffer) < FRAME_HEADER.size:
+            return None
+        kind, length = FRAME_HEADER.unpack_from(self.buffer)
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"frame of {length} bytes is too big")
+        end = FRAME_HEADER.size + length
+        if len(self.buffer) < end:
+            return None
+        payload = bytes(self.buffer[FRAME_HEADER.size:end])
+        del self.buffer[:end]
+        return kind, payload
+
+    def frames(self):
+        """
+        Pop every complete frame from the buffer.
+
+        Yields:
+            tuple: The kind and the payload of each frame.
+        """
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
+
+
+def parse_offer(message, offer_prefix):
+    """
+    Parse an offer message from the server, legacy or extended.
+
+    Args:
+        message (bytes): The offer message received from the server.
+        offer_prefix (bytes): The packed magic cookie, message type and server name the offer must start with.
+
+    Returns:
+        int: The TCP port of the server, None if the message is not a valid offer of this game.
+    """
+    # The magic cookie, the message type and the server name are compared at once with the pre-packed prefix
+    legacy_size = len(offer_prefix) + OFFER_PORT.size
+    if len(message) not in (legacy_size, legacy_size + OFFER_LOAD.size) or not message.startswith(offer_prefix):
+        return None
+    return OFFER_PORT.unpack_from(message, len(offer_prefix))[0]
+
+
+def parse_offer_load(message, offer_prefix):
+    """
+    Parse the load carried by an extended offer message.
+
+    Args:
+        message (bytes): A valid offer message, see parse_offer.
+        offer_prefix (bytes): The packed magic cookie, message type and server name the offer starts with.
+
+    Returns:
+        tuple: The number of players, the player capacity (0 when unbounded), the number of rooms, the maximum
+        number of rooms and how many players can still join, None for a legacy offer.
+    """
+    if len(message) != len(offer_prefix) + OFFER_PORT.size + OFFER_LOAD.size:
+        return None
+    return OFFER_LOAD.unpack_from(message, len(offer_prefix) + OFFER_PORT.size)
@@ -0,0 +1,337 @@
+import array
+import csv
+import json
+import mmap
+import os
+import random
+import struct
+
+INDEX_HEADER = struct.Struct('=QQ')  # size and modification time of the indexed question file
+TRUE_VALUES = {"true", "t", "yes", "y", "1"}
+
+
+def assign_question_ids(questions):
+    """
+    Gives every question a stable id the first time it is seen, the id is sent along with the question text.
+
+    Args:
+        questions (list): List of questions.
+    """
+    for question_id, question in enumerate(questions):
+        question.setdefault('id', question_id)
+
+
+def get_file_signature(path):
+    """
+    Get the size and the modification time of a question file, which change whenever the file is modified.
+
+    Args:
+        path (str): The path to the question file.
+
+    Returns:
+        tuple: The size and the modification time in nanoseconds, None if the file can not be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def parse_csv_question(line, columns, line_number):
+    """
+    Parses a line of a CSV question file.
+
+    Args:
+        line (bytes): The line.
+        columns (list): The column names, read from the header of the file.
+        line_number (int): The number of the question in the file, used as its id when it has none.
+
+    Returns:
+        dict: The question.
+    """
+    values = next(csv.reader([line.decode().strip()]))
+    question = dict(zip(columns, values))
+    question['id'] = int(question['id']) if question.get('id') else line_number
+    question['is_true'] = question['is_true'].strip().lower() in TRUE_VALUES
+    return question
+
+
+def parse_jsonl_question(line, line_number):
+    """
+    Parses a line of a JSON lines question file.
+
+    Args:
+        line (bytes): The line.
+        line_number (int): The number of the question in the file, used as its id when it has none.
+
+    Returns:
+        dict: The question.
+    """
+    question = json.loads(line)
+    question.setdefault('id', line_number)
+    return question
+
+
+class QuestionBank:
+    """
+    Class holding the questions the games are played with, either the questions of the config file or a large
+    JSON lines / CSV file read on demand.
+
+    A question file holds one question per line and is never loaded whole: it is scanned once to index the offset
+    of every line, the index is saved next to the file and memory-mapped by the following processes, and a question
+    is only read and parsed when a game asks for it. Questions may have a category and a difficulty, the bank can be
+    restricted to some of them: a question of another category or difficulty is skipped when a game draws it, so
+    opening the bank never reads the questions. Every game gets its own random order of the questions, the bank itself
+    is never shuffled.
+
+    Attributes:
+        questions (list): The questions of the config file, None when the questions are read from a file.
+        path (str): The path to the question file, None for the questions of the config file.
+        columns (list): The column names of a CSV question file, None otherwise.
+        offsets (memoryview or array.array): The offset of every line of the question file, followed by the size
+            of the file.
+        categories (set): The categories of the questions asked, all of them when empty.
+        difficulties (set): The difficulties of the questions asked, all of them when empty.
+        signature (tuple): The size and modification time of the question file when it was opened, None for the
+            questions of the config file.
+    """
+
+    def __init__(self, questions=None, path=None, categories=None, difficulties=None, use_index_file=True):
+        """
+        Initializes the QuestionBank.
+
+        Args:
+            questions (list): The questions of the config file, used when no path is given.
+            path (str): The path to a .jsonl or .csv question file.
+            categories (list): Only the questions of these categories are used, all of them when empty.
+            difficulties (list): Only the questions of these difficulties are used, all of them when empty.
+            use_index_file (bool): Whether to save the offsets index next to the question file and memory-map it.
+        """
+        self.questions = None
+        self.path = path
+        self.columns = None
+        self.offsets = None
+        self.categories = set(categories or ())
+        self.difficulties = set(difficulties or ())
+        self.signature = None
+        self.file = None
+        self.index_map = None
+        if path is None:
+            # the questions of the config file are shared by the whole process, the ids are given to copies
+            self.questions = [dict(question) for question in questions or ()]
+            assign_question_ids(self.questions)
+        else:
+            self.file = open(path, 'rb')
+            self.offsets = self.load_index(use_index_file)
+            if path.endswith('.csv'):
+                self.columns = next(csv.reader([self.read_line(0).decode().strip()]))
+
+    def load_index(self, use_index_file):
+        """
+        Gets the offsets of the lines of the question file, from the index file when it is up to date.
+
+        Args:
+            use_index_file (bool): Whether to read and write the index file.
+
+        Returns:
+            memoryview or array.array: The offset of every line, followed by the size of the file.
+        """
+        stat = os.stat(self.path)
+        self.signature = stat.st_size, stat.st_mtime_ns
+        header = INDEX_HEADER.pack(*self.signature)
+        index_path = self.path + '.idx'
+        if use_index_file and os.path.exists(index_path):
+            with open(index_path, 'rb') as index_file:
+                index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if index_map[:INDEX_HEADER.size] == header:
+                self.index_map = index_map
+                return memoryview(index_map)[INDEX_HEADER.size:].cast('Q')
+            index_map.close()
+        offsets = self.build_index()
+        if use_index_file:
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as index_file:
+                index_file.write(header)
+                offsets.tofile(index_file)
+            os.replace(temp_path, index_path)
+        return offsets
+
+    def build_index(self):
+        """
+        Scans the question file once, recording the offset of every non-empty line.
+
+        Returns:
+            array.array: The offset of every line, followed by the size of the file.
+        """
+        offsets = array.array('Q')
+        position = 0
+        self.file.seek(0)
+        for line in self.file:
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+        offsets.append(position)
+        return offsets
+
+    def read_line(self, line_number):
+        """
+        Reads a line of the question file, without moving a shared file position.
+
+        Args:
+            line_number (int): The number of the line, the header of a CSV file is line 0.
+
+        Returns:
+            bytes: The line.
+        """
+        start = self.offsets[line_number]
+        return os.pread(self.file.fileno(), self.offsets[line_number + 1] - start, start)
+
+    def count(self):
+        """
+        Counts the questions, before the categories and difficulties are applied.
+
+        Returns:
+            int: The number of questions.
+        """
+        if self.questions is not None:
+            return len(self.questions)
+        return len(self.offsets) - 1 - (self.columns is not None)
+
+    def load(self, number):
+        """
+        Reads and parses a question, before the categories and difficulties are applied.
+
+        Args:
+            number (int): The number of the question.
+
+        Returns:
+            dict: The question.
+        """
+        if self.questions is not None:
+            return self.questions[number]
+        if self.columns is not None:
+            return parse_csv_question(self.read_line(number + 1), self.columns, number + 1)
+        return parse_jsonl_question(self.read_line(number), number + 1)
+
+    def matches(self, question):
+        """
+        Checks whether a question is of the categories and difficulties the bank is restricted to.
+
+        Args:
+            question (dict): The question.
+
+        Returns:
+            bool: True if the question can be asked.
+        """
+        if self.categories and question.get('category') not in self.categories:
+            return False
+        return not self.difficulties or question.get('difficulty') in self.difficulties
+
+    def __len__(self):
+        return self.count()
+
+    def is_modified(self):
+        """
+        Checks whether the question file changed since the bank was opened.
+
+        Returns:
+            bool: True if the question file was modified or removed, always False for the questions of the config
+            file.
+        """
+        return self.path is not None and get_file_signature(self.path) != self.signature
+
+    def validate(self):
+        """
+        Checks every question of the bank can be asked, reading the question file in one streaming pass.
+
+        Raises:
+            ValueError: If no question is of the chosen categories and difficulties, or a question has no text or no
+                boolean answer.
+        """
+        matching = 0
+        for number in range(self.count()):
+            try:
+                question = self.load(number)
+            except (AttributeError, KeyError, TypeError, UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"question {number + 1} can not be parsed: {e}") from e
+            if not isinstance(question, dict) or not isinstance(question.get('question'), str) or \
+                    not isinstance(question.get('is_true'), bool):
+                raise ValueError(f"question {number + 1} needs a question text and a true or false is_true")
+            matching += self.matches(question)
+        if matching == 0:
+            raise ValueError("there are no questions to ask")
+
+    def sample(self, rng=random):
+        """
+        Gets the questions of a game, in a random order of its own.
+
+        Args:
+            rng (random.Random): The random generator choosing the order.
+
+        Returns:
+            QuestionSample: The questions of the game.
+        """
+        return QuestionSample(self, rng)
+
+    def close(self):
+        """
+        Closes the question file and its index.
+        """
+        if self.file is not None:
+            if self.index_map is not None:
+                self.offsets.release()
+                self.index_map.close()
+            self.offsets = None
+            self.file.close()
+
+
+class QuestionSample:
+    """
+    Class handing the questions of a bank to a game in a random order, without copying or shuffling the bank.
+
+    The questions are drawn one at a time and only the drawn indexes are remembered, so a game over a bank of a
+    million questions costs memory for the rounds it plays, not for the whole bank. A drawn question of another
+    category or difficulty is skipped, so a game may run out of questions before it drew len(bank) of them.
+
+    Attributes:
+        bank (QuestionBank): The bank the questions are drawn from.
+        rng (random.Random): The random generator choosing the order.
+    """
+
+    def __init__(self, bank, rng):
+        """
+        Initializes the QuestionSample.
+
+        Args:
+            bank (QuestionBank): The bank the questions are drawn from.
+            rng (random.Random): The random generator choosing the order.
+        """
+        self.bank = bank
+        self.rng = rng
+
+    def __iter__(self):
+        size = self.bank.count()
+        drawn = set()
+        while len(drawn) < size:
+            number = self.rng.randrange(size)
+            if number in drawn:
+                continue
+            drawn.add(number)
+            question = self.bank.load(number)
+            if self.bank.matches(question):
+                yield question
+
+
+def open_question_bank(config):
+    """
+    Open the question bank chosen in the config file.
+
+    Args:
+        config (Config): The configuration of the game.
+
+    Returns:
+        QuestionBank: The questions of the file given by question_bank, or the questions of the config file.
+    """
+    return QuestionBank(config.get('questions'), config.get('question_bank'), config.get('question_categories'),
+                        config.get('question_difficulties'), config.get('question_bank_index', True))
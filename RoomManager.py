@@ -0,0 +1,278 @@
+import socket
+import threading
+import time
+from Colors import ANSI
+from GameEngine import GameEngine
+from Metrics import JOIN_LATENCY, registry
+from PlayerManager import PlayerManager
+from Profiler import profiled
+from Protocol import MessageKind, encode_message
+
+
+class Room(threading.Thread):
+    """
+    Class representing a game room, a lobby that becomes a game played on its own thread.
+
+    Attributes:
+        room_id (int): The id of the room.
+        player_manager (PlayerManager): The players of the room.
+        game_engine (GameEngine): The engine playing the game of the room.
+        game_statistics (GameStatistics): The statistics shared by all the rooms.
+        max_players (int): The maximum number of players in the room.
+        last_join (float): The time the last player joined the room.
+        sockets (list): The sockets of every player that joined the room, closed once the game is over.
+        playing (bool): True once the game of the room started.
+    """
+
+    def __init__(self, room_id, server, max_players):
+        """
+        Initializes the Room.
+
+        Args:
+            room_id (int): The id of the room.
+            server (Server.Server): The server hosting the room.
+            max_players (int): The maximum number of players in the room.
+        """
+        super().__init__(name=f'room-{room_id}', daemon=True)
+        self.room_id = room_id
+        self.player_manager = PlayerManager()
+        self.game_engine = server.create_game_engine(self.player_manager, GameEngine, server.room_pacing)
+        self.game_statistics = server.game_statistics
+        self.max_players = max_players
+        self.last_join = time.time()
+        self.sockets = []
+        self.playing = False
+
+    def is_full(self):
+        """
+        Checks if the room reached its player limit.
+
+        Returns:
+            bool: True if no more players can join the room.
+        """
+        return self.player_manager.count_players() >= self.max_players
+
+    def is_ready(self, lobby_timeout):
+        """
+        Checks if the game of the room should start.
+
+        Args:
+            lobby_timeout (float): How many seconds to wait for another player before starting.
+
+        Returns:
+            bool: True if the room has players and is full or nobody joined for lobby_timeout seconds.
+        """
+        if self.player_manager.count_players() == 0:
+            return False
+        return self.is_full() or time.time() - self.last_join > lobby_timeout
+
+    def run(self):
+        """
+        Plays the game of the room and closes the players' connections once it is over.
+        """
+        print(f"{ANSI.CYAN.value}Room {self.room_id} is starting with "
+              f"{self.player_manager.count_players()} players{ANSI.RESET.value}")
+        try:
+            self.game_statistics.update_game()
+            self.game_engine.play_game(None)
+        except Exception as e:
+            print(f"{ANSI.RED.value}Room {self.room_id} stopped because of an error: {e}{ANSI.RESET.value}")
+        finally:
+            for player_socket in self.sockets:
+                player_socket.close()
+            print(f"{ANSI.CYAN.value}Room {self.room_id} is over{ANSI.RESET.value}")
+
+
+class RoomManager:
+    """
+    Class hosting many game rooms behind a single listening socket.
+
+    Joining players are put in the room currently filling up. Once that room is full, or nobody joined it for
+    lobby_timeout seconds, its game starts on its own thread and the next joiner opens a new room.
+
+    Attributes:
+        server (Server.Server): The server hosting the rooms.
+        max_rooms (int): The maximum number of rooms filling up or playing at once.
+        max_players_per_room (int): The maximum number of players in a room.
+        lobby_timeout (float): How many seconds a room waits for another player before its game starts.
+        rooms (list): The rooms filling up or playing.
+        filling_room (Room): The room new players join, None when a new room has to be opened.
+        lock (threading.Lock): Lock object for synchronizing the assignment of players to rooms.
+        running (threading.Event): Set while the rooms are hosted.
+        reuse_port (bool): Whether the listening socket is shared with other processes through SO_REUSEPORT.
+        broadcast (bool): Whether this manager broadcasts the offers itself.
+        report_health (callable): Called with the number of rooms and players whenever the rooms are updated.
+    """
+
+    def __init__(self, server, max_rooms, max_players_per_room, lobby_timeout=10, reuse_port=False, broadcast=True,
+                 report_health=None):
+        """
+        Initializes the RoomManager.
+
+        Args:
+            server (Server.Server): The server hosting the rooms.
+            max_rooms (int): The maximum number of rooms filling up or playing at once.
+            max_players_per_room (int): The maximum number of players in a room.
+            lobby_timeout (float): How many seconds a room waits for another player before its game starts.
+            reuse_port (bool): Whether the listening socket is shared with other processes through SO_REUSEPORT.
+            broadcast (bool): Whether this manager broadcasts the offers itself.
+            report_health (callable): Called with the number of rooms and players whenever the rooms are updated.
+        """
+        self.server = server
+        self.max_rooms = max_rooms
+        self.max_players_per_room = max_players_per_room
+        self.lobby_timeout = lobby_timeout
+        self.rooms = []
+        self.filling_room = None
+        self.next_room_id = 1
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.reuse_port = reuse_port
+        self.broadcast = broadcast
+        self.report_health = report_health
+
+    def broadcast_offers(self, udp_socket):
+        """
+        Broadcast offer messages every second for as long as the rooms are hosted.
+
+        Args:
+            udp_socket (socket.socket): The UDP socket used for broadcasting.
+        """
+        brod_ip = self.server.get_broadcast_address()
+        while self.running.is_set():
+            try:
+                self.server.send_offers(udp_socket, brod_ip, self.get_offer_load())
+            except OSError as e:
+                print("Error:", e)
+            time.sleep(1)
+        udp_socket.close()
+
+    def get_offer_load(self):
+        """
+        Get the load of the rooms advertised in the extended offers.
+
+        Returns:
+            tuple: The number of players, the player capacity, the number of rooms, the maximum number of rooms and
+            how many players can still join, in the filling room or in the rooms not opened yet.
+        """
+        with self.lock:
+            players = sum(room.player_manager.count_players() for room in self.rooms)
+            open_seats = (self.max_rooms - len(self.rooms)) * self.max_players_per_room
+            if self.filling_room is not None:
+                open_seats += self.max_players_per_room - self.filling_room.player_manager.count_players()
+            return (players, self.max_rooms * self.max_players_per_room, len(self.rooms), self.max_rooms,
+                    max(open_seats, 0))
+
+    @profiled('handle_client')
+    def handle_client(self, client_socket, address):
+        """
+        Receive a new player and put it in the room filling up.
+
+        Args:
+            client_socket (socket.socket): The client socket.
+            address (tuple): The client address.
+        """
+        accepted_at = time.perf_counter()
+        try:
+            player = self.server.receive_player(client_socket)
+            # Nothing is sent under the lock, a slow client must not stall the other joins
+            with self.lock:
+                room = self.get_filling_room()
+                if room is not None:
+                    name_changed = self.server.join_player(room.player_manager, player, address)
+                    room.sockets.append(client_socket)
+                    room.last_join = time.time()
+            if room is None:
+                msg = f"{ANSI.RED.value}All the game rooms are full, try again later{ANSI.RESET.value}"
+                client_socket.sendall(encode_message(player.get_protocol_version(), MessageKind.GAME_OVER, msg))
+                client_socket.close()
+                return
+            if name_changed:
+                self.server.notify_name_change(player)
+            print(f"Player {player.get_name()} joined room {room.room_id}")
+            JOIN_LATENCY.observe(time.perf_counter() - accepted_at)
+        except Exception as e:
+            print(f"Error handling client: {e}")
+
+    def get_filling_room(self):
+        """
+        Gets the room new players join, opening a new room if needed.
+
+        Returns:
+            Room: The room filling up, or None if the maximum number of rooms is reached.
+        """
+        if self.filling_room is not None and not self.filling_room.is_full():
+            return self.filling_room
+        self.start_filling_room()
+        if len(self.rooms) >= self.max_rooms:
+            return None
+        self.filling_room = Room(self.next_room_id, self.server, self.max_players_per_room)
+        self.next_room_id += 1
+        self.rooms.append(self.filling_room)
+        return self.filling_room
+
+    def start_filling_room(self):
+        """
+        Starts the game of the filling room, the next joiner opens a new room.
+        """
+        room = self.filling_room
+        if room is None or room.player_manager.count_players() == 0:
+            return
+        self.filling_room = None
+        room.playing = True
+        room.start()
+
+    def update_rooms(self):
+        """
+        Starts the filling room if it is ready and forgets the rooms whose game is over.
+        """
+        with self.lock:
+            if self.filling_room is not None and self.filling_room.is_ready(self.lobby_timeout):
+                self.start_filling_room()
+            self.rooms = [room for room in self.rooms if not room.playing or room.is_alive()]
+            if self.report_health is not None:
+                players = sum(room.player_manager.count_players() for room in self.rooms)
+                self.report_health(len(self.rooms), players)
+
+    def run(self):
+        """
+        Hosts the rooms until stop is called, accepting players on a single TCP socket.
+        """
+        self.running.set()
+        registry.set_gauge("trivia_rooms", "Number of rooms filling up or playing.", lambda: len(self.rooms))
+        registry.set_gauge("trivia_players", "Number of connected players.",
+                           lambda: sum(room.player_manager.count_players() for room in self.rooms))
+        registry.set_gauge("trivia_active_players", "Number of players still in the games.",
+                           lambda: sum(room.player_manager.count_active_players() for room in self.rooms))
+        if self.broadcast:
+            udp_socket = self.server.get_udp_socket()
+            threading.Thread(target=self.broadcast_offers, args=(udp_socket,), daemon=True).start()
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp_socket:
+            tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            tcp_socket.bind((self.server.ip_address, self.server.tcp_port))
+            tcp_socket.listen()
+            tcp_socket.settimeout(1)
+            print(f"Hosting up to {self.max_rooms} rooms of {self.max_players_per_room} players on IP address "
+                  f"{self.server.ip_address}, port {self.server.tcp_port}")
+            while self.running.is_set():
+                self.update_rooms()
+                try:
+                    client_socket, address = tcp_socket.accept()
+                except socket.timeout:
+                    continue
+                client_socket.settimeout(None)
+                threading.Thread(target=self.handle_client, args=(client_socket, address), daemon=True).start()
+
+    def stop(self):
+        """
+        Stops accepting players and waits for the games being played to finish.
+        """
+        self.running.clear()
+        with self.lock:
+            if self.filling_room is not None:
+                self.start_filling_room()
+            rooms = [room for room in self.rooms if room.playing]
+        for room in rooms:
+            room.join()
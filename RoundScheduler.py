@@ -0,0 +1,66 @@
+class RoundScheduler:
+    """
+    Class pacing the rounds of a game and preparing every question one round ahead.
+
+    The next question is drawn from the bank and its body encoded right after the current question is sent, while
+    the players are still thinking, so reading a question file never delays the start of a round. The answer window
+    closes as soon as every active player answered, the answer timeout only bounds the wait for slow players.
+
+    Attributes:
+        welcome_delay (float): How many seconds to wait after the welcome message before the first round.
+        round_delay (float): How many seconds to wait between two rounds, for the players to read the results.
+        answer_timeout (float): How many seconds the players have to answer.
+        questions (iterator): The questions of the game not drawn yet.
+        message_cache (MessageCache): The cache the question bodies are encoded in.
+        next_question (dict): The question of the next round, None once the questions ran out.
+    """
+
+    def __init__(self, welcome_delay_ms=1000, round_delay_ms=1500, answer_timeout_ms=10000):
+        """
+        Initializes the RoundScheduler.
+
+        Args:
+            welcome_delay_ms (float): How many milliseconds to wait after the welcome message.
+            round_delay_ms (float): How many milliseconds to wait between two rounds.
+            answer_timeout_ms (float): How many milliseconds the players have to answer.
+        """
+        self.welcome_delay = welcome_delay_ms / 1000
+        self.round_delay = round_delay_ms / 1000
+        self.answer_timeout = answer_timeout_ms / 1000
+        self.questions = iter(())
+        self.message_cache = None
+        self.next_question = None
+
+    def start(self, questions, message_cache):
+        """
+        Starts a game, preparing its first question.
+
+        Args:
+            questions (iterable): The questions of the game, in the order they are asked.
+            message_cache (MessageCache): The cache the question bodies are encoded in.
+        """
+        self.questions = iter(questions)
+        self.message_cache = message_cache
+        self.next_question = None
+        self.prepare_next()
+
+    def prepare_next(self):
+        """
+        Draws the question of the next round and encodes its body, if it is not prepared yet.
+        """
+        if self.next_question is not None:
+            return
+        self.next_question = next(self.questions, None)
+        if self.next_question is not None:
+            self.message_cache.get_question_body(self.next_question)
+
+    def take_question(self):
+        """
+        Takes the prepared question of the next round.
+
+        Returns:
+            dict: The question, None if the game ran out of questions.
+        """
+        self.prepare_next()
+        question, self.next_question = self.next_question, None
+        return question
@@ -0,0 +1,418 @@
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from Config import get_config
+from JsonReader import JSONReader
+from Metrics import STATISTICS_PERSISTENCE
+
+PLAYER_COUNTERS = ("games_played", "games_won", "correct_answers", "incorrect_answers")
+QUESTION_COUNTERS = ("correct_answers", "incorrect_answers", "times_appeared")
+CORRECT_RATIO = "(correct_answers * 1.0 / (correct_answers + incorrect_answers))"  # NULL when nothing was answered
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    games_played INTEGER NOT NULL DEFAULT 0,
+    games_won INTEGER NOT NULL DEFAULT 0,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    incorrect_answers INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS questions (
+    question TEXT PRIMARY KEY,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    incorrect_answers INTEGER NOT NULL DEFAULT 0,
+    times_appeared INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    played_at REAL
+);
+CREATE INDEX IF NOT EXISTS players_games_won ON players (games_won);
+CREATE INDEX IF NOT EXISTS questions_correct_answers ON questions (correct_answers);
+CREATE INDEX IF NOT EXISTS questions_incorrect_answers ON questions (incorrect_answers);
+CREATE INDEX IF NOT EXISTS players_correct_ratio ON players (
+    (correct_answers * 1.0 / (correct_answers + incorrect_answers)));
+CREATE INDEX IF NOT EXISTS questions_correct_ratio ON questions (
+    (correct_answers * 1.0 / (correct_answers + incorrect_answers)));
+"""
+
+
+class SQLiteStatistics:
+    """
+    Game statistics stored in a SQLite database, with the same API as GameStatistics.
+
+    Every update is a single row upsert or increment instead of a rewrite of the whole history, and the trivia
+    king and the most (in)correctly answered questions are read through indexes.
+
+    Attributes:
+        db_path (str): The path to the SQLite database.
+        connection (sqlite3.Connection): The connection shared by the games running concurrently.
+        lock (threading.RLock): Lock object for synchronizing access to the connection.
+    """
+
+    def __init__(self, db_path="statistics.db"):
+        """
+        Opens the statistics database, creating the tables and the questions of the config file if needed.
+
+        Args:
+            db_path (str): The path to the SQLite database.
+        """
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+        self.load_statistics()
+
+    def load_statistics(self):
+        """
+        Adds the questions of the config file that are not in the database yet.
+        """
+        questions = get_config().get("questions", [])
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO questions (question) VALUES (?)",
+                                        [(question["question"],) for question in questions])
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a write in a transaction committed when it ends, timing the write.
+
+        Yields:
+            sqlite3.Connection: The connection to write with.
+        """
+        started_at = time.perf_counter()
+        with self.lock, self.connection:
+            yield self.connection
+        STATISTICS_PERSISTENCE.observe(time.perf_counter() - started_at)
+
+    def add_player(self, player):
+        """
+        Adds a player to the statistics or updates existing player's data.
+
+        Args:
+            player: An instance of the Player class representing the player to be added.
+        """
+        with self.transaction():
+            self.connection.execute("INSERT INTO players (name, games_played) VALUES (?, 1) "
+                                    "ON CONFLICT (name) DO UPDATE SET games_played = games_played + 1",
+                                    (player.get_name(),))
+
+    def update_player(self, player, key):
+        """
+        Updates the statistics for a player.
+
+        Args:
+            player: An instance of the Player class representing the player to be updated.
+            key: The key specifying the statistic to be updated (e.g., "games_won", "correct_answers").
+        """
+        if key not in PLAYER_COUNTERS:
+            raise ValueError(f"unknown player statistic {key}")
+        with self.transaction():
+            self.connection.execute(f"UPDATE players SET {key} = {key} + 1 WHERE name = ?", (player.get_name(),))
+
+    def update_game(self):
+        """
+        Updates the total number of games played.
+        """
+        with self.transaction():
+            self.connection.execute("INSERT INTO games (played_at) VALUES (julianday('now'))")
+
+    def update_question(self, question, correct, incorrect):
+        """
+        Updates statistics for a specific trivia question.
+
+        Args:
+            question: The trivia question to be updated.
+            correct: Number of correct answers.
+            incorrect: Number of incorrect answers.
+        """
+        with self.transaction():
+            self.connection.execute("INSERT INTO questions (question, correct_answers, incorrect_answers, times_appeared) "
+                                    "VALUES (?, ?, ?, 1) ON CONFLICT (question) DO UPDATE SET "
+                                    "correct_answers = correct_answers + excluded.correct_answers, "
+                                    "incorrect_answers = incorrect_answers + excluded.incorrect_answers, "
+                                    "times_appeared = times_appeared + 1", (question, correct, incorrect))
+
+    def reload_statistics(self):
+        """
+        Nothing to reload, the database is always up to date.
+        """
+
+    def save_statistics(self):
+        """
+        Nothing to save, every update is committed when it is made.
+        """
+
+    def request_flush(self):
+        """
+        Nothing to flush, every update is committed when it is made.
+        """
+
+    def flush(self):
+        """
+        Nothing to flush, every update is committed when it is made.
+        """
+
+    def get_trivia_king(self):
+        """
+        Retrieves the name of the trivia king (player with the most games won).
+
+        Returns:
+            str: The name of the trivia king, None if nobody won a game yet.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT name FROM players WHERE games_won > 0 "
+                                          "ORDER BY games_won DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def get_max(self, key):
+        """
+        Finds the question with the maximum value for a given statistic.
+
+        Args:
+            key: The key specifying the statistic to be considered (e.g., "correct_answers", "incorrect_answers").
+
+        Returns:
+            list: The question and the maximum value, [None, 0] if no question has a value above 0.
+        """
+        if key not in QUESTION_COUNTERS:
+            raise ValueError(f"unknown question statistic {key}")
+        with self.lock:
+            row = self.connection.execute(f"SELECT question, {key} FROM questions WHERE {key} > 0 "
+                                          f"ORDER BY {key} DESC LIMIT 1").fetchone()
+        return list(row) if row else [None, 0]
+
+    def get_top_players(self, key="games_won", count=10):
+        """
+        Retrieves the best players.
+
+        Args:
+            key: The ranking to read, a player statistic or "correct_ratio".
+            count: How many players to retrieve.
+
+        Returns:
+            list: The [name, score] pairs, the best player first.
+        """
+        if key not in PLAYER_COUNTERS + ("correct_ratio",):
+            raise ValueError(f"unknown player ranking {key}")
+        score = CORRECT_RATIO if key == "correct_ratio" else key
+        with self.lock:
+            rows = self.connection.execute(f"SELECT name, {score} FROM players WHERE {score} IS NOT NULL "
+                                           f"ORDER BY {score} DESC, name LIMIT ?", (count,)).fetchall()
+        return [list(row) for row in rows]
+
+    def get_hardest_questions(self, count=10):
+        """
+        Retrieves the answered questions with the lowest share of correct answers.
+
+        Args:
+            count: How many questions to retrieve.
+
+        Returns:
+            list: The [question, ratio] pairs, the hardest question first.
+        """
+        with self.lock:
+            rows = self.connection.execute(f"SELECT question, {CORRECT_RATIO} FROM questions "
+                                           f"WHERE {CORRECT_RATIO} IS NOT NULL "
+                                           f"ORDER BY {CORRECT_RATIO}, question DESC LIMIT ?", (count,)).fetchall()
+        return [list(row) for row in rows]
+
+    def get_easiest_questions(self, count=10):
+        """
+        Retrieves the answered questions with the highest share of correct answers.
+
+        Args:
+            count: How many questions to retrieve.
+
+        Returns:
+            list: The [question, ratio] pairs, the easiest question first.
+        """
+        with self.lock:
+            rows = self.connection.execute(f"SELECT question, {CORRECT_RATIO} FROM questions "
+                                           f"WHERE {CORRECT_RATIO} IS NOT NULL "
+                                           f"ORDER BY {CORRECT_RATIO} DESC, question LIMIT ?", (count,)).fetchall()
+        return [list(row) for row in rows]
+
+    def query_statistics(self, table, prefix="", sort_by=None, descending=True, offset=0, limit=20):
+        """
+        Retrieves a page of the players' or the questions' statistics.
+
+        The prefix filter is a range on the primary key, and the statistics sorted by have an index.
+
+        Args:
+            table: "players" or "questions".
+            prefix: Only the players or questions starting with it are listed.
+            sort_by: A statistic or "correct_ratio" to sort by, None to sort by name.
+            descending: True to list the highest values first.
+            offset: How many rows to skip.
+            limit: The maximum number of rows on the page.
+
+        Returns:
+            dict: The number of rows matching the prefix and the rows of the page.
+        """
+        key, counters = self.get_columns(table)
+        if sort_by in (None, key):
+            order = f"{key} {'DESC' if descending else 'ASC'}"
+        elif sort_by in counters + ("correct_ratio",):
+            score = CORRECT_RATIO if sort_by == "correct_ratio" else sort_by
+            order = f"{score} IS NULL, {score} DESC, {key}" if descending else f"{score} IS NULL, {score}, {key} DESC"
+        else:
+            raise ValueError(f"unknown {table} statistic {sort_by}")
+        where, parameters = self.get_prefix_filter(key, prefix)
+        with self.lock:
+            total = self.connection.execute(f"SELECT COUNT(*) FROM {table} {where}", parameters).fetchone()[0]
+            rows = self.connection.execute(f"SELECT {key}, {', '.join(counters)}, {CORRECT_RATIO} FROM {table} "
+                                           f"{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                                           (*parameters, limit, offset)).fetchall()
+        columns = (key,) + counters + ("correct_ratio",)
+        return {"table": table, "total": total, "offset": offset, "limit": limit,
+                "rows": [dict(zip(columns, row)) for row in rows]}
+
+    def summarize_statistics(self, table, prefix=""):
+        """
+        Sums the players' or the questions' statistics.
+
+        Args:
+            table: "players" or "questions".
+            prefix: Only the players or questions starting with it are summed.
+
+        Returns:
+            dict: The number of players or questions, the sum of every statistic and the overall correct ratio.
+        """
+        key, counters = self.get_columns(table)
+        where, parameters = self.get_prefix_filter(key, prefix)
+        sums = ", ".join(f"TOTAL({counter})" for counter in counters)
+        with self.lock:
+            row = self.connection.execute(f"SELECT COUNT(*), {sums} FROM {table} {where}", parameters).fetchone()
+        totals = dict(zip(counters, (int(total) for total in row[1:])))
+        answered = totals["correct_answers"] + totals["incorrect_answers"]
+        return {"table": table, "count": row[0], **totals,
+                "correct_ratio": totals["correct_answers"] / answered if answered else None}
+
+    @staticmethod
+    def get_columns(table):
+        """
+        Gets the columns of a statistics table.
+
+        Args:
+            table: "players" or "questions".
+
+        Returns:
+            tuple: The primary key and the counters of the table.
+        """
+        if table == "players":
+            return "name", PLAYER_COUNTERS
+        if table == "questions":
+            return "question", QUESTION_COUNTERS
+        raise ValueError(f"unknown statistics table {table}")
+
+    @staticmethod
+    def get_prefix_filter(key, prefix):
+        """
+        Builds the WHERE clause keeping the rows whose primary key starts with a prefix.
+
+        Args:
+            key: The primary key.
+            prefix: The prefix, "" to keep every row.
+
+        Returns:
+            tuple: The WHERE clause and its parameters.
+        """
+        if not prefix:
+            return "", ()
+        return f"WHERE {key} >= ? AND {key} < ?", (prefix, prefix + "\U0010ffff")
+
+    def get_most_incorrect_question(self):
+        """
+        Returns the question with the most incorrect answers.
+
+        Returns:
+            list: The question with the most incorrect answers and their number.
+        """
+        return self.get_max("incorrect_answers")
+
+    def get_most_correct_question(self):
+        """
+        Returns the question with the most correct answers.
+
+        Returns:
+            list: The question with the most correct answers and their number.
+        """
+        return self.get_max("correct_answers")
+
+    def get_players_data(self):
+        """
+        Retrieves the dictionary containing players' statistics.
+
+        Returns:
+            dict: A dictionary containing players' statistics.
+        """
+        with self.lock:
+            rows = self.connection.execute(f"SELECT name, {', '.join(PLAYER_COUNTERS)} FROM players").fetchall()
+        return {row[0]: dict(zip(PLAYER_COUNTERS, row[1:])) for row in rows}
+
+    def get_games_data(self):
+        """
+        Retrieves the total number of games played.
+
+        Returns:
+            int: The total number of games played.
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def get_question_data(self):
+        """
+        Retrieves the dictionary containing question statistics.
+
+        Returns:
+            dict: A dictionary containing question statistics.
+        """
+        with self.lock:
+            rows = self.connection.execute(f"SELECT question, {', '.join(QUESTION_COUNTERS)} "
+                                           f"FROM questions").fetchall()
+        return {row[0]: dict(zip(QUESTION_COUNTERS, row[1:])) for row in rows}
+
+
+def migrate_from_json(json_path="statistics.json", db_path="statistics.db"):
+    """
+    Copy the statistics of a JSON statistics file into a SQLite database.
+
+    The players and questions of the JSON file replace the rows of the same name in the database, and its games
+    replace the games migrated before, so migrating the same file again changes nothing.
+
+    Args:
+        json_path (str): The path to the JSON statistics file.
+        db_path (str): The path to the SQLite database.
+
+    Returns:
+        SQLiteStatistics: The migrated statistics.
+    """
+    reader = JSONReader(json_path)
+    statistics = SQLiteStatistics(db_path)
+    players = reader.get("players_data") or {}
+    questions = reader.get("question_data") or {}
+    with statistics.lock, statistics.connection as connection:
+        connection.executemany(
+            f"INSERT OR REPLACE INTO players (name, {', '.join(PLAYER_COUNTERS)}) VALUES (?, ?, ?, ?, ?)",
+            [(name, *(data.get(key, 0) for key in PLAYER_COUNTERS)) for name, data in players.items()])
+        connection.executemany(
+            f"INSERT OR REPLACE INTO questions (question, {', '.join(QUESTION_COUNTERS)}) VALUES (?, ?, ?, ?)",
+            [(question, *(data.get(key, 0) for key in QUESTION_COUNTERS)) for question, data in questions.items()])
+        connection.execute("DELETE FROM games WHERE played_at IS NULL")  # the games of an earlier migration
+        connection.executemany("INSERT INTO games (played_at) VALUES (NULL)",
+                               [()] * (reader.get("games_data") or 0))
+    return statistics
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else "statistics.json"
+    destination = sys.argv[2] if len(sys.argv) > 2 else "statistics.db"
+    migrated = migrate_from_json(source, destination)
+    print(f"Migrated {len(migrated.get_players_data())} players, {len(migrated.get_question_data())} questions "
+          f"and {migrated.get_games_data()} games from {source} to {destination}")
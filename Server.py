@@ -1,13 +1,23 @@
-import struct
+import json
+import sys
 import threading
 import time
 import netifaces
 from Colors import ANSI
-from GameStatistics import GameStatistics
-from JsonReader import JSONReader
+from GameStatistics import open_statistics
+from Config import get_config
+from ContentWatcher import ContentWatcher
+from Leaderboard import PLAYER_COUNTERS, QUESTION_COUNTERS
+from Metrics import JOIN_LATENCY, registry, start_metrics_server
 from Player import Player
 from PlayerManager import PlayerManager
+from Profiler import install_profiling_signal, profiled, profiler
+from RoomManager import RoomManager
 from GameEngine import GameEngine
+from MessageCache import MessageCache
+from Protocol import OFFER_LOAD, OFFER_PORT, OFFER_UNBOUNDED, MessageKind, encode_message, receive_hello
+from QuestionBank import open_question_bank
+from RoundScheduler import RoundScheduler
 import socket
 import ipaddress
 
@@ -49,6 +59,19 @@ def find_available_port(ip_address, start_port=1024, end_port=49151):
     return None
 
 
+def configure_player_socket(player_socket, send_buffer_size):
+    """
+    Tune a player socket for small, latency sensitive messages.
+
+    Args:
+        player_socket (socket.socket): The socket of the player.
+        send_buffer_size (int): The kernel send buffer size to request, None to keep the system default.
+    """
+    player_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if send_buffer_size:
+        player_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer_size)
+
+
 def get_ip_address(interface_name='en0'):
     """
     Get the IP address of the specified network interface.
@@ -111,92 +134,343 @@ class Server:
     and then handles TCP connections to manage the trivia game.
 
     Attributes:
-        config_reader (JSONReader): An instance of the JSONReader class used to read the configuration file.
+        config (Config): The configuration of the game, shared by the whole process.
         player_manager (PlayerManager): An instance of the PlayerManager class used to manage the players.
         game_engine (GameEngine): An instance of the GameEngine class used to manage the game logic.
         broadcast_finished_event (threading.Event): An event used to signal that the broadcast has finished.
+        listening (threading.Event): Set once the TCP socket of the current game accepts connections.
+        content_watcher (ContentWatcher): The thread loading new questions and answer options, applied between
+            games.
+        bind_address (str): The IP address given to the server, None to use the address of the network interface.
         ip_address (str): The IP address of the server.
         udp_port (int): The UDP port used for broadcasting offers.
         tcp_port (int): The TCP port used for the game server.
+        lobby_timeout (float): How many seconds the lobby waits for another player before the game starts.
+        pacing (dict): The delays and the answer timeout of the rounds, in milliseconds.
+        room_pacing (dict): The pacing of the games played in rooms.
+        headless (bool): Whether the server plays its games without the interactive menus.
+        carry_over_players (bool): Whether the v2 players of a game stay connected for the next game.
+        carried_players (list): The players of the last game carried into the next lobby.
     """
 
-    def __init__(self, config_file='config.json'):
-        self.config_reader = JSONReader(config_file)
+    engine_class = GameEngine
+
+    def __init__(self, config_file='config.json', ip_address=None, headless=False, game_statistics=None,
+                 tcp_port=None, services=True):
+        """
+        Initializes the Server.
+
+        Args:
+            config_file (str): The path to the JSON configuration file.
+            ip_address (str): The IP address to serve on, the address of the network interface when not given.
+            headless (bool): Whether to play the games without the interactive menus, a headless server waits for
+                run_game to be called for every game.
+            game_statistics (GameStatistics): The statistics to record the games in, the configured backend is
+                opened when not given.
+            tcp_port (int): The TCP port to serve on, a free port is looked for when not given. A server given its
+                port does not broadcast offers, so it gets no UDP port.
+            services (bool): Whether to serve the metrics endpoint and install the profiling signal, which only one
+                process of a sharded server does.
+        """
+        self.config = get_config(config_file)
         self.player_manager = PlayerManager()
         self.broadcast_finished_event = threading.Event()
-        self.ip_address = get_ip_address()
-        self.udp_port = find_available_port(self.ip_address)
-        self.tcp_port = find_available_port(self.ip_address)
-        self.server_name = self.config_reader.get('server_name')
-        self.dest_port = self.config_reader.get('dest_port')
-        self.magic_cookie = self.config_reader.get('magic_cookie')
-        self.message_type = self.config_reader.get('message_type')
-        self.questions = self.config_reader.get('questions')
-        self.true_options = self.config_reader.get('true_options')
-        self.false_options = self.config_reader.get('false_options')
-        self.question_message_prefix = self.config_reader.get('question_message_prefix')
-        self.loser_message = self.config_reader.get('loser_message')
-        self.game_engine = GameEngine(self.player_manager, self.questions, self.true_options, self.false_options,
-                                      self.server_name,self.question_message_prefix, self.loser_message)
-        self.game_statistics = GameStatistics()
+        self.listening = threading.Event()
+        self.bind_address = ip_address
+        self.headless = headless
+        self.ip_address = ip_address or get_ip_address()
+        if tcp_port is None:
+            self.udp_port = find_available_port(self.ip_address)
+            self.tcp_port = find_available_port(self.ip_address)
+        else:
+            self.udp_port = None
+            self.tcp_port = tcp_port
+        self.server_name = self.config.server_name
+        self.dest_port = self.config.dest_port
+        self.question_bank = open_question_bank(self.config)
+        self.true_options = self.config.true_options
+        self.false_options = self.config.false_options
+        self.question_message_prefix = self.config.question_message_prefix
+        self.loser_message = self.config.loser_message
+        self.outbound_high_water_mark = self.config.get('outbound_high_water_mark', 262144)
+        self.socket_send_buffer_size = self.config.get('socket_send_buffer_size')
+        self.message_cache = MessageCache(self.question_bank.questions or (), self.question_message_prefix,
+                                          self.loser_message, self.config.get('message_cache_size', 1024))
+        self.max_rooms = self.config.get('max_rooms', 8)
+        self.max_players_per_room = self.config.get('max_players_per_room', 100)
+        self.pacing = self.config.get('pacing') or {}
+        self.room_pacing = self.config.get('room_pacing') or self.pacing
+        self.lobby_timeout = self.config.get('lobby_timeout', 10)
+        self.carry_over_players = self.config.get('carry_over_players', False)
+        self.carried_players = []
+        self.game_statistics = game_statistics if game_statistics is not None else open_statistics()
+        self.content_watcher = ContentWatcher(self.config, self.question_bank,
+                                              self.config.get('content_reload_interval_ms', 1000))
+        if self.content_watcher.interval > 0:
+            self.content_watcher.start()
+        # the player manager is replaced by every game, the gauges read the current one
+        registry.set_gauge("trivia_players", "Number of connected players.",
+                           lambda: self.player_manager.count_players())
+        registry.set_gauge("trivia_active_players", "Number of players still in the game.",
+                           lambda: self.player_manager.count_active_players())
+        profile_dir = self.config.get('profile_dir', 'profiles')
+        if self.config.get('profile_rounds', 0) > 0:
+            profiler.arm(self.config.get('profile_rounds'), profile_dir)
+        if services:
+            if self.config.get('metrics_port') is not None:
+                start_metrics_server(self.config.get('metrics_port'))
+            install_profiling_signal(self.config.get('profile_signal_rounds', 5), profile_dir)
+        self.game_engine = self.create_game_engine()
+
+    def create_game_engine(self, player_manager=None, engine_class=None, pacing=None):
+        """
+        Create the game engine used for the next game.
+
+        Args:
+            player_manager (PlayerManager): The players of the game, the server's player manager when not given.
+            engine_class (type): The class of the engine, the server's engine_class when not given.
+            pacing (dict): The welcome_delay_ms, round_delay_ms and answer_timeout_ms of the game, the server's
+                pacing when not given.
+
+        Returns:
+            GameEngine: A game engine bound to the player manager.
+        """
+        self.apply_content_update()
+        engine_class = engine_class or self.engine_class
+        return engine_class(player_manager or self.player_manager, self.question_bank, self.true_options,
+                            self.false_options, self.server_name, self.question_message_prefix, self.loser_message,
+                            self.outbound_high_water_mark, self.message_cache, self.game_statistics,
+                            RoundScheduler(**(pacing or self.pacing)))
+
+    def apply_content_update(self):
+        """
+        Swap in the new questions and answer options loaded by the content watcher, if any.
+
+        Only the games created afterwards use them, the games already running keep their own questions.
+
+        Returns:
+            bool: True if new content was swapped in.
+        """
+        update = self.content_watcher.take_update()
+        if update is None:
+            return False
+        self.config, self.question_bank = update
+        self.true_options = self.config.true_options
+        self.false_options = self.config.false_options
+        self.question_message_prefix = self.config.question_message_prefix
+        self.loser_message = self.config.loser_message
+        self.pacing = self.config.get('pacing') or {}
+        self.room_pacing = self.config.get('room_pacing') or self.pacing
+        self.message_cache = MessageCache(self.question_bank.questions or (), self.question_message_prefix,
+                                          self.loser_message, self.config.get('message_cache_size', 1024))
+        print(f"{ANSI.GREEN.value}Loaded {len(self.question_bank)} questions for the next games{ANSI.RESET.value}")
+        return True
+
+    def build_offer_packet(self, load=None):
+        """
+        Build the UDP offer packet advertising this server.
+
+        Args:
+            load (tuple): The load of the server, see get_offer_load, appended to the legacy offer when given.
+
+        Returns:
+            bytes: The packed offer message.
+        """
+        packet = self.config.offer_prefix + OFFER_PORT.pack(self.tcp_port)
+        if load is None:
+            return packet
+        return packet + OFFER_LOAD.pack(*(min(max(value, 0), OFFER_UNBOUNDED) for value in load))
+
+    def get_offer_load(self):
+        """
+        Get the load of the server advertised in its extended offers.
+
+        Returns:
+            tuple: The number of players, the player capacity (0 when unbounded), the number of rooms, the maximum
+            number of rooms and how many players can still join (OFFER_UNBOUNDED when unbounded).
+        """
+        return self.player_manager.count_players(), 0, 0, 0, OFFER_UNBOUNDED
+
+    def send_offers(self, udp_socket, broadcast_ip, load):
+        """
+        Send the legacy offer, understood by every client, followed by the extended offer carrying the load of the
+        server. Legacy clients ignore the extended offer, its length does not match.
+
+        Args:
+            udp_socket (socket.socket): The UDP socket used for broadcasting.
+            broadcast_ip (str): The broadcast IP address of the subnet.
+            load (tuple): The load of the server, see get_offer_load.
+        """
+        udp_socket.sendto(self.build_offer_packet(), (broadcast_ip, self.dest_port))
+        udp_socket.sendto(self.build_offer_packet(load), (broadcast_ip, self.dest_port))
+
+    def get_broadcast_address(self):
+        """
+        Get the broadcast IP address of the subnet the server is running on.
+
+        Returns:
+            str: The broadcast IP address.
+        """
+        subnet_mask = get_subnet_mask(self.ip_address)
+        return get_broadcast_ip(self.ip_address, subnet_mask)
 
     def broadcast_offer(self, udp_socket):
         """
         Broadcast offer messages to clients using the UDP socket.
 
         This method runs in a separate thread and broadcasts the offer message every second
-        until either a new player joins or 10 seconds have passed since the last join.
+        until no new player joined for lobby_timeout seconds.
 
         Args:
             udp_socket (socket.socket): The UDP socket used for broadcasting.
         """
-        subnet_mask = get_subnet_mask(self.ip_address)
-        brod_ip = get_broadcast_ip(self.ip_address, subnet_mask)
+        brod_ip = self.get_broadcast_address()
         print(f"{ANSI.MAGENTA.value}Server started, listening on IP address \n"
               f"{ANSI.RESET.value}{self.ip_address} waiting for players to join the game!")
-        encoded_server_name = self.server_name.encode('utf-8').ljust(32, b'\x00')
-        # Pack the packet data into bytes
-        packet = struct.pack('!IB32sH', int(self.magic_cookie, 16), int(self.message_type, 16), encoded_server_name, self.tcp_port)
         start_time = time.time()
-        curr_len = len(self.player_manager.get_players())
-        while curr_len == 0 or time.time() - start_time <= 10:
+        curr_len = self.player_manager.count_players()
+        while curr_len == 0 or time.time() - start_time <= self.lobby_timeout:
             try:
-                udp_socket.sendto(packet, (brod_ip, self.dest_port))
+                self.send_offers(udp_socket, brod_ip, self.get_offer_load())
             except OSError as e:
                 print("Error:", e)
                 continue
             time.sleep(1)
-            if len(self.player_manager.get_players()) > curr_len:
-                curr_len = len(self.player_manager.get_players())
+            if self.player_manager.count_players() > curr_len:
+                curr_len = self.player_manager.count_players()
                 start_time = time.time()
 
-        print("No new players joined within 10 seconds. Stopping broadcast.")
+        print(f"No new players joined within {self.lobby_timeout} seconds. Stopping broadcast.")
         udp_socket.close()
         self.broadcast_finished_event.set()
 
+    @profiled('handle_client')
     def handle_client(self, client_socket, address):
         """
         Handle a client connection.
 
         This method is called when a new client connects to the server over TCP.
-        It receives the player name from the client and adds the player to the PlayerManager.
+        It receives the player name from the client, negotiates the protocol version and adds the player to the
+        PlayerManager.
 
         Args:
             client_socket (socket.socket): The client socket.
             address (tuple): The client address.
         """
+        accepted_at = time.perf_counter()
         try:
-            player_name = client_socket.recv(1024).decode().strip()
-            player = Player(player_name, client_socket, True)
-            name_changed = self.player_manager.add_player(player)
-            name = player.get_name()
-            print(f"Player {name} connected from {address}")
-            if name_changed:
-                msg = f'Your name changed to {name}'
-                player.get_socket().sendall(msg.encode())
+            player = self.receive_player(client_socket)
+            if self.join_player(self.player_manager, player, address):
+                self.notify_name_change(player)
+            JOIN_LATENCY.observe(time.perf_counter() - accepted_at)
         except Exception as e:
             print(f"Error handling client: {e}")
 
+    def receive_player(self, client_socket):
+        """
+        Tune a new client socket and receive the hello of the client.
+
+        Args:
+            client_socket (socket.socket): The client socket.
+
+        Returns:
+            Player: The player, not yet added to any PlayerManager.
+        """
+        configure_player_socket(client_socket, self.socket_send_buffer_size)
+        protocol_version, player_name, decoder = receive_hello(client_socket)
+        return Player(player_name, client_socket, True, protocol_version=protocol_version, decoder=decoder)
+
+    def join_player(self, player_manager, player, address):
+        """
+        Add a player to a PlayerManager.
+
+        Args:
+            player_manager (PlayerManager): The players the player joins.
+            player (Player): The joining player.
+            address (tuple): The client address.
+
+        Returns:
+            bool: True if the name of the player had to be changed, see notify_name_change.
+        """
+        name_changed = player_manager.add_player(player)
+        print(f"Player {player.get_name()} connected from {address}")
+        return name_changed
+
+    def notify_name_change(self, player):
+        """
+        Tell a player its name had to be changed to be unique.
+
+        Args:
+            player (Player): The renamed player.
+        """
+        msg = f'Your name changed to {player.get_name()}'
+        player.get_socket().sendall(encode_message(player.get_protocol_version(), MessageKind.TEXT, msg))
+
+    def release_players(self, players):
+        """
+        Close the connections of the players of a finished game, or invite them to the next game when players are
+        carried over. Only v2 players can be carried over, v1 clients expect the connection to close.
+
+        Args:
+            players (tuple): The players still connected at the end of the game.
+
+        Returns:
+            list: The players carried into the next lobby.
+        """
+        carried = []
+        for player in players:
+            player_socket = player.get_socket()
+            if self.carry_over_players and player.get_protocol_version() >= 2:
+                try:
+                    player_socket.settimeout(5)
+                    player_socket.sendall(self.build_next_game_message())
+                    carried.append(player)
+                    continue
+                except OSError:
+                    pass
+            player_socket.close()
+        return carried
+
+    def build_next_game_message(self):
+        """
+        Build the message inviting the players of a finished game to the next one.
+
+        Returns:
+            bytes: The NEXT_GAME frame.
+        """
+        msg = (f"{ANSI.CYAN.value}You are kept in the lobby of the next game, leave or disconnect if you do not want "
+               f"to play it{ANSI.RESET.value}")
+        return encode_message(2, MessageKind.NEXT_GAME, msg)
+
+    def drop_departed_players(self, players):
+        """
+        Remove the carried players that disconnected or left while waiting in the lobby.
+
+        Args:
+            players (list): The carried players.
+        """
+        for player in players:
+            player_socket = player.get_socket()
+            departed = False
+            try:
+                player_socket.setblocking(False)
+                while not departed:
+                    data = player_socket.recv(4096)
+                    if not data:
+                        departed = True
+                        break
+                    decoder = player.get_decoder()
+                    decoder.feed(data)
+                    departed = any(kind == MessageKind.LEAVE for kind, _ in decoder.frames())
+            except BlockingIOError:
+                pass
+            except (OSError, ValueError):
+                departed = True
+            if departed:
+                print(f"Player {player.get_name()} left the lobby")
+                self.player_manager.kick_player(player)
+                player_socket.close()
+
     def get_udp_socket(self):
         """
         Create and configure the UDP socket for broadcasting offers.
@@ -213,16 +487,21 @@ class Server:
         """
         Resets the game.
 
-        This method is called once the game is over, it resets the server data and starts over.
+        This method is called once the game is over, it resets the server data and starts over. A headless server
+        only gets ready for the next game.
         """
         self.player_manager = PlayerManager()
-        self.ip_address = get_ip_address()
+        for player in self.carried_players:
+            player.reset_for_next_game()
+            self.player_manager.add_player(player)
+        self.ip_address = self.bind_address or get_ip_address()
         self.udp_port = find_available_port(self.ip_address)
         self.tcp_port = find_available_port(self.ip_address)
-        self.game_engine = GameEngine(self.player_manager, self.questions, self.true_options, self.false_options,
-                                      self.server_name, self.question_message_prefix, self.loser_message)
+        self.game_engine = self.create_game_engine()
         self.broadcast_finished_event.clear()
-        self.start()
+        self.listening.clear()
+        if not self.headless:
+            self.start()
 
     def start(self):
 
@@ -238,8 +517,9 @@ class Server:
 
         while True:
             print(
-                f"{ANSI.GREEN.value}Main Menu:\n1. Start the game\n2. Print statistics\n3. Quit game {ANSI.SAD_FACE.value}{ANSI.RESET.value}")
-            choice = input("Enter your choice (1/2/3): ")
+                f"{ANSI.GREEN.value}Main Menu:\n1. Start the game\n2. Print statistics\n3. Host game rooms\n"
+                f"4. Quit game {ANSI.SAD_FACE.value}{ANSI.RESET.value}")
+            choice = input("Enter your choice (1/2/3/4): ")
             match choice:
                 case '1':
                     self.run_game()
@@ -248,6 +528,9 @@ class Server:
                     self.print_statistics()
                     return
                 case '3':
+                    self.host_rooms()
+                    return
+                case '4':
                     return
                 case _:
                     print(f"{ANSI.RED.value}Invalid choice. Please enter a valid option.{ANSI.RESET.value}")
@@ -266,21 +549,18 @@ class Server:
         while True:
             print(
                 f"{ANSI.CYAN.value}Stats Menu:\n1. Players Statistics\n2. Questions Statistics\n3. The king of trivia "
-                f"{ANSI.CROWN.value}{ANSI.RESET.value}")
-            choice = input("Enter your choice (1/2/3): ")
+                f"{ANSI.CROWN.value}\n4. Leaderboard{ANSI.RESET.value}")
+            choice = input("Enter your choice (1/2/3/4): ")
             games = self.game_statistics.get_games_data()
             print(f"games played: {games}")
             match choice:
                 case '1':
                     print("Player stats")
-                    stat = self.game_statistics.get_players_data()
-                    print_dictionary(stat)
-
+                    self.browse_statistics("players", PLAYER_COUNTERS)
                     break
                 case '2':
                     print("Question stats")
-                    stat = self.game_statistics.get_question_data()
-                    print_dictionary(stat)
+                    self.browse_statistics("questions", QUESTION_COUNTERS)
                     correct = self.game_statistics.get_most_correct_question()
                     incorrect = self.game_statistics.get_most_incorrect_question()
                     print(f"Correct: {correct}")
@@ -292,11 +572,84 @@ class Server:
                     print(stat)
 
 
+                    break
+                case '4':
+                    self.print_leaderboard()
                     break
                 case _:
                     print(f"{ANSI.RED.value}Invalid choice. Please enter a valid option.{ANSI.RESET.value}")
         self.return_to_main_menu()
 
+    def browse_statistics(self, table, counters, page_size=10):
+        """
+        Print the players' or the questions' statistics page by page, filtered and sorted as the operator asks.
+
+        Args:
+            table (str): "players" or "questions".
+            counters (tuple): The statistics the rows can be sorted by, besides the correct answer ratio.
+            page_size (int): How many rows to print per page.
+        """
+        prefix = input("Only show names starting with (empty for all): ")
+        sort_by = input(f"Sort by ({', '.join(counters)}, correct_ratio, empty for name): ") or None
+        descending = sort_by is not None
+        try:
+            summary = self.game_statistics.summarize_statistics(table, prefix)
+            page = self.game_statistics.query_statistics(table, prefix, sort_by, descending, 0, page_size)
+        except ValueError as e:
+            print(f"{ANSI.RED.value}{e}{ANSI.RESET.value}")
+            return
+        print_dictionary({"summary": summary})
+        key = "name" if table == "players" else "question"
+        while True:
+            print_dictionary({row[key]: {k: v for k, v in row.items() if k != key} for row in page["rows"]})
+            print(f"{ANSI.CYAN.value}{page['offset'] + 1}-{page['offset'] + len(page['rows'])} of "
+                  f"{page['total']}{ANSI.RESET.value}")
+            choice = input("n: next page, p: previous page, j: print as JSON, else: back: ")
+            match choice:
+                case 'n' if page['offset'] + page_size < page['total']:
+                    offset = page['offset'] + page_size
+                case 'p' if page['offset'] > 0:
+                    offset = max(page['offset'] - page_size, 0)
+                case 'n' | 'p':
+                    continue
+                case 'j':
+                    print(json.dumps({"summary": summary, "page": page}, indent=2, ensure_ascii=False))
+                    continue
+                case _:
+                    return
+            page = self.game_statistics.query_statistics(table, prefix, sort_by, descending, offset, page_size)
+
+    def print_leaderboard(self, count=10):
+        """
+        Print the best players and the hardest and easiest questions.
+
+        Args:
+            count (int): How many players and questions to print in every ranking.
+        """
+        rankings = [("Most games won", self.game_statistics.get_top_players("games_won", count)),
+                    ("Best correct answer ratio", self.game_statistics.get_top_players("correct_ratio", count)),
+                    ("Hardest questions", self.game_statistics.get_hardest_questions(count)),
+                    ("Easiest questions", self.game_statistics.get_easiest_questions(count))]
+        for title, ranking in rankings:
+            print(f"{ANSI.YELLOW.value}{title}{ANSI.RESET.value}")
+            for place, (name, score) in enumerate(ranking, 1):
+                print(f"{place}. {name}: {round(score, 2)}")
+
+    def host_rooms(self):
+        """
+        Host many games at once until the operator stops the server with Ctrl+C.
+
+        Players joining are put in the room currently filling up, every room plays its own game concurrently.
+        """
+        room_manager = RoomManager(self, self.max_rooms, self.max_players_per_room, self.lobby_timeout)
+        try:
+            room_manager.run()
+        except KeyboardInterrupt:
+            print(f"{ANSI.YELLOW.value}Stopping the game rooms...{ANSI.RESET.value}")
+        finally:
+            room_manager.stop()
+        self.return_to_main_menu()
+
     def run_game(self):
         udp_socket = self.get_udp_socket()
 
@@ -309,6 +662,7 @@ class Server:
             tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             tcp_socket.bind((self.ip_address, self.tcp_port))
             tcp_socket.listen()
+            self.listening.set()
             print(f"Server listening on IP address {self.ip_address}, port {self.tcp_port}")
 
             while not self.broadcast_finished_event.is_set():
@@ -321,12 +675,21 @@ class Server:
                 client_handler = threading.Thread(target=self.handle_client, args=(client_socket, address))
                 client_handler.start()
 
+            self.drop_departed_players(self.carried_players)
             self.game_statistics.update_game()
             self.game_engine.play_game(tcp_socket)
+            self.carried_players = self.release_players(self.player_manager.get_players())
 
         self.reset_game()
 
 
 if __name__ == '__main__':
-    server = Server()
+    # The server mode can be given on the command line, otherwise it is taken from the config file
+    server_mode = sys.argv[1] if len(sys.argv) > 1 else get_config().get('server_mode', 'threaded')
+    if server_mode == 'asyncio':
+        from AsyncServer import AsyncServer
+        server = AsyncServer()
+    else:
+        server = Server()
     server.start()
+
@@ -0,0 +1,198 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from Colors import ANSI
+from Player import Player
+from RoomManager import RoomManager
+from Server import Server
+
+
+class StatisticsProxy:
+    """
+    Class forwarding the statistics updates of a worker process to the supervisor.
+
+    Only the supervisor writes the statistics file, so the workers never overwrite each other's updates. It has the
+    methods of GameStatistics used while games are played.
+
+    Attributes:
+        queue (multiprocessing.Queue): The queue the updates are sent on.
+    """
+
+    def __init__(self, queue):
+        """
+        Initializes the StatisticsProxy.
+
+        Args:
+            queue (multiprocessing.Queue): The queue the updates are sent on.
+        """
+        self.queue = queue
+
+    def add_player(self, player):
+        self.queue.put(('add_player', player.get_name()))
+
+    def update_player(self, player, key):
+        self.queue.put(('update_player', player.get_name(), key))
+
+    def update_game(self):
+        self.queue.put(('update_game',))
+
+    def update_question(self, question, correct, incorrect):
+        self.queue.put(('update_question', question, correct, incorrect))
+
+    def request_flush(self):
+        self.queue.put(('request_flush',))
+
+
+def run_worker(worker_id, config_file, ip_address, tcp_port, statistics_queue, health):
+    """
+    Run a worker process hosting its own game rooms on the shared TCP port.
+
+    The worker never opens the statistics backend, which only the supervisor writes, and leaves the metrics endpoint
+    and the profiling signal to the supervisor.
+
+    Args:
+        worker_id (int): The index of the worker.
+        config_file (str): The path to the JSON configuration file.
+        ip_address (str): The IP address of the supervisor.
+        tcp_port (int): The TCP port shared by all the workers.
+        statistics_queue (multiprocessing.Queue): The queue the statistics updates are sent on.
+        health (multiprocessing.Array): The number of rooms and players of every worker.
+    """
+    server = Server(config_file, ip_address, game_statistics=StatisticsProxy(statistics_queue), tcp_port=tcp_port,
+                    services=False)
+
+    def report_health(rooms, players):
+        health[worker_id * 2] = rooms
+        health[worker_id * 2 + 1] = players
+
+    room_manager = RoomManager(server, server.max_rooms, server.max_players_per_room, server.lobby_timeout,
+                               reuse_port=True, broadcast=False, report_health=report_health)
+    try:
+        room_manager.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        room_manager.stop()
+
+
+class ShardedServer:
+    """
+    Supervisor running the game rooms in several worker processes sharing one TCP port with SO_REUSEPORT.
+
+    The supervisor is the only process broadcasting offers and writing statistics. It stops advertising the server
+    once every worker is at its player capacity, and restarts the workers that die.
+
+    Attributes:
+        config_file (str): The path to the JSON configuration file of the workers.
+        server (Server): The server whose configuration, address and statistics the workers share.
+        workers_count (int): The number of worker processes.
+        statistics_queue (multiprocessing.Queue): The queue the workers send their statistics updates on.
+        health (multiprocessing.Array): The number of rooms and players of every worker.
+        workers (list): The worker processes.
+    """
+
+    def __init__(self, workers_count, config_file='config.json'):
+        """
+        Initializes the ShardedServer.
+
+        Args:
+            workers_count (int): The number of worker processes.
+            config_file (str): The path to the JSON configuration file.
+        """
+        self.config_file = config_file
+        self.server = Server(config_file)
+        self.workers_count = workers_count
+        self.statistics_queue = multiprocessing.Queue()
+        self.health = multiprocessing.Array('i', workers_count * 2)
+        self.workers = [None] * workers_count
+
+    def start_worker(self, worker_id):
+        """
+        Start (or restart) a worker process.
+
+        Args:
+            worker_id (int): The index of the worker.
+        """
+        self.health[worker_id * 2] = 0
+        self.health[worker_id * 2 + 1] = 0
+        worker = multiprocessing.Process(target=run_worker, name=f'worker-{worker_id}',
+                                         args=(worker_id, self.config_file, self.server.ip_address,
+                                               self.server.tcp_port, self.statistics_queue, self.health))
+        worker.start()
+        self.workers[worker_id] = worker
+
+    def apply_statistics(self):
+        """
+        Apply the statistics updates sent by the workers until the None sentinel is received.
+        """
+        statistics = self.server.game_statistics
+        for update in iter(self.statistics_queue.get, None):
+            method, args = update[0], list(update[1:])
+            if method in ('add_player', 'update_player'):
+                args[0] = Player(args[0], None, False)
+            getattr(statistics, method)(*args)
+
+    def get_health(self):
+        """
+        Gets the aggregate load of the workers.
+
+        Returns:
+            tuple: The number of live workers, rooms and players.
+        """
+        alive = sum(1 for worker in self.workers if worker is not None and worker.is_alive())
+        rooms = sum(self.health[i * 2] for i in range(self.workers_count))
+        players = sum(self.health[i * 2 + 1] for i in range(self.workers_count))
+        return alive, rooms, players
+
+    def run(self):
+        """
+        Start the workers and broadcast offers for them until interrupted with Ctrl+C.
+        """
+        if not (self.server.udp_port and self.server.tcp_port):
+            print(f"{ANSI.RED.value}Couldn't start the server because of connection issues"
+                  f"{ANSI.SAD_FACE.value}{ANSI.RESET.value}")
+            return
+        statistics_thread = threading.Thread(target=self.apply_statistics)
+        statistics_thread.start()
+        for worker_id in range(self.workers_count):
+            self.start_worker(worker_id)
+        capacity = self.workers_count * self.server.max_rooms * self.server.max_players_per_room
+        udp_socket = self.server.get_udp_socket()
+        brod_ip = self.server.get_broadcast_address()
+        print(f"{ANSI.MAGENTA.value}Server started with {self.workers_count} workers on IP address "
+              f"{self.server.ip_address}, port {self.server.tcp_port}{ANSI.RESET.value}")
+        ticks = 0
+        try:
+            while True:
+                for worker_id, worker in enumerate(self.workers):
+                    if not worker.is_alive():
+                        print(f"{ANSI.RED.value}Worker {worker_id} died, restarting it{ANSI.RESET.value}")
+                        self.start_worker(worker_id)
+                alive, rooms, players = self.get_health()
+                if players < capacity:
+                    load = (players, capacity, rooms, self.workers_count * self.server.max_rooms, capacity - players)
+                    try:
+                        self.server.send_offers(udp_socket, brod_ip, load)
+                    except OSError as e:
+                        print("Error:", e)
+                if ticks % 10 == 0:
+                    print(f"{ANSI.CYAN.value}Workers: {alive}/{self.workers_count}, rooms: {rooms}, "
+                          f"players: {players}/{capacity}{ANSI.RESET.value}")
+                ticks += 1
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"{ANSI.YELLOW.value}Stopping the workers...{ANSI.RESET.value}")
+        finally:
+            udp_socket.close()
+            for worker in self.workers:
+                worker.join()
+            self.statistics_queue.put(None)
+            statistics_thread.join()
+            self.server.game_statistics.flush()
+
+
+if __name__ == '__main__':
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    ShardedServer(workers).run()
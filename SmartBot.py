@@ -1,33 +1,75 @@
 import random
 import sys
 import threading
-from JsonReader import JSONReader
+from Config import get_config
 from Client import Client
+from QuestionBank import open_question_bank
+
+answer_indexes = {}
+answer_indexes_lock = threading.Lock()
+
+
+def normalize_question(question):
+    """
+    Normalize the text of a question, so the same question matches whatever spacing and case it is sent with.
+
+    Args:
+        question (str): The text of the question.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(question.split()).casefold()
+
+
+def load_answer_index(config):
+    """
+    Index the answers of the questions the server asks, once per process and question source.
+
+    Args:
+        config (Config): The configuration of the game.
+
+    Returns:
+        tuple: The answers by question id and by normalized question text.
+    """
+    source = config.get('question_bank')
+    with answer_indexes_lock:
+        if source not in answer_indexes:
+            bank = open_question_bank(config)
+            answers_by_id = {}
+            answers_by_text = {}
+            for index in range(len(bank)):
+                question = bank.load(index)
+                answers_by_id[question['id']] = question['is_true']
+                answers_by_text[normalize_question(question['question'])] = question['is_true']
+            bank.close()
+            answer_indexes[source] = answers_by_id, answers_by_text
+        return answer_indexes[source]
 
 
 class SmartBot(Client, threading.Thread):
-    def __init__(self, player_name, answer_probability):
-        super().__init__(f'SMART_BOT:{player_name} 👽')
+    def __init__(self, player_name, answer_probability, config=None):
+        super().__init__(f'SMART_BOT:{player_name} 👽', config)
         self.answer_probability = answer_probability
+        self.question_prefix = f"{self.config.question_message_prefix}:"
+        self.answers_by_id, self.answers_by_text = load_answer_index(self.config)
 
     def wait_for_input(self, timeout, msg):
         """
         Overrides the wait_for_input method from the parent class.
-        The bot will generate a True/False answer using the pre-trained language model.
+        The bot looks the answer up by question id, or by question text for servers that do not send the id, and
+        answers correctly with the bot's answer probability.
         """
         true_ans = (random.random() < self.answer_probability)
-        # Answer based on the model
-        server_rows = msg.split('\n')
-        question = f'{server_rows[-1]}'
-        qus_prefix = f"{self.config_reader.get('question_message_prefix')}:"
-        question = question.lstrip(qus_prefix)
-        questions = self.config_reader.get('questions')
-        for q in questions:
-            if question in q['question']:
-                if true_ans:
-                    self.current_answer = 't' if q['is_true'] else 'f'
-                else:
-                    self.current_answer = 'f' if q['is_true'] else 't'
+        is_true = self.answers_by_id.get(self.current_question_id)
+        if is_true is None:
+            question = msg.split('\n')[-1].removeprefix(self.question_prefix)
+            is_true = self.answers_by_text.get(normalize_question(question))
+        if is_true is not None:
+            if true_ans:
+                self.current_answer = 't' if is_true else 'f'
+            else:
+                self.current_answer = 'f' if is_true else 't'
 
         print(f"Bot {self.player_name} answered: {self.current_answer}")
 
@@ -38,8 +80,7 @@ if __name__ == '__main__':
     if prob < 0 or prob > 1:
         print("Error: Probability must be a number between 0 and 1.")
     else:
-        json_reader = JSONReader()
-        names = json_reader.get('names')
+        names = list(get_config().get('names'))
         cap = len(names)
         if number_of_bots > cap:
             print(f'Number of bots entered is bigger than capacity: {cap}')
@@ -0,0 +1,165 @@
+import atexit
+import json
+import os
+import time
+from Colors import ANSI
+from GameStatistics import GameStatistics
+from JsonReader import JSONReader
+from Metrics import STATISTICS_PERSISTENCE
+from Player import Player
+
+
+class JournaledStatistics(GameStatistics):
+    """
+    Game statistics kept in an append-only journal of events, compacted from time to time into statistics.json.
+
+    Every update appends one line to the journal instead of rewriting the whole statistics file. When enough events
+    were journaled, and on shutdown, the statistics are written atomically as a snapshot that records the sequence
+    number of the last event it contains, then the journal is emptied. On startup the snapshot is loaded and the
+    events it does not contain yet are replayed, an event torn by a crash is ignored.
+
+    Attributes:
+        journal_path (str): The path to the journal file.
+        compact_events (int): How many events are journaled before a compaction.
+        journal_seq (int): The sequence number of the last journaled event.
+        snapshot_seq (int): The sequence number of the last event contained in the snapshot.
+        journal (file): The journal, opened for buffered appends.
+    """
+
+    def __init__(self, journal_path="statistics.journal", compact_events=10000):
+        """
+        Loads the snapshot, replays the journal and compacts it.
+
+        Args:
+            journal_path (str): The path to the journal file.
+            compact_events (int): How many events are journaled before a compaction.
+        """
+        self.journal_path = journal_path
+        self.compact_events = compact_events
+        self.journal_seq = 0
+        self.snapshot_seq = 0
+        self.journal = None
+        super().__init__(flush_interval_ms=0)
+        self.compact()
+        atexit.register(self.close)
+
+    def load_statistics(self):
+        """
+        Loads the snapshot and replays the journaled events it does not contain.
+        """
+        super().load_statistics()
+        self.snapshot_seq = JSONReader("statistics.json").get("journal_seq", 0)
+        self.journal_seq = self.snapshot_seq
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path) as journal:
+            for line in journal:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # the last event was torn by a crash
+                if event["seq"] > self.snapshot_seq:
+                    self.apply(event)
+                    self.journal_seq = event["seq"]
+
+    def apply(self, event):
+        """
+        Applies a journaled event to the statistics in memory.
+
+        Args:
+            event (dict): The event to apply.
+        """
+        match event["event"]:
+            case "player_joined":
+                super().add_player(Player(event["name"], None, False))
+            case "player_updated":
+                super().update_player(Player(event["name"], None, False), event["key"])
+            case "game_played":
+                super().update_game()
+            case "question_appeared":
+                super().update_question(event["question"], event["correct"], event["incorrect"])
+
+    def record(self, event):
+        """
+        Journals an event and applies it to the statistics in memory.
+
+        Args:
+            event (dict): The event to record.
+        """
+        with self.lock:
+            self.journal_seq += 1
+            event["seq"] = self.journal_seq
+            self.journal.write(json.dumps(event) + "\n")
+            self.apply(event)
+
+    def add_player(self, player):
+        self.record({"event": "player_joined", "name": player.get_name()})
+
+    def update_player(self, player, key):
+        self.record({"event": "player_updated", "name": player.get_name(), "key": key})
+
+    def update_game(self):
+        self.record({"event": "game_played"})
+
+    def update_question(self, question, correct, incorrect):
+        self.record({"event": "question_appeared", "question": question, "correct": correct, "incorrect": incorrect})
+
+    def save_statistics(self):
+        """
+        Nothing to save, the events are already journaled.
+        """
+
+    def reload_statistics(self):
+        """
+        Writes the buffered events, the statistics in memory are always up to date.
+        """
+        self.request_flush()
+
+    def snapshot(self):
+        statistics = super().snapshot()
+        statistics["journal_seq"] = self.journal_seq
+        return statistics
+
+    def request_flush(self):
+        """
+        Writes the buffered events to the journal, compacting it if enough events were journaled.
+        """
+        with self.lock:
+            if self.journal_seq - self.snapshot_seq >= self.compact_events:
+                self.compact()
+            else:
+                started_at = time.perf_counter()
+                self.journal.flush()
+                STATISTICS_PERSISTENCE.observe(time.perf_counter() - started_at)
+
+    def compact(self):
+        """
+        Writes a snapshot of the statistics and starts a new, empty journal.
+
+        The snapshot is written before the journal is emptied, a crash in between only leaves events the snapshot
+        already contains, which are skipped on replay. If the snapshot can not be written, the events keep being
+        appended to the current journal and the next compaction tries again.
+        """
+        with self.lock:
+            if self.journal is not None:
+                self.journal.flush()
+            self.dirty = True
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"{ANSI.RED.value}Could not compact the statistics journal: {e}{ANSI.RESET.value}")
+                if self.journal is None:
+                    self.journal = open(self.journal_path, "a", buffering=1 << 16)
+                return
+            if self.journal is not None:
+                self.journal.close()
+            self.snapshot_seq = self.journal_seq
+            self.journal = open(self.journal_path, "w", buffering=1 << 16)
+
+    def close(self):
+        """
+        Compacts the journal on shutdown.
+        """
+        with self.lock:
+            self.compact()
+            self.journal.close()
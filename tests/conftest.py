@@ -0,0 +1,18 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty directory holding a copy of the config file, the statistics files are written there.
+    """
+    shutil.copy(os.path.join(ROOT, 'config.json'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,28 @@
+import json
+import os
+
+from GameStatistics import GameStatistics
+from Player import Player
+
+
+def test_reload_skips_an_unchanged_file_and_reads_a_changed_one(workdir, monkeypatch):
+    statistics = GameStatistics(flush_interval_ms=0)
+    statistics.add_player(Player("alice", None, False))
+    rebuilds = []
+    rebuild = statistics.leaderboard.rebuild
+    monkeypatch.setattr(statistics.leaderboard, "rebuild", lambda *args: rebuilds.append(rebuild(*args)))
+
+    statistics.reload_statistics()
+    assert rebuilds == []
+
+    with open("statistics.json") as file:
+        content = json.load(file)
+    content["players_data"]["bob"] = {"games_played": 2, "games_won": 1, "correct_answers": 3,
+                                      "incorrect_answers": 0}
+    with open("statistics.json", "w") as file:
+        json.dump(content, file)
+    os.utime("statistics.json", ns=(statistics.loaded_mtime + 10 ** 9, statistics.loaded_mtime + 10 ** 9))
+    statistics.reload_statistics()
+
+    assert len(rebuilds) == 1
+    assert statistics.get_trivia_king() == "bob"
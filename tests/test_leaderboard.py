@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from Leaderboard import Leaderboard
+
+
+@pytest.fixture
+def players():
+    rng = random.Random(3)
+    leaderboard = Leaderboard()
+    for number in range(500):
+        name = rng.choice("abc") + rng.choice("abcd") + str(number)
+        leaderboard.update_player(name, {"games_played": rng.randint(0, 9), "games_won": rng.randint(0, 3),
+                                         "correct_answers": rng.randint(0, 5), "incorrect_answers": rng.randint(0, 5)})
+    return leaderboard.players
+
+
+def walk_ranking(table, prefix, sort_by, descending):
+    ranking = table.rankings[sort_by]
+    ranked = [name for name in ranking.names(descending) if name.startswith(prefix)]
+    return ranked + [name for name in table.names if name.startswith(prefix) and name not in ranking.keys]
+
+
+@pytest.mark.parametrize("prefix", ["a", "bc", "zz"])
+@pytest.mark.parametrize("sort_by", ["games_won", "correct_ratio"])
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("offset", [0, 15])
+def test_prefix_page_matches_the_whole_ranking(players, prefix, sort_by, descending, offset):
+    expected = walk_ranking(players, prefix, sort_by, descending)
+
+    total, page = players.query(prefix, sort_by, descending, offset, 10)
+
+    assert total == len(expected)
+    assert page == expected[offset:offset + 10]
+
+
+def test_rebuild_matches_updating_row_by_row(players):
+    rows = {name: dict(zip(players.counters, counts)) for name, counts in players.counts.items()}
+    rebuilt = Leaderboard()
+
+    rebuilt.rebuild(rows, {})
+
+    assert rebuilt.players.names == players.names
+    assert rebuilt.players.totals == players.totals
+    for key, ranking in players.rankings.items():
+        assert rebuilt.players.rankings[key].entries == ranking.entries
+        assert rebuilt.players.rankings[key].keys == ranking.keys
+    assert rebuilt.questions.names == []
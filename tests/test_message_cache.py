@@ -0,0 +1,17 @@
+from MessageCache import MessageCache
+
+
+def question(question_id):
+    return {"id": question_id, "question": f"Question {question_id}", "is_true": True}
+
+
+def test_question_bodies_are_bounded_least_recently_used_first():
+    cache = MessageCache([], "Question", "You lost", max_question_bodies=2)
+
+    cache.get_question_body(question(1))
+    cache.get_question_body(question(2))
+    cache.get_question_body(question(1))
+    body = cache.get_question_body(question(3))
+
+    assert list(cache.question_bodies) == [1, 3]
+    assert body == "\nQuestion: Question 3".encode()
@@ -0,0 +1,45 @@
+import socket
+
+from OutboundWriter import OutboundWriter
+from Player import Player
+
+
+def connected_player(name):
+    server_side, client_side = socket.socketpair()
+    server_side.setblocking(False)
+    return Player(name, server_side, True), client_side
+
+
+def receive(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return bytes(data)
+
+
+def test_buffers_are_sent_in_order():
+    player, client_side = connected_player("alice")
+    writer = OutboundWriter(1 << 22, lambda evicted: None)
+    writer.start()
+    messages = [bytes([number]) * 100000 for number in range(10)]
+
+    for message in messages:
+        writer.enqueue(player, message)
+
+    assert receive(client_side, 10 * 100000) == b"".join(messages)
+    writer.close()
+    assert not writer.is_alive()
+
+
+def test_close_evicts_the_players_that_never_drain():
+    player, client_side = connected_player("slow")
+    evicted = []
+    writer = OutboundWriter(1 << 24, evicted.append)
+    writer.start()
+
+    writer.enqueue(player, b"x" * (1 << 23))  # more than the socket buffers hold, never read
+    writer.close(timeout=0.2)
+
+    assert evicted == [player]
+    assert not writer.is_alive()
+    client_side.close()
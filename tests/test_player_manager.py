@@ -0,0 +1,27 @@
+from Player import Player
+from PlayerManager import PlayerManager
+
+
+def test_taken_names_get_the_next_free_suffix():
+    manager = PlayerManager()
+    players = [Player("bot", None, False) for _ in range(3)]
+
+    renamed = [manager.add_player(player) for player in players]
+
+    assert renamed == [False, True, True]
+    assert [player.get_name() for player in players] == ["bot", "bot(1)", "bot(2)"]
+    assert manager.get_player_by_name("bot(2)") is players[2]
+    assert manager.get_player(players[1].get_id()) is players[1]
+
+
+def test_roster_follows_joins_and_kicks():
+    manager = PlayerManager()
+    alice, bob, carol = (Player(name, None, False) for name in ("alice", "bob", "carol"))
+    manager.add_player(alice)
+    manager.add_player(bob)
+
+    assert manager.get_active_roster() == b"alice, bob"
+    manager.add_player(carol)
+    manager.kick_player(bob)
+    assert manager.get_active_roster() == b"alice, carol"
+    assert manager.get_player_by_name("bob") is None
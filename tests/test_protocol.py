@@ -0,0 +1,58 @@
+import pytest
+
+from Protocol import (FRAME_HEADER, MAX_FRAME_SIZE, OFFER_LOAD, OFFER_PORT, FrameDecoder, MessageKind, encode_answer,
+                      encode_frame, parse_offer, parse_offer_load, split_question_id)
+
+
+def test_frame_split_across_reads():
+    frame = encode_frame(MessageKind.TEXT, b"hello world")
+    decoder = FrameDecoder()
+
+    for byte in frame[:-1]:
+        decoder.feed(bytes([byte]))
+        assert decoder.next_frame() is None
+    decoder.feed(frame[-1:])
+
+    assert decoder.next_frame() == (MessageKind.TEXT, b"hello world")
+    assert decoder.next_frame() is None
+
+
+def test_coalesced_frames_in_one_read():
+    decoder = FrameDecoder()
+    decoder.feed(encode_frame(MessageKind.WELCOME, b"welcome") + encode_answer(7, "T")
+                 + encode_frame(MessageKind.GAME_OVER, b""))
+
+    frames = list(decoder.frames())
+
+    assert [kind for kind, _ in frames] == [MessageKind.WELCOME, MessageKind.ANSWER, MessageKind.GAME_OVER]
+    assert split_question_id(frames[1][1]) == (7, "T")
+    assert frames[2][1] == b""
+
+
+def test_partial_frame_is_kept_after_a_complete_one():
+    second = encode_frame(MessageKind.QUESTION, b"\0\0\0\1question")
+    decoder = FrameDecoder()
+    decoder.feed(encode_frame(MessageKind.TEXT, b"first") + second[:3])
+
+    assert list(decoder.frames()) == [(MessageKind.TEXT, b"first")]
+    decoder.feed(second[3:])
+    assert decoder.next_frame() == (MessageKind.QUESTION, b"\0\0\0\1question")
+
+
+def test_oversized_frame_is_rejected():
+    decoder = FrameDecoder()
+    decoder.feed(FRAME_HEADER.pack(MessageKind.TEXT, MAX_FRAME_SIZE + 1))
+
+    with pytest.raises(ValueError):
+        decoder.next_frame()
+
+
+def test_legacy_and_extended_offers():
+    prefix = b"\xab\xcd\xdc\xba\x02" + b"server".ljust(32, b"\0")
+    legacy = prefix + OFFER_PORT.pack(1027)
+    extended = legacy + OFFER_LOAD.pack(5, 0, 1, 4, 0xFFFF)
+
+    assert (parse_offer(legacy, prefix), parse_offer_load(legacy, prefix)) == (1027, None)
+    assert (parse_offer(extended, prefix), parse_offer_load(extended, prefix)) == (1027, (5, 0, 1, 4, 0xFFFF))
+    assert parse_offer(b"\0" + legacy[1:], prefix) is None
+    assert parse_offer(legacy[:-1], prefix) is None
@@ -0,0 +1,102 @@
+import json
+import os
+import random
+
+import pytest
+
+from QuestionBank import INDEX_HEADER, QuestionBank
+
+
+def write_questions(path, questions):
+    with open(path, "w") as file:
+        for question in questions:
+            file.write(json.dumps(question) + "\n")
+
+
+def question(number):
+    return {"question": f"Question {number}", "is_true": number % 2 == 0}
+
+
+def test_index_file_is_written_and_reused(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [question(number) for number in range(3)])
+
+    first = QuestionBank(path=path)
+    first.close()
+    assert os.path.exists(path + ".idx")
+    second = QuestionBank(path=path)
+
+    assert second.index_map is not None  # the index was memory-mapped instead of rebuilt
+    assert len(second) == 3
+    assert second.load(2)["question"] == "Question 2"
+    second.close()
+
+
+def test_stale_index_is_rebuilt_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [question(number) for number in range(3)])
+    QuestionBank(path=path).close()
+    write_questions(path, [question(number) for number in range(5)])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    bank = QuestionBank(path=path)
+
+    assert bank.index_map is None
+    assert len(bank) == 5
+    assert bank.load(4)["question"] == "Question 4"
+    with open(path + ".idx", "rb") as index_file:
+        assert INDEX_HEADER.unpack(index_file.read(INDEX_HEADER.size)) == bank.signature
+    bank.close()
+
+
+def test_index_of_same_size_file_is_rebuilt_when_only_the_mtime_changes(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [question(1), question(2)])
+    QuestionBank(path=path).close()
+    write_questions(path, [question(3), question(4)])  # same size, different content
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    bank = QuestionBank(path=path)
+
+    assert bank.load(0)["question"] == "Question 3"
+    bank.close()
+
+
+def test_is_modified_follows_the_file(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [question(1)])
+    bank = QuestionBank(path=path)
+
+    assert not bank.is_modified()
+    write_questions(path, [question(1), question(2)])
+    assert bank.is_modified()
+    bank.close()
+
+
+def test_filtered_bank_reads_no_question_until_a_game_draws_them(tmp_path, monkeypatch):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [{**question(number), "category": "odd" if number % 2 else "even"} for number in range(10)])
+    loads = []
+    load = QuestionBank.load
+    monkeypatch.setattr(QuestionBank, "load", lambda bank, number: loads.append(number) or load(bank, number))
+
+    bank = QuestionBank(path=path, categories=["odd"])
+    assert loads == []
+    drawn = list(bank.sample(random.Random(5)))
+
+    assert sorted(drawn_question["question"] for drawn_question in drawn) == [f"Question {number}"
+                                                                              for number in (1, 3, 5, 7, 9)]
+    assert sorted(loads) == list(range(10))
+    bank.close()
+
+
+def test_validate_rejects_a_filter_no_question_matches(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_questions(path, [question(number) for number in range(3)])
+    bank = QuestionBank(path=path, categories=["missing"])
+
+    with pytest.raises(ValueError):
+        bank.validate()
+    bank.close()
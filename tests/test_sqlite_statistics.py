@@ -0,0 +1,16 @@
+import json
+
+from SQLiteStatistics import migrate_from_json
+
+
+def test_migrating_twice_keeps_one_copy_of_the_games(workdir):
+    with open("statistics.json", "w") as file:
+        json.dump({"players_data": {"alice": {"games_played": 2, "games_won": 1, "correct_answers": 4,
+                                              "incorrect_answers": 1}},
+                   "games_data": 3, "question_data": {}}, file)
+
+    migrate_from_json().update_game()
+    statistics = migrate_from_json()
+
+    assert statistics.get_games_data() == 4
+    assert statistics.get_players_data()["alice"]["games_won"] == 1
@@ -0,0 +1,110 @@
+import atexit
+import json
+
+import pytest
+
+from StatisticsJournal import JournaledStatistics
+
+
+@pytest.fixture
+def open_journal(workdir):
+    """
+    Opens JournaledStatistics in the test directory, without compacting them again when the tests exit.
+    """
+    opened = []
+
+    def open_statistics():
+        statistics = JournaledStatistics("statistics.journal", compact_events=1000)
+        atexit.unregister(statistics.close)
+        opened.append(statistics)
+        return statistics
+
+    yield open_statistics
+    for statistics in opened:
+        statistics.journal.close()
+
+
+def write_snapshot(games, journal_seq):
+    with open("statistics.json", "w") as file:
+        json.dump({"players_data": {}, "games_data": games, "question_data": {}, "trivia_king": [None, 0],
+                   "journal_seq": journal_seq}, file)
+
+
+def write_journal(*lines):
+    with open("statistics.journal", "w") as file:
+        file.write("".join(lines))
+
+
+def game_event(seq):
+    return json.dumps({"event": "game_played", "seq": seq}) + "\n"
+
+
+def test_replay_skips_the_events_of_the_snapshot(open_journal):
+    write_snapshot(games=5, journal_seq=2)
+    write_journal(game_event(1), game_event(2), game_event(3))
+
+    statistics = open_journal()
+
+    assert statistics.get_games_data() == 6
+    assert statistics.journal_seq == 3
+
+
+def test_replay_ignores_a_torn_last_event(open_journal):
+    write_snapshot(games=0, journal_seq=0)
+    write_journal(game_event(1), game_event(2), '{"event": "game_pl')
+
+    statistics = open_journal()
+
+    assert statistics.get_games_data() == 2
+    assert statistics.journal_seq == 2
+
+
+def test_events_survive_a_crash_before_compaction(open_journal):
+    statistics = open_journal()
+    for _ in range(3):
+        statistics.update_game()
+    statistics.request_flush()  # the events reach the journal, no snapshot is written
+
+    assert open_journal().get_games_data() == 3
+
+
+def test_crash_between_snapshot_and_journal_truncation_counts_events_once(open_journal):
+    statistics = open_journal()
+    for _ in range(3):
+        statistics.update_game()
+    statistics.request_flush()
+    with open("statistics.journal") as journal:
+        events = journal.read()
+    statistics.compact()
+    write_journal(events)  # the journal as it was when the snapshot was written
+
+    assert open_journal().get_games_data() == 3
+
+
+def test_compaction_writes_the_snapshot_and_empties_the_journal(open_journal):
+    statistics = open_journal()
+    statistics.update_game()
+    statistics.compact()
+
+    with open("statistics.json") as file:
+        snapshot = json.load(file)
+    with open("statistics.journal") as journal:
+        assert journal.read() == ""
+    assert snapshot["games_data"] == 1
+    assert snapshot["journal_seq"] == statistics.journal_seq == statistics.snapshot_seq
+
+
+def test_failed_compaction_keeps_journaling(open_journal, monkeypatch):
+    statistics = open_journal()
+    statistics.update_game()
+
+    def fail_to_write():
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(statistics, "flush", fail_to_write)
+    statistics.compact()
+    statistics.update_game()
+    statistics.request_flush()
+
+    assert statistics.snapshot_seq == 0
+    assert open_journal().get_games_data() == 2